@@ -0,0 +1,122 @@
+"""Diagram editor.
+Headless batch processing of many diagram files, in parallel.
+
+Usage:
+    python cli.py <task> <files or directories>... [options]
+Tasks: validate, layout, convert, svg, stats. See `python cli.py -h`.
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+
+from core.exporters import ExportFormat
+from core.processing import (
+    Task, TaskOptions, TaskResult, find_files, run_batch
+)
+from core.themes import THEMES
+
+
+class Cli:
+    """Command line interface of batch processing.
+    Results are printed as soon as files are done: a line per file with
+    its processing time, or a JSON object per line with --json.
+    """
+    def __init__(self, argv: list[str]):
+        """Init.
+        """
+        self._args = self._get_parser().parse_args(argv)
+
+    @staticmethod
+    def _get_parser() -> argparse.ArgumentParser:
+        """Get parser of command line arguments.
+        """
+        parser = argparse.ArgumentParser(
+            prog='cli.py',
+            description='Process diagram files in parallel.'
+        )
+        parser.add_argument('task', choices=Task.ALL)
+        parser.add_argument(
+            'paths', nargs='+',
+            help='diagram files (.json) or importable files (DOT, GraphML, '
+                 'CSV), or directories with them'
+        )
+        parser.add_argument(
+            '-o', '--output-dir',
+            help='directory of output files, required by: '
+                 + ', '.join(Task.WITH_OUTPUT)
+        )
+        parser.add_argument(
+            '-f', '--format', default=ExportFormat.JSON,
+            choices=sorted(set(ExportFormat.EXTENSIONS.values())),
+            help='format of converted files'
+        )
+        parser.add_argument('-r', '--rules', help='rules to validate against')
+        parser.add_argument('-t', '--theme', default='dark',
+                            choices=list(THEMES), help='theme of SVG images')
+        parser.add_argument('-j', '--jobs', type=int,
+                            help='amount of worker processes (CPU count)')
+        parser.add_argument('--json', action='store_true',
+                            help='print results as JSON lines')
+        return parser
+
+    def run(self) -> int:
+        """Process files, get exit code: 0 if all files succeeded.
+        """
+        args = self._args
+        options = TaskOptions(
+            output_dir=args.output_dir,
+            output_format=args.format,
+            rules_path=args.rules,
+            theme=args.theme,
+        )
+        inputs = find_files(args.paths)
+        started = time.perf_counter()
+        files = failed = 0
+        busy = 0.0
+        try:
+            for result in run_batch(args.task, inputs, options, args.jobs):
+                files += 1
+                failed += not result.ok
+                busy += result.seconds
+                self._print_result(result)
+        except ValueError as e:
+            print(f'Error: {e}', file=sys.stderr)
+            return 2
+
+        elapsed = time.perf_counter() - started
+        print(
+            f'{files} files, {failed} failed, {elapsed:.2f}s elapsed, '
+            f'{busy:.2f}s of processing '
+            f'(x{busy / elapsed if elapsed else 0:.1f})',
+            file=sys.stderr
+        )
+        return 1 if failed else 0
+
+    def _print_result(self, result: TaskResult):
+        """Print result of file's processing.
+        """
+        if self._args.json:
+            print(json.dumps(asdict(result), ensure_ascii=False), flush=True)
+            return
+        status = 'OK' if result.ok else 'FAIL'
+        if result.error:
+            details = result.error.strip().splitlines()[-1]
+        elif 'problems' in result.data:
+            details = '; '.join(result.data['problems'][:3])
+        elif 'output' in result.data:
+            details = result.data['output']
+        else:
+            details = ', '.join(
+                f'{key}={value}' for key, value in result.data.items()
+            )
+        print(f'{status:4} {result.seconds:8.3f}s  {result.path}  {details}',
+              flush=True)
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    sys.exit(Cli(sys.argv[1:]).run())
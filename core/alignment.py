@@ -0,0 +1,220 @@
+"""Alignment of dragged nodes: snap-to-grid and smart guides.
+"""
+
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from operator import itemgetter
+from typing import Hashable, Iterable, Optional
+
+from core.aliases import Box
+
+
+class AxisIndex:
+    """Sorted index of boxes' guide lines along one axis: for each box,
+    its low edge, center and high edge coordinates.
+    Lookups and updates are done by bisection.
+    """
+    # Lines closer than that are considered as coinciding:
+    EPSILON = 0.5
+    # Amount of updated boxes, from which a single merge is cheaper than
+    # separate insertions:
+    MERGE_THRESHOLD = 8
+
+    def __init__(self):
+        """Init.
+        """
+        self._values: list[float] = []
+        self._keys: list[Hashable] = []
+        self._lines: dict[Hashable, tuple[float, float, float]] = {}
+
+    def __len__(self):
+        """Amount of indexed boxes.
+        """
+        return len(self._lines)
+
+    def __contains__(self, key: Hashable):
+        """Is box indexed.
+        """
+        return key in self._lines
+
+    @staticmethod
+    def get_lines(low: float, high: float) -> tuple[float, float, float]:
+        """Get guide lines of a box: low edge, center, high edge.
+        """
+        return low, (low + high) / 2, high
+
+    def add(self, key: Hashable, low: float, high: float):
+        """Add box's lines, replacing previous ones, if box is indexed.
+        """
+        if key in self._lines:
+            self.remove(key)
+        lines = self.get_lines(low, high)
+        self._lines[key] = lines
+        for value in lines:
+            index = bisect_right(self._values, value)
+            self._values.insert(index, value)
+            self._keys.insert(index, key)
+
+    def remove(self, key: Hashable):
+        """Remove box's lines, if box is indexed.
+        """
+        for value in self._lines.pop(key, ()):
+            index = bisect_left(self._values, value)
+            while self._keys[index] != key:
+                index += 1
+            del self._values[index]
+            del self._keys[index]
+
+    def update_many(self, boxes: Iterable[tuple[Hashable, float, float]]):
+        """Add or update (key, low, high) of several boxes.
+        Many boxes are updated by a single pass over the index: remaining
+        lines are merged with sorted new ones.
+        """
+        lines = {key: self.get_lines(low, high) for key, low, high in boxes}
+        if len(lines) <= self.MERGE_THRESHOLD:
+            for key, (low, _, high) in lines.items():
+                self.add(key, low, high)
+            return
+
+        kept = [
+            (value, key)
+            for value, key in zip(self._values, self._keys)
+            if key not in lines
+        ]
+        added = sorted(
+            ((value, key) for key, values in lines.items()
+             for value in values),
+            key=itemgetter(0)
+        )
+        entries = list(merge(kept, added, key=itemgetter(0)))
+        self._values = [value for value, _ in entries]
+        self._keys = [key for _, key in entries]
+        self._lines.update(lines)
+
+    def find_nearest(self, value: float, tolerance: float,
+                     exclude: frozenset = frozenset()
+                     ) -> Optional[float]:
+        """Get indexed line, nearest to value, within tolerance.
+        Lines of excluded boxes are ignored.
+        """
+        best = None
+        start = bisect_left(self._values, value - tolerance)
+        end = bisect_right(self._values, value + tolerance)
+        for index in range(start, end):
+            if self._keys[index] in exclude:
+                continue
+            line = self._values[index]
+            if best is None or abs(line - value) < abs(best - value):
+                best = line
+        return best
+
+    def find_keys(self, value: float,
+                  exclude: frozenset = frozenset()) -> list[Hashable]:
+        """Get keys of boxes, having a line at value.
+        """
+        start = bisect_left(self._values, value - self.EPSILON)
+        end = bisect_right(self._values, value + self.EPSILON)
+        return [
+            key for key in self._keys[start:end] if key not in exclude
+        ]
+
+
+class AlignmentIndex:
+    """Indices of boxes' vertical (x) and horizontal (y) guide lines.
+    Used to snap dragged box to lines of other boxes.
+    """
+    def __init__(self):
+        """Init.
+        """
+        self._x = AxisIndex()
+        self._y = AxisIndex()
+        self._boxes: dict[Hashable, Box] = {}
+
+    def __len__(self):
+        """Amount of indexed boxes.
+        """
+        return len(self._boxes)
+
+    def add(self, key: Hashable, box: Box):
+        """Add box, or update it, if already indexed.
+        """
+        x1, y1, x2, y2 = self._boxes[key] = box
+        self._x.add(key, x1, x2)
+        self._y.add(key, y1, y2)
+
+    def remove(self, key: Hashable):
+        """Remove box, if indexed.
+        """
+        self._boxes.pop(key, None)
+        self._x.remove(key)
+        self._y.remove(key)
+
+    def update_many(self, boxes: dict[Hashable, Box]):
+        """Add or update several boxes at once.
+        """
+        self._boxes.update(boxes)
+        self._x.update_many(
+            (key, x1, x2) for key, (x1, _, x2, _) in boxes.items()
+        )
+        self._y.update_many(
+            (key, y1, y2) for key, (_, y1, _, y2) in boxes.items()
+        )
+
+    def clear(self):
+        """Remove all boxes.
+        """
+        self.__init__()
+
+    def snap(self, box: Box, tolerance: float,
+             exclude: frozenset = frozenset()
+             ) -> tuple[Optional[float], Optional[float]]:
+        """Get shifts along x and y, which align some line of the box
+        with the nearest line of indexed boxes, None for axis without
+        such a line within tolerance.
+        """
+        x1, y1, x2, y2 = box
+        return (
+            self._snap_axis(self._x, x1, x2, tolerance, exclude),
+            self._snap_axis(self._y, y1, y2, tolerance, exclude)
+        )
+
+    @staticmethod
+    def _snap_axis(axis: AxisIndex, low: float, high: float,
+                   tolerance: float, exclude: frozenset) -> Optional[float]:
+        """Get shift, aligning one of box's lines along the axis.
+        """
+        best = None
+        for value in axis.get_lines(low, high):
+            line = axis.find_nearest(value, tolerance, exclude)
+            if line is not None and (
+                    best is None or abs(line - value) < abs(best)):
+                best = line - value
+        return best
+
+    def get_guides(self, box: Box, exclude: frozenset = frozenset()
+                   ) -> list[Box]:
+        """Get guide segments for the box, aligned with indexed boxes:
+        for each of box's lines, matching some lines of other boxes,
+        a segment spanning the box and all of them.
+        """
+        x1, y1, x2, y2 = box
+        guides = []
+        for x in self._x.get_lines(x1, x2):
+            keys = self._x.find_keys(x, exclude)
+            if keys:
+                low = min([y1] + [self._boxes[key][1] for key in keys])
+                high = max([y2] + [self._boxes[key][3] for key in keys])
+                guides.append((x, low, x, high))
+        for y in self._y.get_lines(y1, y2):
+            keys = self._y.find_keys(y, exclude)
+            if keys:
+                low = min([x1] + [self._boxes[key][0] for key in keys])
+                high = max([x2] + [self._boxes[key][2] for key in keys])
+                guides.append((low, y, high, y))
+        return guides
+
+
+def snap_to_grid(value: float, step: int) -> float:
+    """Get nearest grid line coordinate.
+    """
+    return round(value / step) * step
@@ -0,0 +1,36 @@
+"""Edge bundling geometry.
+"""
+
+from collections import defaultdict
+from math import atan2, pi
+from typing import Hashable, Sequence
+
+from core.aliases import Coords
+
+
+def cluster_by_direction(origin: Coords,
+                         ends: Sequence[tuple[Hashable, Coords]],
+                         sectors: int,
+                         min_size: int) -> list[list[Hashable]]:
+    """Group edges, going from origin point to their far ends, by
+    direction: edges, which ends lie in the same angle sector, form
+    a bundle. Bundles smaller than min_size are not returned.
+    Args: origin - common point of edges, ends - (edge key, far end).
+    """
+    x0, y0 = origin
+    groups = defaultdict(list)
+    for key, (x, y) in ends:
+        angle = atan2(y - y0, x - x0) + pi
+        groups[int(angle / (2 * pi) * sectors) % sectors].append(key)
+    return [keys for keys in groups.values() if len(keys) >= min_size]
+
+
+def get_split_point(origin: Coords, ends: Sequence[Coords],
+                    trunk_ratio: float) -> Coords:
+    """Get point, where bundle's trunk splits into separate edges:
+    on the way from origin to the centroid of ends, at trunk_ratio of it.
+    """
+    x0, y0 = origin
+    x = sum(end[0] for end in ends) / len(ends)
+    y = sum(end[1] for end in ends) / len(ends)
+    return x0 + (x - x0) * trunk_ratio, y0 + (y - y0) * trunk_ratio
@@ -0,0 +1,848 @@
+"""Real-time collaboration: sync server and its clients, over asyncio
+streams.
+
+Editors send batches of diagram operations as compact JSON lines. The
+server orders batches, checks them against its own copy of the diagram
+and broadcasts accepted operations to other editors. Conflicts are
+resolved by the server's order:
+    - the last move or edit of a node, or label of an edge wins: an
+      editor ignores others' changes of elements, which it has changed
+      by not yet acknowledged operations, as its own ones are ordered
+      later;
+    - deletion wins: changes of deleted elements and edges to deleted
+      nodes are rejected by the server, and rejected elements are
+      deleted by their editor.
+Malformed operations (f.e. with payload values of wrong types) are
+rejected too, so they never reach the diagram and other editors.
+
+Run a server, optionally over a saved document:
+    python -m core.collaboration serve [document.json] [--port PORT]
+Measure throughput and latency with simulated editors:
+    python -m core.collaboration bench [--clients N] [--seconds S]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+from collections import deque
+from copy import copy
+from dataclasses import MISSING, fields, replace
+from typing import Any, Callable, Optional, Sequence
+
+from core.document import Document, NodeData, EdgeData, GroupData
+from core.enums import Gamma
+from core.operations import Operation, OperationKind
+from core.sessions import LatencyReport
+
+# ---------------------- WIRE FORMAT ------------------------- #
+
+# Messages of the server: hello (editor's id slot, ids stride and the
+# current document), acknowledgement of editor's batch (ids of rejected
+# operations), batch of other editor's operations, error:
+HELLO = 'h'
+ACK = 'a'
+BATCH = 'b'
+ERROR = 'x'
+# Editor's messages are batches: lists of encoded operations.
+
+CODES = {
+    OperationKind.CREATE_NODE: 'n',
+    OperationKind.CONNECT: 'c',
+    OperationKind.MOVE: 'm',
+    OperationKind.EDIT: 'e',
+    OperationKind.LABEL: 'l',
+    OperationKind.DELETE: 'd',
+}
+KINDS = {code: kind for kind, code in CODES.items()}
+
+# Payload fields of operations, in the wire order:
+FIELDS = {
+    OperationKind.CREATE_NODE: tuple(
+        f.name for f in fields(NodeData) if f.name != 'id'
+    ),
+    OperationKind.CONNECT: (
+        'source', 'target', 'source_port', 'target_port', 'label'
+    ),
+    OperationKind.MOVE: ('x', 'y'),
+    OperationKind.EDIT: ('text_head', 'text_desc'),
+    OperationKind.LABEL: ('label',),
+    OperationKind.DELETE: (),
+}
+
+
+def _get_defaults(data_class: type, names: Sequence[str]) -> tuple:
+    """Get default values of dataclass fields, MISSING for required ones.
+    """
+    by_name = {f.name: f for f in fields(data_class)}
+    return tuple(
+        by_name[name].default_factory()
+        if by_name[name].default_factory is not MISSING
+        else by_name[name].default
+        for name in names
+    )
+
+
+# Default values of payload fields, omitted at the end of messages:
+DEFAULTS = {
+    OperationKind.CREATE_NODE: _get_defaults(
+        NodeData, FIELDS[OperationKind.CREATE_NODE]
+    ),
+    OperationKind.CONNECT: _get_defaults(
+        EdgeData, FIELDS[OperationKind.CONNECT]
+    ),
+    OperationKind.MOVE: (MISSING, MISSING),
+    OperationKind.EDIT: (MISSING, MISSING),
+    OperationKind.LABEL: (MISSING,),
+    OperationKind.DELETE: (),
+}
+
+
+def _is_number(value: Any) -> bool:
+    """Is value a coordinate.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_size(value: Any) -> bool:
+    """Is value a size of node.
+    """
+    return _is_number(value) and value > 0
+
+
+def _is_specs(value: Any) -> bool:
+    """Is value a list of port specs.
+    """
+    return isinstance(value, list) \
+        and all(isinstance(spec, str) for spec in value)
+
+
+def _is_group(value: Any) -> bool:
+    """Is value a non-empty collapsed group's content, or None.
+    """
+    if value is None:
+        return True
+    try:
+        GroupData.from_dict(value)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+# Checks of payload values by field names; other fields are strings:
+CHECKS: dict[str, Callable[[Any], bool]] = {
+    'x': _is_number,
+    'y': _is_number,
+    'width': _is_size,
+    'height': _is_size,
+    'gamma': lambda value: isinstance(value, str)
+    and value in Gamma.__members__,
+    'group': _is_group,
+    'inputs': _is_specs,
+    'outputs': _is_specs,
+}
+
+
+def encode_operation(operation: Operation) -> list:
+    """Get operation as a compact list: kind's code, element's id and
+    payload values, without trailing default ones.
+    """
+    values = [operation.payload[name] for name in FIELDS[operation.kind]]
+    defaults = DEFAULTS[operation.kind]
+    while values and values[-1] == defaults[len(values) - 1]:
+        values.pop()
+    return [CODES[operation.kind], operation.id, *values]
+
+
+def decode_operation(message: list) -> Operation:
+    """Get operation from a list, made by `encode_operation`.
+    Raise ValueError, if message is malformed or payload values have
+    wrong types.
+    """
+    try:
+        code, tag_id, *values = message
+        kind = KINDS[code]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f'Malformed operation: {message!r}') from e
+    names, defaults = FIELDS[kind], DEFAULTS[kind]
+    if not isinstance(tag_id, str) or len(values) > len(names) \
+            or MISSING in defaults[len(values):]:
+        raise ValueError(f'Malformed operation: {message!r}')
+    payload = {
+        name: copy(default) for name, default in zip(names, defaults)
+    }
+    for name, value in zip(names, values):
+        check = CHECKS.get(name)
+        if not (check(value) if check else isinstance(value, str)):
+            raise ValueError(f'Bad {name} of operation: {message!r}')
+        payload[name] = value
+    if kind == OperationKind.CREATE_NODE:
+        payload['id'] = tag_id
+    return Operation(kind, tag_id, payload)
+
+
+def dumps(message: Any) -> bytes:
+    """Get message as a compact JSON line.
+    """
+    return json.dumps(
+        message, separators=(',', ':'), ensure_ascii=False
+    ).encode() + b'\n'
+
+
+def loads(line: bytes) -> Any:
+    """Get message from JSON line.
+    Raise ValueError, if line is not a valid message.
+    """
+    message = json.loads(line)
+    if not isinstance(message, list) or not message:
+        raise ValueError(f'Malformed message: {line[:100]!r}')
+    return message
+
+
+# ---------------------- SERVER ------------------------- #
+
+class DiagramState:
+    """Diagram, changed by operations, which are checked against it.
+    Unlike `core.operations.apply_operations`, every operation costs
+    O(1), besides deletion of node's edges.
+    """
+    def __init__(self, document: Document):
+        """Init.
+        """
+        self._nodes = {node.id: node for node in document.nodes}
+        self._edges: dict[str, EdgeData] = {}
+        # Node's id -> ids of its edges:
+        self._node_edges: dict[str, set[str]] = {
+            tag_id: set() for tag_id in self._nodes
+        }
+        for edge in document.edges:
+            if edge.source in self._nodes and edge.target in self._nodes:
+                self._add_edge(edge)
+
+    def __contains__(self, tag_id: str):
+        """Does element exist.
+        """
+        return tag_id in self._nodes or tag_id in self._edges
+
+    def _add_edge(self, edge: EdgeData):
+        """Add edge between existing nodes.
+        """
+        self._edges[edge.id] = edge
+        self._node_edges[edge.source].add(edge.id)
+        self._node_edges[edge.target].add(edge.id)
+
+    def _delete_edge(self, tag_id: str):
+        """Delete existing edge.
+        """
+        edge = self._edges.pop(tag_id)
+        self._node_edges[edge.source].discard(tag_id)
+        self._node_edges[edge.target].discard(tag_id)
+
+    def apply(self, operation: Operation) -> bool:
+        """Apply operation, if it's valid for the current diagram: new
+        elements have new ids, edges connect existing nodes, changed and
+        deleted elements exist.
+        Return, if operation was applied.
+        """
+        kind, tag_id = operation.kind, operation.id
+        exists = tag_id in self
+        if kind == OperationKind.CREATE_NODE:
+            if exists:
+                return False
+            self._nodes[tag_id] = NodeData(**operation.payload)
+            self._node_edges[tag_id] = set()
+        elif kind == OperationKind.CONNECT:
+            edge = EdgeData(id=tag_id, **operation.payload)
+            if exists or edge.source not in self._nodes \
+                    or edge.target not in self._nodes:
+                return False
+            self._add_edge(edge)
+        elif kind in (OperationKind.MOVE, OperationKind.EDIT):
+            if tag_id not in self._nodes:
+                return False
+            self._nodes[tag_id] = replace(
+                self._nodes[tag_id], **operation.payload
+            )
+        elif kind == OperationKind.LABEL:
+            if tag_id not in self._edges:
+                return False
+            self._edges[tag_id] = replace(
+                self._edges[tag_id], **operation.payload
+            )
+        elif kind == OperationKind.DELETE:
+            if tag_id in self._nodes:
+                for edge_id in list(self._node_edges.pop(tag_id)):
+                    self._delete_edge(edge_id)
+                del self._nodes[tag_id]
+            elif tag_id in self._edges:
+                self._delete_edge(tag_id)
+            else:
+                return False
+        return True
+
+    def to_document(self) -> Document:
+        """Get the current diagram.
+        """
+        return Document(
+            list(self._nodes.values()), list(self._edges.values())
+        )
+
+
+class SyncServer:
+    """Sync server of editors of a diagram.
+    Editors get id slots, so ids of their new elements don't collide,
+    see `Registry.set_id_slot`. Batches are ordered by their arrival;
+    each one is acknowledged to its editor and its accepted operations
+    are broadcast to other editors as they were encoded.
+    """
+    HOST = '127.0.0.1'
+    PORT = 8765
+    ID_STRIDE = 1024
+    # Limit of a single message:
+    MAX_MESSAGE = 64 * 1024 * 1024
+    # Editors, not reading their messages, are disconnected, when their
+    # unsent data exceeds that:
+    MAX_BACKLOG = 16 * 1024 * 1024
+
+    def __init__(self, document: Optional[Document] = None):
+        """Init.
+        """
+        self._state = DiagramState(document or Document())
+        # Id slot -> connection of the editor:
+        self._writers: dict[int, asyncio.StreamWriter] = {}
+        self._sequence = 0
+
+    @property
+    def document(self) -> Document:
+        """Current diagram.
+        """
+        return self._state.to_document()
+
+    async def start(self, host: str = HOST,
+                    port: int = PORT) -> asyncio.AbstractServer:
+        """Start accepting editors.
+        """
+        return await asyncio.start_server(
+            self._handle, host, port, limit=self.MAX_MESSAGE
+        )
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter):
+        """Serve editor's connection.
+        """
+        slot = next(
+            (n for n in range(1, self.ID_STRIDE) if n not in self._writers),
+            None
+        )
+        if slot is None:
+            writer.write(dumps([ERROR, 'Server is full']))
+            writer.close()
+            return
+
+        self._writers[slot] = writer
+        writer.write(dumps([
+            HELLO, slot, self.ID_STRIDE, self._state.to_document().to_dict()
+        ]))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._receive(slot, loads(line))
+        except (ConnectionError, ValueError):
+            # Connection is lost or editor sends garbage: drop it.
+            pass
+        finally:
+            del self._writers[slot]
+            writer.close()
+
+    def _receive(self, slot: int, batch: list):
+        """Apply editor's batch, acknowledge and broadcast it. Malformed
+        operations are rejected, like ones, not valid for the diagram.
+        """
+        accepted = []
+        rejected = []
+        for values in batch:
+            try:
+                operation = decode_operation(values)
+            except ValueError:
+                if isinstance(values, list) and len(values) > 1 \
+                        and isinstance(values[1], str):
+                    rejected.append(values[1])
+                continue
+            if self._state.apply(operation):
+                accepted.append(values)
+            else:
+                rejected.append(operation.id)
+
+        self._sequence += 1
+        self._write(slot, dumps([ACK, self._sequence, rejected]))
+        if not accepted:
+            return
+        data = dumps([BATCH, self._sequence, accepted])
+        for other in list(self._writers):
+            if other != slot:
+                self._write(other, data)
+
+    def _write(self, slot: int, data: bytes):
+        """Send data to the editor, disconnect it, if it doesn't read.
+        """
+        writer = self._writers[slot]
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > self.MAX_BACKLOG:
+            writer.close()
+            return
+        writer.write(data)
+
+
+# ---------------------- CLIENT ------------------------- #
+
+class PendingChanges:
+    """Local operations, which are not acknowledged by the server yet.
+    Not sent moves of a node are coalesced: only the last one is sent.
+    Remote moves, edits and labels of elements with pending operations are
+    overridden: the local operations will be ordered by the server later.
+    Operations are added, when they are made; acknowledgements and remote
+    operations are handled in the order of the server's messages.
+    """
+    # Kinds of remote operations, overridden by pending ones:
+    OVERRIDDEN = (
+        OperationKind.MOVE, OperationKind.EDIT, OperationKind.LABEL
+    )
+
+    def __init__(self):
+        """Init.
+        """
+        self._unsent: list[Operation] = []
+        # Node's id -> index of its not sent move:
+        self._move_indexes: dict[str, int] = {}
+        # Ids of operations of sent batches:
+        self._batches: deque[list[str]] = deque()
+        # Id -> amount of pending operations over it:
+        self._counts: dict[str, int] = {}
+
+    def add(self, operation: Operation):
+        """Add local operation.
+        """
+        tag_id = operation.id
+        if operation.kind == OperationKind.MOVE:
+            if tag_id in self._move_indexes:
+                self._unsent[self._move_indexes[tag_id]] = operation
+                return
+            self._move_indexes[tag_id] = len(self._unsent)
+        self._unsent.append(operation)
+        self._counts[tag_id] = self._counts.get(tag_id, 0) + 1
+
+    def pop_batch(self) -> list[Operation]:
+        """Get not sent operations, which should be sent as a batch.
+        """
+        batch, self._unsent = self._unsent, []
+        self._move_indexes = {}
+        if batch:
+            self._batches.append([operation.id for operation in batch])
+        return batch
+
+    def acknowledge(self):
+        """The oldest sent batch is acknowledged.
+        """
+        for tag_id in self._batches.popleft():
+            self._counts[tag_id] -= 1
+            if not self._counts[tag_id]:
+                del self._counts[tag_id]
+
+    def filter(self, operations: Sequence[Operation]) -> list[Operation]:
+        """Get remote operations, which are not overridden.
+        Deletions are never overridden.
+        """
+        return [
+            operation for operation in operations
+            if operation.kind not in self.OVERRIDDEN
+            or operation.id not in self._counts
+        ]
+
+
+class SyncClient:
+    """Editor's connection to the sync server.
+    Local operations are sent by batches, see `PendingChanges`.
+    on_batch gets remote operations, on_ack gets ids of rejected local
+    operations of the acknowledged batch and its round trip time.
+    """
+    def __init__(self, on_batch: Callable[[list[Operation]], None],
+                 on_ack: Callable[[list[str], float], None]):
+        """Init.
+        """
+        self._on_batch = on_batch
+        self._on_ack = on_ack
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self.slot = 0
+        self.id_stride = 1
+        # Send times of not acknowledged batches:
+        self._sent: deque[float] = deque()
+
+    @property
+    def is_acknowledged(self) -> bool:
+        """Are all sent batches acknowledged.
+        """
+        return not self._sent
+
+    async def connect(self, host: str = SyncServer.HOST,
+                      port: int = SyncServer.PORT) -> Document:
+        """Connect to the server, get the current diagram.
+        Raise ConnectionError, if server refused the editor, ValueError,
+        if it's not a sync server.
+        """
+        self._reader, self._writer = await asyncio.open_connection(
+            host, port, limit=SyncServer.MAX_MESSAGE
+        )
+        message = loads(await self._reader.readline())
+        if message[0] != HELLO:
+            self.close()
+            raise ConnectionError(f'Refused by server: {message[1:]}')
+        try:
+            _, self.slot, self.id_stride, document = message
+            return Document.from_dict(document)
+        except (KeyError, TypeError, ValueError) as e:
+            self.close()
+            raise ValueError(f'Malformed hello: {e!r}') from e
+
+    def send(self, operations: Sequence[Operation]):
+        """Send batch of local operations.
+        """
+        if not operations:
+            return
+        self._sent.append(time.perf_counter())
+        self._writer.write(dumps([
+            encode_operation(operation) for operation in operations
+        ]))
+
+    async def receive(self):
+        """Receive messages, until the connection is closed.
+        Raise ValueError, if server sends malformed message.
+        """
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                return
+            message = loads(line)
+            if message[0] == ACK:
+                self._on_ack(
+                    message[2], time.perf_counter() - self._sent.popleft()
+                )
+            elif message[0] == BATCH:
+                self._on_batch(list(map(decode_operation, message[2])))
+
+    def close(self):
+        """Close the connection.
+        """
+        if self._writer:
+            self._writer.close()
+
+
+# ---------------------- BENCHMARK ------------------------- #
+
+class _SimulatedEditor:
+    """Editor of the benchmark. It drags random nodes, sending coalesced
+    moves every SEND_INTERVAL, and sometimes creates connected nodes
+    or deletes ones. Its copy of the diagram follows the same rules, as
+    the workspace client, to check convergence.
+    """
+    DRAG_STEP_INTERVAL = 0.01
+    DRAG_STEPS = 20
+    SEND_INTERVAL = 0.05
+    CREATE_PROBABILITY = 0.05
+    DELETE_PROBABILITY = 0.02
+
+    def __init__(self, index: int, report: LatencyReport,
+                 sent_times: dict[tuple, float]):
+        """Init. sent_times of moves are shared by editors, to measure
+        latency of delivery.
+        """
+        self._random = random.Random(index)
+        self._report = report
+        self._sent_times = sent_times
+        self._client = SyncClient(self._callback_batch, self._callback_ack)
+        self._state: Optional[DiagramState] = None
+        self._node_ids: list[str] = []
+        self._counter = 0
+        self._pending = PendingChanges()
+        self.sent = 0
+        self.received = 0
+
+    @property
+    def client(self) -> SyncClient:
+        """Editor's client.
+        """
+        return self._client
+
+    @property
+    def document(self) -> Document:
+        """Editor's copy of the diagram.
+        """
+        return self._state.to_document()
+
+    async def connect(self, host: str, port: int):
+        """Connect and get the diagram.
+        """
+        document = await self._client.connect(host, port)
+        self._state = DiagramState(document)
+        self._node_ids = [node.id for node in document.nodes]
+
+    def _callback_batch(self, operations: list[Operation]):
+        """Callback. Remote operations arrived.
+        """
+        now = time.perf_counter()
+        for operation in self._pending.filter(operations):
+            self._state.apply(operation)
+            if operation.kind == OperationKind.MOVE:
+                key = operation.id, operation.payload['x'], \
+                    operation.payload['y']
+                if key in self._sent_times:
+                    self._report.add('delivery', now - self._sent_times[key])
+            elif operation.kind == OperationKind.CREATE_NODE:
+                self._node_ids.append(operation.id)
+        self.received += len(operations)
+
+    def _callback_ack(self, rejected: list[str], latency: float):
+        """Callback. Local batch was acknowledged.
+        """
+        self._report.add('acknowledgement', latency)
+        self._pending.acknowledge()
+        for tag_id in rejected:
+            self._state.apply(Operation.delete(tag_id))
+
+    def _apply_local(self, operation: Operation):
+        """Apply local operation and queue it for sending.
+        """
+        if self._state.apply(operation):
+            self._pending.add(operation)
+
+    def _send(self):
+        """Send queued operations.
+        """
+        batch = self._pending.pop_batch()
+        now = time.perf_counter()
+        for operation in batch:
+            if operation.kind == OperationKind.MOVE:
+                self._sent_times[operation.id, operation.payload['x'],
+                                 operation.payload['y']] = now
+        self._client.send(batch)
+        self.sent += len(batch)
+
+    def _new_id(self, kind: str) -> str:
+        """Get id of a new element from editor's slot.
+        """
+        self._counter += 1
+        number = self._counter * self._client.id_stride + self._client.slot
+        return f'id-{kind}-{number}'
+
+    async def edit(self, duration: float):
+        """Edit the diagram for duration seconds.
+        """
+        finish = time.perf_counter() + duration
+        last_sent = time.perf_counter()
+        while time.perf_counter() < finish:
+            tag_id = self._pick_node()
+            if tag_id is None or \
+                    self._random.random() < self.CREATE_PROBABILITY:
+                self._create(tag_id)
+                self._send()
+                continue
+            if self._random.random() < self.DELETE_PROBABILITY:
+                self._apply_local(Operation.delete(tag_id))
+                self._send()
+                continue
+
+            x, y = self._random.randrange(3000), self._random.randrange(2000)
+            for step in range(self.DRAG_STEPS):
+                self._apply_local(Operation.move(tag_id, x + step, y + step))
+                await asyncio.sleep(self.DRAG_STEP_INTERVAL)
+                if time.perf_counter() - last_sent >= self.SEND_INTERVAL:
+                    self._send()
+                    last_sent = time.perf_counter()
+        self._send()
+
+    def _pick_node(self) -> Optional[str]:
+        """Get random existing node, forget deleted ones on the way.
+        """
+        while self._node_ids:
+            index = self._random.randrange(len(self._node_ids))
+            if self._node_ids[index] in self._state:
+                return self._node_ids[index]
+            self._node_ids[index] = self._node_ids[-1]
+            self._node_ids.pop()
+        return None
+
+    def _create(self, source: Optional[str]):
+        """Create node, connected from the source node, if any.
+        """
+        data = NodeData(
+            self._new_id('node'), self._random.randrange(3000),
+            self._random.randrange(2000), 'BLUE', 'Simulated', ''
+        )
+        self._apply_local(Operation.create_node(data))
+        if source:
+            self._apply_local(Operation.connect(
+                EdgeData(self._new_id('directededge'), source, data.id)
+            ))
+        self._node_ids.append(data.id)
+
+
+def _serve(document: Document, host: str, port: int):
+    """Run the server until interrupted, f.e. in a benchmark's process.
+    """
+    async def serve():
+        server = await SyncServer(document).start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def _get_key(document: Document) -> tuple:
+    """Get comparable content of the document.
+    """
+    return (
+        sorted((n.id, n.x, n.y, n.text_head) for n in document.nodes),
+        sorted((e.id, e.source, e.target) for e in document.edges),
+    )
+
+
+async def run_benchmark(clients: int, seconds: float,
+                        host: str = SyncServer.HOST,
+                        port: int = SyncServer.PORT,
+                        nodes: int = 1000) -> dict[str, Any]:
+    """Run a local server in a separate process and simulated editors
+    against it, get report: latencies of acknowledgement and delivery
+    of operations, throughput, and whether editors' diagrams converged
+    to the server's one.
+    """
+    document = Document([
+        NodeData(f'id-node-{n}', n % 40 * 250, n // 40 * 150, 'GRAY',
+                 f'Node {n}', '')
+        for n in range(1, nodes + 1)
+    ])
+    server = multiprocessing.Process(
+        target=_serve, args=(document, host, port), daemon=True
+    )
+    server.start()
+    try:
+        report = LatencyReport()
+        sent_times: dict[tuple, float] = {}
+        editors = [
+            _SimulatedEditor(n, report, sent_times) for n in range(clients)
+        ]
+        for editor in editors:
+            for _ in range(50):
+                try:
+                    await editor.connect(host, port)
+                    break
+                except OSError:
+                    # Server is not started yet.
+                    await asyncio.sleep(0.1)
+            else:
+                raise ConnectionError('Server is not started')
+        receiving = [
+            asyncio.ensure_future(editor.client.receive())
+            for editor in editors
+        ]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(editor.edit(seconds) for editor in editors))
+        while not all(editor.client.is_acknowledged for editor in editors):
+            await asyncio.sleep(0.05)
+        report.elapsed = time.perf_counter() - started
+        # Broadcasts follow acknowledgements of their batches:
+        await asyncio.sleep(0.5)
+
+        observer = SyncClient(lambda _: None, lambda *_: None)
+        final = _get_key(await observer.connect(host, port))
+        observer.close()
+        for editor in editors:
+            editor.client.close()
+        await asyncio.gather(*receiving, return_exceptions=True)
+    finally:
+        server.terminate()
+
+    sent = sum(editor.sent for editor in editors)
+    received = sum(editor.received for editor in editors)
+    return {
+        'clients': clients,
+        'operations_sent': sent,
+        'operations_received': received,
+        'sent_per_second': sent / report.elapsed,
+        'received_per_second': received / report.elapsed,
+        'converged': sum(
+            _get_key(editor.document) == final for editor in editors
+        ),
+        'latency': report.to_dict(),
+        'table': report.format(),
+    }
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python -m core.collaboration',
+        description='Collaboration sync server and its benchmark.'
+    )
+    parser.add_argument('--host', default=SyncServer.HOST)
+    parser.add_argument('--port', type=int, default=SyncServer.PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='run sync server')
+    serve_parser.add_argument('document', nargs='?',
+                              help='initial document')
+    serve_parser.add_argument('-o', '--output',
+                              help='save diagram here on stop')
+    bench_parser = commands.add_parser(
+        'bench', help='measure local server with simulated editors'
+    )
+    bench_parser.add_argument('-c', '--clients', type=int, default=20)
+    bench_parser.add_argument('-s', '--seconds', type=float, default=5.0)
+    bench_parser.add_argument('--json', action='store_true',
+                              help='print report as JSON')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        result = asyncio.run(
+            run_benchmark(args.clients, args.seconds, args.host, args.port)
+        )
+        table = result.pop('table')
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(table)
+            print(f'{result["operations_sent"]} operations sent '
+                  f'({result["sent_per_second"]:.0f}/s), '
+                  f'{result["operations_received"]} delivered '
+                  f'({result["received_per_second"]:.0f}/s); '
+                  f'{result["converged"]}/{args.clients} editors converged')
+        sys.exit(0 if result['converged'] == args.clients else 1)
+
+    try:
+        initial = Document.load(args.document) if args.document else None
+    except (OSError, ValueError) as e:
+        sys.exit(f'Can\'t load "{args.document}": {e}')
+    sync_server = SyncServer(initial)
+
+    async def main():
+        server = await sync_server.start(args.host, args.port)
+        print(f'Serving on {args.host}:{args.port}')
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    if args.output:
+        sync_server.document.save(args.output)
+        print(f'Saved to "{args.output}"')
@@ -0,0 +1,555 @@
+"""Structural diff and three-way merge of diagrams.
+
+Nodes of two diagrams are matched by id; the rest of them are matched
+by text and position, so re-imported or pasted nodes, which got new ids,
+are still recognized. Edges are matched by id and then by their matched
+ends. Matching puts elements into hash tables by keys instead of
+comparing them pairwise, so it's near-linear in the diagram size.
+
+Usage:
+    python -m core.diff <old.json> <new.json>
+    python -m core.diff <ours.json> <theirs.json> --base <base.json>
+        -o <merged.json>
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, replace
+from operator import attrgetter
+from typing import Any, Callable, Hashable, Optional, Sequence, Union
+
+from core.document import Document, NodeData, EdgeData
+
+Element = Union[NodeData, EdgeData]
+
+
+class ChangeKind:
+    """Kind of element's change.
+    """
+    ADDED = 'added'
+    REMOVED = 'removed'
+    MOVED = 'moved'
+    RECOLORED = 'recolored'
+    EDITED = 'edited'
+
+    ALL = (ADDED, REMOVED, MOVED, RECOLORED, EDITED)
+
+
+# Changes of matched nodes, and node's fields, which they change:
+NODE_CHANGES = (
+    (ChangeKind.MOVED, ('x', 'y')),
+    (ChangeKind.RECOLORED, ('gamma',)),
+    (
+        ChangeKind.EDITED,
+        (
+            'text_head', 'text_desc', 'group', 'inputs', 'outputs',
+            'width', 'height'
+        )
+    ),
+)
+# Changes with getters of their fields:
+_NODE_CHANGE_GETTERS = tuple(
+    (kind, names, attrgetter(*names)) for kind, names in NODE_CHANGES
+)
+
+
+@dataclass
+class Change:
+    """Change of node or edge: old is None for added elements, new is None
+    for removed ones. Matched node may have several changes.
+    """
+    kind: str
+    old: Optional[Element]
+    new: Optional[Element]
+
+    @property
+    def id(self) -> str:
+        """Element's id in the new diagram, or in the old one, if the
+        element is removed.
+        """
+        return (self.new or self.old).id
+
+    @property
+    def is_edge(self) -> bool:
+        """Is the changed element an edge.
+        """
+        return isinstance(self.new or self.old, EdgeData)
+
+
+@dataclass
+class DiagramDiff:
+    """Changes of the diagram against its old version.
+    """
+    changes: list[Change] = field(default_factory=list)
+    # Old id -> new id of matched nodes and edges:
+    matches: dict[str, str] = field(default_factory=dict)
+
+    def get(self, kind: str) -> list[Change]:
+        """Get changes of the kind.
+        """
+        return [change for change in self.changes if change.kind == kind]
+
+    def get_counts(self) -> dict[str, int]:
+        """Get amounts of changes by kinds.
+        """
+        counts = Counter(change.kind for change in self.changes)
+        return {kind: counts[kind] for kind in ChangeKind.ALL}
+
+
+@dataclass
+class Conflict:
+    """Element, changed by both sides in different ways; the kind is
+    the change of ours. Ours is taken, unless it's a removal: removed
+    element, changed by the other side, is kept.
+    """
+    kind: str
+    ours: Optional[Element]
+    theirs: Optional[Element]
+
+    @property
+    def id(self) -> str:
+        """Element's id, ours one, if it's given.
+        """
+        return (self.ours or self.theirs).id
+
+
+@dataclass
+class MergeResult:
+    """Merged diagram and conflicts, resolved automatically.
+    """
+    document: Document
+    conflicts: list[Conflict] = field(default_factory=list)
+
+
+# ---------------------- MATCHING ------------------------- #
+
+def _match_by(key: Callable[[NodeData], Hashable],
+              old: list[NodeData], new: list[NodeData],
+              matches: dict[str, str]
+              ) -> tuple[list[NodeData], list[NodeData]]:
+    """Match nodes with equal keys; nodes with the same key are paired
+    in order of their positions.
+    Return not matched old and new nodes.
+    """
+    buckets: dict[Hashable, list[NodeData]] = defaultdict(list)
+    for node in new:
+        buckets[key(node)].append(node)
+    old_buckets: dict[Hashable, list[NodeData]] = defaultdict(list)
+    for node in old:
+        old_buckets[key(node)].append(node)
+
+    matched = set()
+    for value, old_nodes in old_buckets.items():
+        new_nodes = buckets.get(value)
+        if not new_nodes:
+            continue
+        if len(old_nodes) > 1 or len(new_nodes) > 1:
+            old_nodes.sort(key=_get_position)
+            new_nodes.sort(key=_get_position)
+        for old_node, new_node in zip(old_nodes, new_nodes):
+            matches[old_node.id] = new_node.id
+            matched.add(new_node.id)
+    return (
+        [node for node in old if node.id not in matches],
+        [node for node in new if node.id not in matched]
+    )
+
+
+def _get_position(node: NodeData) -> tuple[int, int]:
+    """Get node's position, in order of rows.
+    """
+    return node.y, node.x
+
+
+def _get_text(node: NodeData) -> tuple[str, str]:
+    """Get node's text.
+    """
+    return node.text_head, node.text_desc
+
+
+def _get_look(node: NodeData) -> tuple[str, str, str, int, int]:
+    """Get node's text, gamma and position.
+    """
+    return node.text_head, node.text_desc, node.gamma, node.x, node.y
+
+
+def match_nodes(old: Sequence[NodeData],
+                new: Sequence[NodeData]) -> dict[str, str]:
+    """Match nodes of two diagrams: by id, then by text and gamma at the
+    same position (only id is changed), then by text (node is moved or
+    recolored), then by position (text is edited).
+    Return old id -> new id.
+    """
+    new_ids = {node.id for node in new}
+    matches = {node.id: node.id for node in old if node.id in new_ids}
+    old_rest = [node for node in old if node.id not in matches]
+    new_rest = [node for node in new if node.id not in matches]
+    for key in (_get_look, _get_text, _get_position):
+        if not (old_rest and new_rest):
+            break
+        old_rest, new_rest = _match_by(key, old_rest, new_rest, matches)
+    return matches
+
+
+def _get_edge_key(edge: EdgeData,
+                  node_ids: Optional[dict[str, str]] = None) -> tuple:
+    """Get key of edge's ends; ids of ends are mapped by node_ids, if it's
+    given, not mapped ends are None.
+    """
+    source, target = edge.source, edge.target
+    if node_ids is not None:
+        source = node_ids.get(source)
+        target = node_ids.get(target)
+    return source, target, edge.source_port, edge.target_port
+
+
+def match_edges(old: Sequence[EdgeData], new: Sequence[EdgeData],
+                node_matches: dict[str, str]) -> dict[str, str]:
+    """Match edges of two diagrams, which connect matched nodes by the same
+    ports: by id, then by their ends.
+    Return old id -> new id.
+    """
+    new_by_id = {edge.id: edge for edge in new}
+    matches = {}
+    rest = []
+    for edge in old:
+        key = _get_edge_key(edge, node_matches)
+        other = new_by_id.get(edge.id)
+        if other is not None and _get_edge_key(other) == key:
+            matches[edge.id] = edge.id
+        else:
+            rest.append((edge, key))
+    if not rest:
+        return matches
+
+    buckets: dict[tuple, list[EdgeData]] = defaultdict(list)
+    for edge in new:
+        if edge.id not in matches:
+            buckets[_get_edge_key(edge)].append(edge)
+    for edge, key in rest:
+        bucket = buckets.get(key)
+        if bucket:
+            matches[edge.id] = bucket.pop().id
+    return matches
+
+
+# ---------------------- DIFF ------------------------- #
+
+def _compare_nodes(old: NodeData, new: NodeData) -> list[Change]:
+    """Get changes of the matched node.
+    """
+    return [
+        Change(kind, old, new) for kind, _, get in _NODE_CHANGE_GETTERS
+        if get(old) != get(new)
+    ]
+
+
+def compare(old: Document, new: Document) -> DiagramDiff:
+    """Get changes of the new diagram against the old one.
+    Changes of matched nodes go in order of the old diagram, followed by
+    added nodes, removed and relabelled edges, and added edges.
+    """
+    node_matches = match_nodes(old.nodes, new.nodes)
+    edge_matches = match_edges(old.edges, new.edges, node_matches)
+    new_nodes = {node.id: node for node in new.nodes}
+    new_edges = {edge.id: edge for edge in new.edges}
+    result = DiagramDiff(matches={**node_matches, **edge_matches})
+    changes = result.changes
+
+    for node in old.nodes:
+        tag_id = node_matches.get(node.id)
+        if tag_id is None:
+            changes.append(Change(ChangeKind.REMOVED, node, None))
+        else:
+            changes.extend(_compare_nodes(node, new_nodes[tag_id]))
+    matched = set(node_matches.values())
+    changes.extend(
+        Change(ChangeKind.ADDED, None, node)
+        for node in new.nodes if node.id not in matched
+    )
+
+    for edge in old.edges:
+        tag_id = edge_matches.get(edge.id)
+        if tag_id is None:
+            changes.append(Change(ChangeKind.REMOVED, edge, None))
+        elif new_edges[tag_id].label != edge.label:
+            changes.append(
+                Change(ChangeKind.EDITED, edge, new_edges[tag_id])
+            )
+    matched = set(edge_matches.values())
+    changes.extend(
+        Change(ChangeKind.ADDED, None, edge)
+        for edge in new.edges if edge.id not in matched
+    )
+    return result
+
+
+# ---------------------- MERGE ------------------------- #
+
+class _Merge:
+    """Three-way merge of two versions of the base diagram.
+    Nodes of ours keep their ids; added nodes and edges of theirs get new
+    ids, if theirs ones are taken.
+    """
+    def __init__(self, base: Document, ours: Document, theirs: Document):
+        """Init.
+        """
+        self._base = base
+        self._ours = ours
+        self._theirs = theirs
+        self._ours_matches = match_nodes(base.nodes, ours.nodes)
+        self._theirs_matches = match_nodes(base.nodes, theirs.nodes)
+        self._nodes: dict[str, NodeData] = {}
+        self._edges: dict[str, EdgeData] = {}
+        # Ends of merged edges, to skip the same edges, added by theirs:
+        self._edge_keys: set[tuple] = set()
+        # Ours and theirs node ids -> merged ones:
+        self._ours_ids: dict[str, str] = {}
+        self._theirs_ids: dict[str, str] = {}
+        # Id's prefix -> max number of ids with it, for new ids;
+        # collected at the first taken id:
+        self._numbers: Optional[dict[str, int]] = None
+        self.conflicts: list[Conflict] = []
+
+    @staticmethod
+    def _split_id(tag_id: str) -> tuple[str, int]:
+        """Split id into prefix and number, if it ends with number.
+        """
+        head, _, number = tag_id.rpartition('-')
+        if head and number.isdigit():
+            return f'{head}-', int(number)
+        return f'{tag_id}-', 0
+
+    def _get_free_id(self, tag_id: str, taken: dict[str, Any]) -> str:
+        """Get id for the element of theirs: its own one, or a new one,
+        if it's taken.
+        """
+        if tag_id not in taken:
+            return tag_id
+        if self._numbers is None:
+            self._numbers = defaultdict(int)
+            for document in (self._base, self._ours, self._theirs):
+                for element in document.nodes + document.edges:
+                    prefix, number = self._split_id(element.id)
+                    if number > self._numbers[prefix]:
+                        self._numbers[prefix] = number
+        prefix, _ = self._split_id(tag_id)
+        self._numbers[prefix] += 1
+        return f'{prefix}{self._numbers[prefix]}'
+
+    def run(self) -> Document:
+        """Merge diagrams.
+        """
+        self._merge_nodes()
+        self._merge_edges()
+        return Document(
+            list(self._nodes.values()), list(self._edges.values())
+        )
+
+    def _merge_nodes(self):
+        """Merge nodes: changes of both sides are applied to base nodes,
+        and added nodes of both sides are added.
+        """
+        ours_matches = self._ours_matches
+        theirs_matches = self._theirs_matches
+        ours_nodes = {node.id: node for node in self._ours.nodes}
+        theirs_nodes = {node.id: node for node in self._theirs.nodes}
+
+        # Nodes of theirs, kept by the merge:
+        kept: list[NodeData] = []
+        for node in self._base.nodes:
+            ours = ours_nodes.get(ours_matches.get(node.id))
+            theirs = theirs_nodes.get(theirs_matches.get(node.id))
+            if ours and theirs:
+                self._add_ours(self._merge_node(node, ours, theirs))
+                self._theirs_ids[theirs.id] = ours.id
+            elif ours and _compare_nodes(node, ours):
+                self.conflicts.append(
+                    Conflict(ChangeKind.REMOVED, ours, None)
+                )
+                self._add_ours(ours)
+            elif theirs and _compare_nodes(node, theirs):
+                kept.append(theirs)
+
+        matched = set(ours_matches.values())
+        for node in self._ours.nodes:
+            if node.id not in matched:
+                self._add_ours(node)
+
+        for node in kept:
+            node = self._add_theirs(node)
+            self.conflicts.append(Conflict(ChangeKind.REMOVED, None, node))
+        matched = set(theirs_matches.values())
+        for node in self._theirs.nodes:
+            if node.id in matched:
+                continue
+            if self._nodes.get(node.id) == node:
+                # The same node is added by both sides:
+                self._theirs_ids[node.id] = node.id
+            else:
+                self._add_theirs(node)
+
+    def _add_ours(self, node: NodeData):
+        """Add node of ours.
+        """
+        self._nodes[node.id] = node
+        self._ours_ids[node.id] = node.id
+
+    def _add_theirs(self, node: NodeData) -> NodeData:
+        """Add node of theirs, with a new id, if its one is taken.
+        Return added node.
+        """
+        tag_id = self._get_free_id(node.id, self._nodes)
+        self._theirs_ids[node.id] = tag_id
+        if tag_id != node.id:
+            node = replace(node, id=tag_id)
+        self._nodes[tag_id] = node
+        return node
+
+    def _merge_node(self, base: NodeData, ours: NodeData,
+                    theirs: NodeData) -> NodeData:
+        """Apply changes of both sides to the base node; ours change is
+        taken, if both sides changed the same fields differently.
+        """
+        values = {}
+        for kind, names, get in _NODE_CHANGE_GETTERS:
+            base_values = get(base)
+            theirs_values = get(theirs)
+            if theirs_values == base_values:
+                continue
+            ours_values = get(ours)
+            if ours_values == base_values:
+                values.update(
+                    (name, getattr(theirs, name)) for name in names
+                )
+            elif theirs_values != ours_values:
+                self.conflicts.append(Conflict(kind, ours, theirs))
+        return replace(ours, **values) if values else ours
+
+    def _merge_edges(self):
+        """Merge edges: base edges, kept by both sides, with labels of both
+        sides, and added edges of both sides, which ends are kept.
+        """
+        ours_matches = match_edges(
+            self._base.edges, self._ours.edges, self._ours_matches
+        )
+        theirs_matches = match_edges(
+            self._base.edges, self._theirs.edges, self._theirs_matches
+        )
+        ours_edges = {edge.id: edge for edge in self._ours.edges}
+        theirs_edges = {edge.id: edge for edge in self._theirs.edges}
+        # Ours ids of base edges, kept by both sides -> merged labels:
+        kept = {}
+        for edge in self._base.edges:
+            if edge.id in ours_matches and edge.id in theirs_matches:
+                ours = ours_edges[ours_matches[edge.id]]
+                kept[ours.id] = self._merge_label(
+                    edge, ours, theirs_edges[theirs_matches[edge.id]]
+                )
+        added = set(ours_matches.values())
+        for edge in self._ours.edges:
+            if edge.id in kept:
+                if kept[edge.id] != edge.label:
+                    edge = replace(edge, label=kept[edge.id])
+                self._add_edge(edge, self._ours_ids, False)
+            elif edge.id not in added:
+                self._add_edge(edge, self._ours_ids, False)
+
+        added = set(theirs_matches.values())
+        for edge in self._theirs.edges:
+            if edge.id not in added:
+                self._add_edge(edge, self._theirs_ids, True)
+
+    def _merge_label(self, base: EdgeData, ours: EdgeData,
+                     theirs: EdgeData) -> str:
+        """Get label of the base edge, changed by both sides; ours label
+        is taken, if both sides changed it differently.
+        """
+        if theirs.label in (base.label, ours.label):
+            return ours.label
+        if ours.label == base.label:
+            return theirs.label
+        self.conflicts.append(Conflict(ChangeKind.EDITED, ours, theirs))
+        return ours.label
+
+    def _add_edge(self, edge: EdgeData, node_ids: dict[str, str],
+                  is_theirs: bool):
+        """Add edge with ends, mapped to merged nodes; edge of theirs is
+        skipped, if the same edge exists. Edge to removed node is
+        a conflict, and isn't added.
+        """
+        key = _get_edge_key(edge, node_ids)
+        if None in key[:2]:
+            self.conflicts.append(Conflict(
+                ChangeKind.REMOVED,
+                None if is_theirs else edge,
+                edge if is_theirs else None
+            ))
+            return
+        tag_id = edge.id
+        if is_theirs:
+            if key in self._edge_keys:
+                return
+            tag_id = self._get_free_id(tag_id, self._edges)
+        self._edge_keys.add(key)
+        if (tag_id, *key[:2]) != (edge.id, edge.source, edge.target):
+            edge = replace(edge, id=tag_id, source=key[0], target=key[1])
+        self._edges[tag_id] = edge
+
+
+def merge(base: Document, ours: Document, theirs: Document) -> MergeResult:
+    """Merge changes of two versions of the base diagram.
+    """
+    merger = _Merge(base, ours, theirs)
+    document = merger.run()
+    return MergeResult(document, merger.conflicts)
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python -m core.diff',
+        description='Compare two diagrams, or merge them.'
+    )
+    parser.add_argument('old', help='old diagram, or ours with --base')
+    parser.add_argument('new', help='new diagram, or theirs with --base')
+    parser.add_argument('-b', '--base', help='common base diagram to merge')
+    parser.add_argument('-o', '--output', help='merged diagram file')
+    args = parser.parse_args()
+    if args.base and not args.output:
+        parser.error('merge requires --output')
+
+    try:
+        documents = [
+            Document.load(path)
+            for path in filter(None, (args.old, args.new, args.base))
+        ]
+    except (OSError, ValueError) as e:
+        sys.exit(f'Can\'t load diagram: {e}')
+
+    start = time.perf_counter()
+    if args.base:
+        ours, theirs, base = documents
+        merged = merge(base, ours, theirs)
+        elapsed = time.perf_counter() - start
+        for conflict in merged.conflicts:
+            print(f'conflict: {conflict.kind} {conflict.id}')
+        merged.document.save(args.output)
+        print(
+            f'{len(merged.conflicts)} conflicts, '
+            f'{len(merged.document.nodes)} nodes, '
+            f'{len(merged.document.edges)} edges; {elapsed:.2f}s'
+        )
+    else:
+        diff = compare(*documents)
+        elapsed = time.perf_counter() - start
+        for change in diff.changes:
+            element = 'edge' if change.is_edge else 'node'
+            print(f'{change.kind} {element} {change.id}')
+        counts = ', '.join(
+            f'{count} {kind}' for kind, count in diff.get_counts().items()
+        )
+        print(f'{counts}; {elapsed:.2f}s')
@@ -0,0 +1,163 @@
+"""Diagram document.
+Serialized form of the diagram, used by save/load and clipboard.
+"""
+
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Any, Iterator, Optional
+
+from core.enums import Gamma
+
+
+@dataclass
+class NodeData:
+    """Serialized node.
+    """
+    # Default size of nodes:
+    WIDTH = 200
+    HEIGHT = 100
+
+    id: str
+    x: int
+    y: int
+    gamma: str
+    text_head: str
+    text_desc: str
+    # Collapsed group content, see `GroupData`:
+    group: Optional[dict[str, Any]] = None
+    # Specs of input and output ports, see `core.ports`:
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    width: int = WIDTH
+    height: int = HEIGHT
+
+    @property
+    def gamma_value(self) -> Gamma:
+        """Node's gamma as enum member.
+        """
+        return Gamma[self.gamma]
+
+
+@dataclass
+class EdgeData:
+    """Serialized directed edge.
+    """
+    id: str
+    source: str
+    target: str
+    # Names of source's output and target's input ports:
+    source_port: str = ''
+    target_port: str = ''
+    # Text, shown at the middle of the edge:
+    label: str = ''
+
+
+@dataclass
+class GroupData:
+    """Serialized content of collapsed group: member nodes, edges between
+    them, and edges, crossing the group boundary.
+    """
+    nodes: list[NodeData] = field(default_factory=list)
+    edges: list[EdgeData] = field(default_factory=list)
+    crossing_edges: list[EdgeData] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get group content as JSON-compatible dict.
+        """
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'GroupData':
+        """Create group content from dict, made by `to_dict`.
+        Raise ValueError, if the group or a nested one has no nodes.
+        """
+        if not data['nodes']:
+            raise ValueError('Group has no nodes')
+        group = cls(
+            nodes=[NodeData(**node) for node in data['nodes']],
+            edges=[EdgeData(**edge) for edge in data['edges']],
+            crossing_edges=[
+                EdgeData(**edge) for edge in data['crossing_edges']
+            ],
+        )
+        for node in group.nodes:
+            if node.group is not None:
+                cls.from_dict(node.group)
+        return group
+
+
+@dataclass
+class Document:
+    """Serialized diagram: set of nodes and edges between them.
+    """
+    VERSION = 1
+
+    nodes: list[NodeData] = field(default_factory=list)
+    edges: list[EdgeData] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get document as JSON-compatible dict.
+        """
+        return {
+            'version': self.VERSION,
+            'nodes': [asdict(node) for node in self.nodes],
+            'edges': [asdict(edge) for edge in self.edges],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'Document':
+        """Create document from dict, made by `to_dict`.
+        Raise ValueError, if data is malformed.
+        """
+        try:
+            document = cls(
+                nodes=[NodeData(**node) for node in data['nodes']],
+                edges=[EdgeData(**edge) for edge in data['edges']],
+            )
+            for node in document.nodes:
+                if node.group is not None:
+                    GroupData.from_dict(node.group)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f'Malformed document: {e!r}') from e
+        return document
+
+    def split(self, batch_size: int) -> Iterator['Document']:
+        """Split document into batches of batch_size elements. Nodes go
+        first, so edges refer to nodes of the same or previous batches.
+        """
+        elements = self.nodes + self.edges
+        for start in range(0, len(elements), batch_size):
+            batch = elements[start:start + batch_size]
+            nodes = [item for item in batch if isinstance(item, NodeData)]
+            yield Document(nodes, batch[len(nodes):])
+
+    def dumps(self) -> str:
+        """Get document as JSON string.
+        """
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, text: str) -> 'Document':
+        """Create document from JSON string.
+        Raise ValueError, if text is not a valid document.
+        """
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Not a JSON document: {e}') from e
+        if not isinstance(data, dict):
+            raise ValueError('Malformed document: object expected')
+        return cls.from_dict(data)
+
+    def save(self, path: str):
+        """Save document to file.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.dumps())
+
+    @classmethod
+    def load(cls, path: str) -> 'Document':
+        """Load document from file.
+        """
+        with open(path, encoding='utf-8') as f:
+            return cls.loads(f.read())
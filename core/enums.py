@@ -42,8 +42,35 @@ class TkEvents:
     """
     KEY_PRESSED = '<KeyPress>'
     MOUSE_LEFT_BUTTON_CLICK = '<Button-1>'
+    MOUSE_LEFT_BUTTON_DOUBLE_CLICK = '<Double-Button-1>'
     MOUSE_LEFT_BUTTON_DOWN = '<ButtonPress-1>'
+    MOUSE_LEFT_BUTTON_SHIFT_DOWN = '<Shift-ButtonPress-1>'
     MOUSE_LEFT_BUTTON_RELEASE = '<ButtonRelease-1>'
     MOUSE_LEFT_BUTTON_DRAG = '<B1-Motion>'
     MOUSE_RIGHT_BUTTON_DOWN = '<ButtonPress-3>'
     MOUSE_RIGHT_BUTTON_DRAG = '<B3-Motion>'
+    # Wheel on Windows and macOS, and on X11:
+    MOUSE_WHEEL = '<MouseWheel>'
+    MOUSE_WHEEL_UP = '<Button-4>'
+    MOUSE_WHEEL_DOWN = '<Button-5>'
+    COPY = '<Control-c>'
+    PASTE = '<Control-v>'
+    DUPLICATE = '<Control-d>'
+    SAVE = '<Control-s>'
+    OPEN = '<Control-o>'
+    IMPORT = '<Control-i>'
+    FIND = '<Control-f>'
+    GROUP = '<Control-g>'
+    EXPAND_GROUP = '<Control-e>'
+    BUNDLE_EDGES = '<Control-b>'
+    SNAP_TO_GRID = '<Control-apostrophe>'
+    SWITCH_THEME = '<Control-t>'
+    RECORD_SESSION = '<Control-r>'
+    NEW_VIEW = '<Control-n>'
+    COLLABORATE = '<Control-l>'
+    COMPARE = '<Control-k>'
+    MERGE = '<Control-m>'
+    EXPOSE = '<Expose>'
+    RETURN = '<Return>'
+    SHIFT_RETURN = '<Shift-Return>'
+    ESCAPE = '<Escape>'
@@ -0,0 +1,328 @@
+"""Exporters of diagram documents to other formats:
+Graphviz DOT, GraphML, CSV edge lists and SVG images.
+
+DOT, GraphML and CSV are written so, that `core.importers` reads them
+back. Documents are written element by element, never building the
+whole output in memory.
+"""
+
+import csv
+import os
+from typing import Optional, TextIO
+from xml.sax.saxutils import escape, quoteattr
+
+from core.document import Document, NodeData
+from core.labels import GridIndex, place_label
+from core.ports import PortIndex
+from core.themes import Style, Theme, DARK
+
+
+class ExportFormat:
+    """Supported export formats.
+    """
+    JSON = 'json'
+    DOT = 'dot'
+    GRAPHML = 'graphml'
+    CSV = 'csv'
+    SVG = 'svg'
+
+    EXTENSIONS = {
+        '.json': JSON,
+        '.dot': DOT,
+        '.gv': DOT,
+        '.graphml': GRAPHML,
+        '.xml': GRAPHML,
+        '.csv': CSV,
+        '.svg': SVG,
+    }
+
+    @classmethod
+    def from_path(cls, path: str) -> str:
+        """Guess format by file extension.
+        Raise ValueError, if it's unknown.
+        """
+        _, extension = os.path.splitext(path)
+        try:
+            return cls.EXTENSIONS[extension.lower()]
+        except KeyError:
+            raise ValueError(f'Unknown export format: "{extension}"') from None
+
+
+# ---------------------- DOT ------------------------- #
+
+def _dot_quote(text: str) -> str:
+    """Get DOT quoted id.
+    """
+    return '"' + text.replace('"', '\\"') + '"'
+
+
+def write_dot(document: Document, f: TextIO):
+    """Write document as Graphviz digraph.
+    Node's position, gamma and texts are kept in pos, fillcolor, label
+    and comment attributes; edge's label is kept in label attribute.
+    """
+    f.write('digraph {\n    node [shape=box, style=filled];\n')
+    for node in document.nodes:
+        f.write(
+            f'    {_dot_quote(node.id)} ['
+            f'label={_dot_quote(node.text_head)}, '
+            f'comment={_dot_quote(node.text_desc)}, '
+            f'fillcolor={node.gamma.lower()}, '
+            f'pos="{node.x},{node.y}!"];\n'
+        )
+    for edge in document.edges:
+        f.write(f'    {_dot_quote(edge.source)} -> '
+                f'{_dot_quote(edge.target)}')
+        if edge.label:
+            f.write(f' [label={_dot_quote(edge.label)}]')
+        f.write(';\n')
+    f.write('}\n')
+
+
+# ---------------------- GRAPHML ------------------------- #
+
+# Node's <data> keys: key id -> attr.name, as read by the importer:
+_GRAPHML_KEYS = {
+    'd_label': 'label',
+    'd_description': 'description',
+    'd_color': 'color',
+    'd_x': 'x',
+    'd_y': 'y',
+}
+# Edge's <data> key:
+_GRAPHML_EDGE_LABEL = 'd_edge_label'
+
+
+def write_graphml(document: Document, f: TextIO):
+    """Write document as GraphML directed graph.
+    """
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for key, name in _GRAPHML_KEYS.items():
+        f.write(f'  <key id="{key}" for="node" attr.name="{name}" '
+                f'attr.type="string"/>\n')
+    f.write(f'  <key id="{_GRAPHML_EDGE_LABEL}" for="edge" '
+            f'attr.name="label" attr.type="string"/>\n')
+    f.write('  <graph edgedefault="directed">\n')
+    for node in document.nodes:
+        f.write(f'    <node id={quoteattr(node.id)}>')
+        for key, value in zip(_GRAPHML_KEYS, (
+                node.text_head, node.text_desc, node.gamma,
+                node.x, node.y)):
+            if value != '':
+                f.write(f'<data key="{key}">{escape(str(value))}</data>')
+        f.write('</node>\n')
+    for edge in document.edges:
+        f.write(f'    <edge id={quoteattr(edge.id)} '
+                f'source={quoteattr(edge.source)} '
+                f'target={quoteattr(edge.target)}')
+        if edge.label:
+            f.write(f'><data key="{_GRAPHML_EDGE_LABEL}">'
+                    f'{escape(edge.label)}</data></edge>\n')
+        else:
+            f.write('/>\n')
+    f.write('  </graph>\n</graphml>\n')
+
+
+# ---------------------- CSV ------------------------- #
+
+def write_csv(document: Document, f: TextIO):
+    """Write document's edges as CSV list of source, target node ids.
+    Nodes without edges are not written.
+    """
+    writer = csv.writer(f)
+    writer.writerow(('source', 'target'))
+    writer.writerows((edge.source, edge.target) for edge in document.edges)
+
+
+# ---------------------- SVG ------------------------- #
+
+class _SvgWriter:
+    """Writes document as SVG image, the way Workspace draws it.
+    """
+    # Geometry of `ui.elements.Node`, which size is node's own:
+    HEADER_HEIGHT = 32
+    BORDER_WIDTH = 2
+    PORT_RADIUS = 5
+    # Edge line width of `ui.elements.DirectedEdge`:
+    EDGE_WIDTH = 3
+    # Estimated label size of `ui.edge_labeler.EdgeLabeler`:
+    LABEL_CHAR_WIDTH = 7
+    LABEL_HEIGHT = 18
+    MARGIN = 50
+    FONT = 'font-family="Verdana" font-size="12" text-anchor="middle" ' \
+           'dominant-baseline="central"'
+    LABEL_FONT = 'font-family="Verdana" font-size="9pt" ' \
+                 'text-anchor="middle" dominant-baseline="central"'
+
+    def __init__(self, document: Document, theme: Theme):
+        """Init.
+        """
+        self._document = document
+        self._theme = theme
+        top = self.BORDER_WIDTH + self.HEADER_HEIGHT
+        self._ports = {
+            node.id: (
+                PortIndex(node.inputs, top, node.height - self.BORDER_WIDTH),
+                PortIndex(node.outputs, top, node.height - self.BORDER_WIDTH)
+            )
+            for node in document.nodes
+        }
+
+    def _color(self, style: str, option: str) -> str:
+        """Get color option of the theme's style.
+        """
+        return self._theme.styles[style][option]
+
+    def write(self, f: TextIO):
+        """Write the image.
+        """
+        nodes = self._document.nodes
+        if nodes:
+            x1 = min(node.x for node in nodes) - self.MARGIN
+            y1 = min(node.y for node in nodes) - self.MARGIN
+            x2 = max(node.x + node.width for node in nodes) + self.MARGIN
+            y2 = max(node.y + node.height for node in nodes) + self.MARGIN
+        else:
+            x1 = y1 = 0
+            x2 = y2 = self.MARGIN
+        edge_color = self._color(Style.EDGE, 'fill')
+        f.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'viewBox="{x1} {y1} {x2 - x1} {y2 - y1}" '
+            f'width="{x2 - x1}" height="{y2 - y1}">\n'
+            f'<defs><marker id="arrow" viewBox="0 0 15 10" refX="15" '
+            f'refY="5" markerWidth="5" markerHeight="3.3" orient="auto">'
+            f'<path d="M0,0 L15,5 L0,10 L3,5 z" fill="{edge_color}"/>'
+            f'</marker></defs>\n'
+            f'<rect x="{x1}" y="{y1}" width="{x2 - x1}" '
+            f'height="{y2 - y1}" '
+            f'fill="{self._color(Style.WORKSPACE, "bg")}"/>\n'
+        )
+        for node in nodes:
+            self._write_node(f, node)
+        self._write_edges(f, edge_color)
+        f.write('</svg>\n')
+
+    def _write_node(self, f: TextIO, node: NodeData):
+        """Write node's frame, texts and ports.
+        """
+        x, y = node.x, node.y
+        width, height = node.width, node.height
+        border = self.BORDER_WIDTH
+        header = self.HEADER_HEIGHT
+        color = self._theme.gammas[node.gamma]
+        frame_style = Style.GROUP_FRAME if node.group else Style.NODE_FRAME
+        frame = self._theme.styles[frame_style]
+        dash = ','.join(map(str, frame['dash']))
+        f.write(
+            f'<g><rect x="{x}" y="{y}" width="{width}" height="{height}" '
+            f'fill="{color.main_color}" stroke="{frame["outline"]}" '
+            f'stroke-width="{frame["width"]}"'
+            + (f' stroke-dasharray="{dash}"' if dash else '') + '/>'
+            f'<rect x="{x + border}" y="{y + border + header}" '
+            f'width="{width - 2 * border}" '
+            f'height="{height - 2 * border - header}" '
+            f'fill="{color.secondary_color}"/>'
+            f'<text x="{x + width // 2}" y="{y + header // 2}" {self.FONT} '
+            f'fill="{self._color(Style.NODE_HEAD, "fill")}">'
+            f'{escape(node.text_head)}</text>'
+            f'<text x="{x + width // 2}" y="{y + (height + header) // 2}" '
+            f'{self.FONT} fill="{self._color(Style.NODE_DESC, "fill")}">'
+            f'{escape(node.text_desc)}</text>'
+        )
+        inputs, outputs = self._ports[node.id]
+        for side, side_x in ((inputs, x), (outputs, x + width)):
+            if not side.specs:
+                continue
+            for port in side.ports:
+                f.write(
+                    f'<circle cx="{side_x}" '
+                    f'cy="{y + side.get_offset(port.name)}" '
+                    f'r="{self.PORT_RADIUS}" '
+                    f'fill="{self._color(Style.NODE_PORT, "fill")}"/>'
+                )
+        f.write('</g>\n')
+
+    def _write_edges(self, f: TextIO, color: str):
+        """Write edges as Bezier curves with arrows, then their labels,
+        placed without overlapping, like the workspace does.
+        """
+        positions = {
+            node.id: (node.x, node.y, node.width)
+            for node in self._document.nodes
+        }
+        # Middle points of labelled edges' curves, with labels:
+        labels = []
+        for edge in self._document.edges:
+            if edge.source not in positions or edge.target not in positions:
+                continue
+            source_x, source_y, source_width = positions[edge.source]
+            target_x, target_y, _ = positions[edge.target]
+            x1 = source_x + source_width - self.BORDER_WIDTH + 2
+            y1 = source_y + self._ports[edge.source][1].get_offset(
+                edge.source_port
+            )
+            x2 = target_x + self.BORDER_WIDTH - 2
+            y2 = target_y + self._ports[edge.target][0].get_offset(
+                edge.target_port
+            )
+            # Same curve as DirectedEdge's one:
+            delta_x = max(abs(x2 - x1) // 3, 30)
+            delta_y = max((y2 - y1) // 10, 10)
+            f.write(
+                f'<path d="M{x1},{y1} C{x1 + delta_x},{y1 + delta_y} '
+                f'{x2 - delta_x - 20},{y2 - delta_y} {x2},{y2}" '
+                f'fill="none" stroke="{color}" '
+                f'stroke-width="{self.EDGE_WIDTH}" '
+                f'marker-end="url(#arrow)"/>\n'
+            )
+            if edge.label:
+                labels.append((
+                    (x1 + x2 - 20) / 2, (y1 + y2) / 2, edge.label
+                ))
+
+        placed = GridIndex()
+        label_color = self._color(Style.EDGE_LABEL, 'fill')
+        for n, (x, y, label) in enumerate(labels):
+            box = place_label(
+                (x, y), len(label) * self.LABEL_CHAR_WIDTH,
+                self.LABEL_HEIGHT, placed
+            )
+            if box is None:
+                continue
+            placed.add(n, box)
+            f.write(
+                f'<text x="{(box[0] + box[2]) / 2}" '
+                f'y="{(box[1] + box[3]) / 2}" {self.LABEL_FONT} '
+                f'fill="{label_color}">{escape(label)}</text>\n'
+            )
+
+
+def write_svg(document: Document, f: TextIO, theme: Theme = DARK):
+    """Write document as SVG image, colored by the theme.
+    """
+    _SvgWriter(document, theme).write(f)
+
+
+# ---------------------- API ------------------------- #
+
+_WRITERS = {
+    ExportFormat.DOT: write_dot,
+    ExportFormat.GRAPHML: write_graphml,
+    ExportFormat.CSV: write_csv,
+    ExportFormat.SVG: write_svg,
+}
+
+
+def export_document(document: Document, path: str,
+                    export_format: Optional[str] = None):
+    """Save document to file of the format, guessed by extension if not
+    given.
+    """
+    export_format = export_format or ExportFormat.from_path(path)
+    if export_format == ExportFormat.JSON:
+        document.save(path)
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        _WRITERS[export_format](document, f)
@@ -0,0 +1,620 @@
+"""Streaming importers of diagrams from other formats:
+Graphviz DOT, GraphML and CSV edge lists.
+
+Files are parsed incrementally and converted to batches of Document,
+so the whole file is never loaded into memory. Only the mapping of
+file's node ids to document ids is kept, to resolve edges.
+
+Usable headless:
+    python -m core.importers <input file> <output document.json>
+Check, that memory of importing doesn't grow with file's size:
+    python -m core.importers --check-memory
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from dataclasses import asdict
+from typing import Iterator, Optional, Sequence, TextIO
+
+from core.document import Document, NodeData, EdgeData
+from core.enums import Gamma
+
+
+class ImportFormat:
+    """Supported import formats.
+    """
+    DOT = 'dot'
+    GRAPHML = 'graphml'
+    CSV = 'csv'
+
+    EXTENSIONS = {
+        '.dot': DOT,
+        '.gv': DOT,
+        '.graphml': GRAPHML,
+        '.xml': GRAPHML,
+        '.csv': CSV,
+        '.tsv': CSV,
+    }
+
+    @classmethod
+    def from_path(cls, path: str) -> str:
+        """Guess format by file extension.
+        Raise ValueError, if it's unknown.
+        """
+        _, extension = os.path.splitext(path)
+        try:
+            return cls.EXTENSIONS[extension.lower()]
+        except KeyError:
+            raise ValueError(f'Unknown import format: "{extension}"') from None
+
+
+# Some common color names, not matching Gamma names:
+_COLOR_NAMES = {
+    'cyan': Gamma.BLUE,
+    'lightblue': Gamma.BLUE,
+    'navy': Gamma.VIOLET,
+    'orange': Gamma.RED,
+    'magenta': Gamma.PURPLE,
+    'pink': Gamma.PURPLE,
+    'grey': Gamma.GRAY,
+    'black': Gamma.GRAY,
+    'white': Gamma.GRAY,
+}
+
+
+def gamma_from_color(color: Optional[str],
+                     default: Gamma = Gamma.BLUE) -> Gamma:
+    """Get Gamma for color from imported file: Gamma's or common color
+    name, or the nearest Gamma's main color for '#RRGGBB'.
+    """
+    if not color:
+        return default
+    color = color.strip().lower()
+    name = color.upper()
+    if name in Gamma.__members__:
+        return Gamma[name]
+    if color in _COLOR_NAMES:
+        return _COLOR_NAMES[color]
+    if re.fullmatch(r'#[0-9a-f]{6}([0-9a-f]{2})?', color):
+        rgb = _hex_to_rgb(color)
+        return min(Gamma, key=lambda gamma: sum(
+            (a - b) ** 2
+            for a, b in zip(rgb, _hex_to_rgb(gamma.value.main_color))
+        ))
+    return default
+
+
+def _hex_to_rgb(color: str) -> tuple[int, int, int]:
+    """Get (r, g, b) of '#RRGGBB' color.
+    """
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+class _Batcher:
+    """Converts imported nodes and edges into Document batches.
+    Assigns document ids, places nodes without position on a grid,
+    creates nodes, implicitly declared by edges.
+    """
+    GRID_COLUMNS = 50
+    GRID_STEP_X = 250
+    GRID_STEP_Y = 150
+
+    def __init__(self, batch_size: int):
+        """Init.
+        """
+        self._batch_size = batch_size
+        self._ids: dict[str, str] = {}
+        self._edges_count = 0
+        self._batch = Document()
+
+    def add_node(self, key: str, attrs: dict[str, str]):
+        """Add node with file's id `key`.
+        Repeated declarations of the same node are ignored.
+        """
+        if key in self._ids:
+            return
+        number = len(self._ids)
+        tag_id = f'id-node-{number + 1}'
+        self._ids[key] = tag_id
+
+        x, y = _parse_position(attrs)
+        if x is None:
+            x = number % self.GRID_COLUMNS * self.GRID_STEP_X
+            y = number // self.GRID_COLUMNS * self.GRID_STEP_Y
+        self._batch.nodes.append(NodeData(
+            id=tag_id,
+            x=x,
+            y=y,
+            gamma=gamma_from_color(
+                attrs.get('fillcolor') or attrs.get('color')
+            ).name,
+            text_head=attrs.get('label') or attrs.get('name') or key,
+            text_desc=attrs.get('description') or attrs.get('tooltip')
+            or attrs.get('comment') or '',
+        ))
+
+    def add_edge(self, source: str, target: str, label: str = ''):
+        """Add edge between nodes with file's ids.
+        """
+        for key in (source, target):
+            if key not in self._ids:
+                self.add_node(key, {})
+        self._edges_count += 1
+        self._batch.edges.append(EdgeData(
+            id=f'id-directededge-{self._edges_count}',
+            source=self._ids[source],
+            target=self._ids[target],
+            label=label,
+        ))
+
+    def pop_full(self) -> Optional[Document]:
+        """Get batch, if it's full.
+        """
+        if len(self._batch.nodes) + len(self._batch.edges) \
+                >= self._batch_size:
+            return self.pop()
+
+    def pop(self) -> Optional[Document]:
+        """Get current batch, if it's not empty, and start a new one.
+        """
+        batch = self._batch
+        if not batch.nodes and not batch.edges:
+            return None
+        self._batch = Document()
+        return batch
+
+
+def _parse_position(attrs: dict[str, str]) -> tuple:
+    """Get node's (x, y) from imported attributes, (None, None) if absent.
+    """
+    try:
+        if 'pos' in attrs:
+            x, y = attrs['pos'].rstrip('!').split(',')[:2]
+            return float(x), float(y)
+        if 'x' in attrs and 'y' in attrs:
+            return float(attrs['x']), float(attrs['y'])
+    except ValueError:
+        pass
+    return None, None
+
+
+# ---------------------- DOT ------------------------- #
+
+# Token with leading whitespaces and comments:
+_DOT_TOKEN = re.compile(r'''
+    (?:\s+|//[^\n]*|\#[^\n]*|/\*.*?\*/)*
+    (?:
+        (?P<quoted>"(?:[^"\\]|\\.)*")
+      | (?P<html><(?:[^<>]|<[^<>]*>)*>)
+      | (?P<punct>->|--|[{}\[\];,=:])
+      | (?P<id>[A-Za-z_\x80-\uffff][\w\x80-\uffff]*|-?(?:\.\d+|\d+(?:\.\d*)?))
+    )
+''', re.VERBOSE | re.DOTALL)
+_DOT_SPACE = re.compile(r'(?:\s+|//[^\n]*|\#[^\n]*|/\*.*?\*/)*', re.DOTALL)
+
+_DOT_KEYWORDS = {'strict', 'graph', 'digraph', 'subgraph'}
+
+
+def _iter_dot_tokens(f: TextIO, chunk_size: int) -> Iterator[tuple[str, str]]:
+    """Tokenize DOT file, reading it by chunks.
+    Yield (kind, value), kind is 'id' (for all kinds of ids) or 'punct'.
+    """
+    buffer = ''
+    position = 0
+    eof = False
+    match_token = _DOT_TOKEN.match
+    while True:
+        match = match_token(buffer, position)
+        # Token, touching the end of buffer, may continue in the next chunk:
+        if not eof and (match is None or match.end() == len(buffer)):
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        if match is None:
+            if _DOT_SPACE.fullmatch(buffer, position) is None:
+                raise ValueError(f'DOT syntax error near: '
+                                 f'{buffer[position:position + 40]!r}')
+            return
+
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'quoted':
+            yield 'id', value[1:-1].replace('\\"', '"').replace('\\\n', '')
+        elif kind == 'html':
+            yield 'id', value[1:-1]
+        else:
+            yield kind, value
+
+
+class _DotParser:
+    """DOT statements parser.
+    Subgraphs are flattened, default node attributes (`node [...]`) are
+    applied globally, ports are ignored.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        """Init.
+        """
+        self._tokens = _iter_dot_tokens(f, chunk_size)
+        self._lookahead: deque[tuple[str, str]] = deque()
+
+    def _peek(self, n: int = 0) -> tuple[str, str]:
+        """Get n-th token ahead without consuming.
+        ('', '') means end of file.
+        """
+        lookahead = self._lookahead
+        while len(lookahead) <= n:
+            lookahead.append(next(self._tokens, ('', '')))
+        return lookahead[n]
+
+    def _take(self) -> tuple[str, str]:
+        """Consume token.
+        """
+        self._peek()
+        return self._lookahead.popleft()
+
+    def _take_attrs(self) -> dict[str, str]:
+        """Consume attribute lists, if any: [a=b, c=d][e=f].
+        """
+        attrs = {}
+        while self._peek() == ('punct', '['):
+            self._take()
+            while self._peek()[1] not in (']', ''):
+                kind, key = self._take()
+                if kind == 'id' and self._peek() == ('punct', '='):
+                    self._take()
+                    attrs[key] = self._take()[1]
+            self._take()
+        return attrs
+
+    def _take_node_id(self) -> str:
+        """Consume node id with optional port: node:port:compass.
+        """
+        _, key = self._take()
+        while self._peek() == ('punct', ':'):
+            self._take()
+            self._take()
+        return key
+
+    def parse(self, batcher: _Batcher) -> Iterator[Document]:
+        """Parse statements, yield full batches.
+        """
+        node_defaults = {}
+        while True:
+            kind, value = self._peek()
+            if not kind:
+                return
+            if kind == 'punct':
+                self._take()
+                continue
+
+            keyword = value.lower()
+            if keyword in _DOT_KEYWORDS:
+                # Graph header or subgraph: skip its name or attributes.
+                self._take()
+                if self._peek() == ('punct', '['):
+                    self._take_attrs()
+                elif self._peek()[0] == 'id' \
+                        and self._peek()[1].lower() not in _DOT_KEYWORDS:
+                    self._take()
+                continue
+            if keyword in ('node', 'edge') \
+                    and self._peek(1) == ('punct', '['):
+                self._take()
+                attrs = self._take_attrs()
+                if keyword == 'node':
+                    node_defaults.update(attrs)
+                continue
+
+            key = self._take_node_id()
+            if self._peek() == ('punct', '='):
+                # Graph attribute.
+                self._take()
+                self._take()
+                continue
+
+            chain = [key]
+            while self._peek() in (('punct', '->'), ('punct', '--')):
+                self._take()
+                chain.append(self._take_node_id())
+            attrs = self._take_attrs()
+
+            if len(chain) == 1:
+                batcher.add_node(key, {**node_defaults, **attrs})
+            else:
+                for key in chain:
+                    batcher.add_node(key, node_defaults)
+                for source, target in zip(chain, chain[1:]):
+                    batcher.add_edge(source, target, attrs.get('label', ''))
+            batch = batcher.pop_full()
+            if batch:
+                yield batch
+
+
+# ---------------------- GRAPHML ------------------------- #
+
+def _local_name(tag: str) -> str:
+    """Get XML tag name without namespace.
+    """
+    return tag.rpartition('}')[2]
+
+
+def _iter_graphml(path: str, batcher: _Batcher) -> Iterator[Document]:
+    """Parse GraphML file with iterparse, clearing parsed elements.
+    Node's and edge's <data> are mapped by their keys' attr.name. yEd's
+    node and edge labels, node's geometry and fill color are supported
+    too.
+    """
+    keys: dict[str, str] = {}
+    # Open elements: parsed ones are detached from their parents, which
+    # iterparse keeps until their ends (<graph> - until the file's end):
+    parents: list[ElementTree.Element] = []
+    for event, element in ElementTree.iterparse(path, ('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+
+        tag = _local_name(element.tag)
+        if tag == 'key':
+            keys[element.get('id')] = element.get('attr.name') \
+                or element.get('id')
+        elif tag == 'node':
+            batcher.add_node(element.get('id'), _get_graphml_attrs(
+                element, keys
+            ))
+        elif tag == 'edge':
+            batcher.add_edge(
+                element.get('source'), element.get('target'),
+                _get_graphml_attrs(element, keys).get('label', '')
+            )
+        else:
+            continue
+
+        # Parsed elements are not needed anymore:
+        element.clear()
+        if parents:
+            parents[-1].remove(element)
+        batch = batcher.pop_full()
+        if batch:
+            yield batch
+
+
+def _get_graphml_attrs(element: ElementTree.Element,
+                       keys: dict[str, str]) -> dict[str, str]:
+    """Get attributes of GraphML node or edge from its <data> children.
+    """
+    attrs = {}
+    for data in element:
+        if _local_name(data.tag) != 'data':
+            continue
+        text = (data.text or '').strip()
+        if text:
+            attrs[keys.get(data.get('key'), data.get('key'))] = text
+        for child in data.iter():
+            tag = _local_name(child.tag)
+            if tag in ('NodeLabel', 'EdgeLabel') and child.text:
+                attrs['label'] = child.text.strip()
+            elif tag == 'Geometry':
+                attrs['x'] = child.get('x')
+                attrs['y'] = child.get('y')
+            elif tag == 'Fill' and child.get('color'):
+                attrs['color'] = child.get('color')
+    return attrs
+
+
+# ---------------------- CSV ------------------------- #
+
+_CSV_SOURCE_COLUMNS = ('source', 'from', 'src')
+_CSV_TARGET_COLUMNS = ('target', 'to', 'dst')
+
+
+def _iter_csv(f: TextIO, batcher: _Batcher) -> Iterator[Document]:
+    """Parse CSV edge list: rows of source, target.
+    Header row is optional; if present, columns are found by their names.
+    """
+    sample = f.read(4096)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    source_column, target_column = 0, 1
+    rows = csv.reader(f, dialect)
+    for n, row in enumerate(rows):
+        if n == 0:
+            header = [cell.strip().lower() for cell in row]
+            if any(name in header for name in _CSV_SOURCE_COLUMNS):
+                source_column = next(
+                    header.index(name) for name in _CSV_SOURCE_COLUMNS
+                    if name in header
+                )
+                target_column = next(
+                    (header.index(name) for name in _CSV_TARGET_COLUMNS
+                     if name in header),
+                    source_column + 1
+                )
+                continue
+        if len(row) <= max(source_column, target_column):
+            continue
+        source = row[source_column].strip()
+        target = row[target_column].strip()
+        if source and target:
+            batcher.add_edge(source, target)
+            batch = batcher.pop_full()
+            if batch:
+                yield batch
+
+
+# ---------------------- API ------------------------- #
+
+def iter_batches(path: str, import_format: Optional[str] = None,
+                 batch_size: int = 1000,
+                 chunk_size: int = 64 * 1024) -> Iterator[Document]:
+    """Import file by batches of about batch_size elements.
+    Ids of nodes and edges are unique over all batches; edges may refer
+    to nodes from previous batches.
+    Raise ValueError, if file can't be parsed.
+    """
+    import_format = import_format or ImportFormat.from_path(path)
+    batcher = _Batcher(batch_size)
+
+    if import_format == ImportFormat.GRAPHML:
+        try:
+            yield from _iter_graphml(path, batcher)
+        except ElementTree.ParseError as e:
+            raise ValueError(f'GraphML syntax error: {e}') from e
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            if import_format == ImportFormat.DOT:
+                yield from _DotParser(f, chunk_size).parse(batcher)
+            else:
+                yield from _iter_csv(f, batcher)
+
+    batch = batcher.pop()
+    if batch:
+        yield batch
+
+
+def import_document(path: str,
+                    import_format: Optional[str] = None) -> Document:
+    """Import the whole file into a single document.
+    """
+    document = Document()
+    for batch in iter_batches(path, import_format):
+        document.nodes.extend(batch.nodes)
+        document.edges.extend(batch.edges)
+    return document
+
+
+def convert_to_document(path: str, output_path: str,
+                        import_format: Optional[str] = None):
+    """Import file and save it as a diagram document, streaming:
+    nodes are written at once, edges are spooled to a temporary file.
+    """
+    with open(output_path, 'w', encoding='utf-8') as output, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as edges:
+        output.write(f'{{"version": {Document.VERSION}, "nodes": [')
+        separator = ''
+        for batch in iter_batches(path, import_format):
+            for node in batch.nodes:
+                output.write(separator + json.dumps(asdict(node)))
+                separator = ', '
+            for edge in batch.edges:
+                edges.write(json.dumps(asdict(edge)) + '\n')
+
+        output.write('], "edges": [')
+        edges.seek(0)
+        separator = ''
+        for line in edges:
+            output.write(separator + line.rstrip('\n'))
+            separator = ', '
+        output.write(']}')
+
+
+# ---------------------- MEMORY CHECK ------------------------- #
+
+def _write_sample(f: TextIO, import_format: str, edges: int, nodes: int):
+    """Write file of the format with edges between nodes in a cycle.
+    """
+    if import_format == ImportFormat.DOT:
+        f.write('digraph sample {\n')
+        for n in range(edges):
+            f.write(f'  n{n % nodes} -> n{(n + 1) % nodes};\n')
+        f.write('}\n')
+    elif import_format == ImportFormat.GRAPHML:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+            '<key id="d0" for="edge" attr.name="label"/>\n'
+            '<graph edgedefault="directed">\n'
+        )
+        for n in range(nodes):
+            f.write(f'<node id="n{n}"/>\n')
+        for n in range(edges):
+            f.write(
+                f'<edge source="n{n % nodes}" target="n{(n + 1) % nodes}">'
+                f'<data key="d0">e{n}</data></edge>\n'
+            )
+        f.write('</graph>\n</graphml>\n')
+    else:
+        f.write('source,target\n')
+        for n in range(edges):
+            f.write(f'n{n % nodes},n{(n + 1) % nodes}\n')
+
+
+def measure_peak_memory(import_format: str, edges: int,
+                        nodes: int = 1000) -> int:
+    """Import a generated file of the format with edges between nodes,
+    get peak memory, allocated by importing, in bytes.
+    """
+    extension = next(
+        extension for extension, value in ImportFormat.EXTENSIONS.items()
+        if value == import_format
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sample' + extension)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            _write_sample(f, import_format, edges, nodes)
+        tracemalloc.start()
+        try:
+            for _ in iter_batches(path, import_format):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def check_memory(sizes: Sequence[int] = (50_000, 400_000),
+                 growth: float = 1.5) -> dict[str, list[int]]:
+    """Get peak memory of importing each format for each amount of edges
+    (between the same nodes). Raise ValueError, if it grows more than
+    `growth` times from the smallest amount to the largest one: only
+    the node ids and a batch may be kept, not the parsed file.
+    """
+    peaks = {
+        import_format: [
+            measure_peak_memory(import_format, edges) for edges in sizes
+        ]
+        for import_format in (ImportFormat.DOT, ImportFormat.GRAPHML,
+                              ImportFormat.CSV)
+    }
+    for import_format, values in peaks.items():
+        if values[-1] > values[0] * growth:
+            raise ValueError(
+                f'Memory of {import_format} import grows with its size: '
+                + ', '.join(
+                    f'{value / 2 ** 20:.1f} MB at {edges} edges'
+                    for edges, value in zip(sizes, values)
+                )
+            )
+    return peaks
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check-memory']:
+        try:
+            for name, values in check_memory().items():
+                print(f'{name}: ' + ', '.join(
+                    f'{value / 2 ** 20:.1f} MB' for value in values
+                ))
+        except ValueError as e:
+            sys.exit(str(e))
+    elif len(sys.argv) != 3:
+        sys.exit('Usage: python -m core.importers <input> <output.json>\n'
+                 '       python -m core.importers --check-memory')
+    else:
+        convert_to_document(sys.argv[1], sys.argv[2])
@@ -1,4 +1,6 @@
 """Set of app interfaces.
+Interfaces have empty `__slots__`, so elements, implementing them, may
+have no instance dicts.
 """
 
 from abc import ABC, abstractmethod
@@ -9,6 +11,8 @@ from core.aliases import Coords
 class Draggable(ABC):
     """Workspace item, that can be dragged.
     """
+    __slots__ = ()
+
     @abstractmethod
     def move(self, delta_x: int, delta_y: int):
         """Move item within workspace.
@@ -19,6 +23,8 @@ class Draggable(ABC):
 class Selectable(ABC):
     """Workspace item, that can be selected.
     """
+    __slots__ = ()
+
     @abstractmethod
     def draw_selection(self):
         """Put selection focus to the item.
@@ -35,6 +41,8 @@ class Selectable(ABC):
 class Connector(ABC):
     """Workspace item, that can connect Connectible items.
     """
+    __slots__ = ()
+
     @property
     @abstractmethod
     def source(self) -> 'Connectible':
@@ -58,6 +66,8 @@ class Connector(ABC):
 class Targetable(ABC):
     """Workspace item, that can be targeted with the temporary connector.
     """
+    __slots__ = ()
+
     @abstractmethod
     def turn_highlight_on(self):
         """Put highlight to the item.
@@ -71,8 +81,11 @@ class Targetable(ABC):
         pass
 
     @abstractmethod
-    def is_already_connected_with(self, source: 'Connectible'):
-        """Check, if the item is already connected with the source.
+    def is_already_connected_with(self, source: 'Connectible',
+                                  source_port: str = '',
+                                  target_port: str = ''):
+        """Check, if the item is already connected with the source,
+        by the same ports.
         """
         pass
 
@@ -81,6 +94,8 @@ class Connectible(Targetable):
     """Workspace item, that can be connected with others trough Connector.
     Also, can be target for temporary connector.
     """
+    __slots__ = ()
+
     @abstractmethod
     def add_input_connector(self, connector: Connector):
         """Add connector for input.
@@ -106,14 +121,14 @@ class Connectible(Targetable):
         pass
 
     @abstractmethod
-    def get_output_point(self) -> Coords:
-        """Get starting point coords for connector.
+    def get_output_point(self, port: str = '') -> Coords:
+        """Get starting point coords for connector from the output port.
         """
         pass
 
     @abstractmethod
-    def get_input_point(self) -> Coords:
-        """Get ending point coords for connector.
+    def get_input_point(self, port: str = '') -> Coords:
+        """Get ending point coords for connector to the input port.
         """
         pass
 
@@ -121,6 +136,8 @@ class Connectible(Targetable):
 class Removable(ABC):
     """Workspace item, that can be deleted.
     """
+    __slots__ = ()
+
     @abstractmethod
     def delete(self):
         """Remove item.
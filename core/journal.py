@@ -0,0 +1,152 @@
+"""Crash recovery journal.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Optional
+
+from core.document import Document
+from core.operations import Operation, apply_operations
+
+
+class Journal:
+    """Append-only journal of diagram operations.
+
+    Operations are recorded in memory (cheap, called from UI callbacks)
+    and written to disk by a background thread on a timer. Every write
+    is bounded by MAX_WRITE_SIZE. When the journal grows over
+    COMPACT_THRESHOLD operations, it's folded into the snapshot.
+
+    Files are removed on clean `close`, so their presence on the next
+    start means, that the previous session has crashed.
+    """
+    JOURNAL_FILE = 'journal.jsonl'
+    SNAPSHOT_FILE = 'snapshot.json'
+
+    FLUSH_INTERVAL = 1.0
+    MAX_WRITE_SIZE = 64 * 1024
+    COMPACT_THRESHOLD = 10_000
+
+    def __init__(self, directory: str):
+        """Init.
+        """
+        self._journal_path = os.path.join(directory, self.JOURNAL_FILE)
+        self._snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: deque[Operation] = deque()
+        self._journal_size = 0
+        self._io_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, operation: Operation):
+        """Add operation to journal.
+        Doesn't touch disk, so it's safe to call from UI callbacks.
+        """
+        self._pending.append(operation)
+
+    def start(self, document: Document):
+        """Start a new journal over the document snapshot and run
+        background flushing.
+        """
+        with self._io_lock:
+            self._pending.clear()
+            self._write_snapshot(document)
+        if not self._thread:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='journal',
+                daemon=True
+            )
+            self._thread.start()
+
+    def close(self):
+        """Stop background flushing and remove journal files.
+        Should be called on clean exit only.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with self._io_lock:
+            self._pending.clear()
+            for path in (self._journal_path, self._snapshot_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _run(self):
+        """Background thread body.
+        """
+        while not self._stop.wait(self.FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Write pending operations to disk, compact if needed.
+        """
+        with self._io_lock:
+            if not self._pending:
+                return
+            with open(self._journal_path, 'a', encoding='utf-8') as f:
+                while self._pending:
+                    f.write(self._pop_chunk())
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self._journal_size >= self.COMPACT_THRESHOLD:
+                self._compact()
+
+    def _pop_chunk(self) -> str:
+        """Pop pending operations, serialized to JSON lines, until
+        MAX_WRITE_SIZE is reached (at least one operation).
+        """
+        lines = []
+        size = 0
+        while self._pending and (not lines or size < self.MAX_WRITE_SIZE):
+            line = json.dumps(self._pending.popleft().to_dict()) + '\n'
+            lines.append(line)
+            size += len(line)
+        self._journal_size += len(lines)
+        return ''.join(lines)
+
+    def _compact(self):
+        """Fold journal into snapshot.
+        """
+        self._write_snapshot(self.read(os.path.dirname(self._journal_path)))
+
+    def _write_snapshot(self, document: Document):
+        """Atomically replace snapshot with the document, truncate journal.
+        """
+        temp_path = self._snapshot_path + '.tmp'
+        document.save(temp_path)
+        os.replace(temp_path, self._snapshot_path)
+        open(self._journal_path, 'w').close()
+        self._journal_size = 0
+
+    @classmethod
+    def has_recovery(cls, directory: str) -> bool:
+        """Check, if directory contains journal of the crashed session.
+        """
+        return os.path.exists(os.path.join(directory, cls.SNAPSHOT_FILE))
+
+    @classmethod
+    def read(cls, directory: str) -> Document:
+        """Get document, recovered from the snapshot and the journal.
+        Broken tail of the journal (unfinished write) is ignored.
+        """
+        document = Document.load(os.path.join(directory, cls.SNAPSHOT_FILE))
+        journal_path = os.path.join(directory, cls.JOURNAL_FILE)
+        if not os.path.exists(journal_path):
+            return document
+
+        operations = []
+        with open(journal_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    operations.append(Operation.from_dict(json.loads(line)))
+                except ValueError:
+                    break
+        return apply_operations(document, operations)
@@ -0,0 +1,150 @@
+"""Placement of edge labels: spatial index and collision pass.
+"""
+
+from collections import defaultdict
+from typing import Hashable, Optional
+
+from core.aliases import Box, Coords
+
+# Offsets of candidate places of a label from its anchor point, in label's
+# widths and heights: centered at the anchor, above, below, right, left,
+# then diagonal ones:
+CANDIDATES = (
+    (0, 0), (0, -1), (0, 1), (1, 0), (-1, 0),
+    (1, -1), (-1, -1), (1, 1), (-1, 1),
+)
+
+
+class GridIndex:
+    """Spatial index of boxes: a uniform grid, each cell of which keeps
+    keys of boxes, overlapping it.
+    Finding boxes in a small area costs lookups of a few cells, whatever
+    the total amount of boxes is.
+    """
+    CELL_SIZE = 64
+
+    def __init__(self, cell_size: int = CELL_SIZE):
+        """Init.
+        """
+        self._cell_size = cell_size
+        self._boxes: dict[Hashable, Box] = {}
+        self._cells: defaultdict[tuple[int, int], set[Hashable]] = \
+            defaultdict(set)
+
+    def __len__(self):
+        """Amount of indexed boxes.
+        """
+        return len(self._boxes)
+
+    def __contains__(self, key: Hashable):
+        """Is box indexed.
+        """
+        return key in self._boxes
+
+    def get(self, key: Hashable) -> Optional[Box]:
+        """Get indexed box, None if there is no such box.
+        """
+        return self._boxes.get(key)
+
+    def _get_range(self, box: Box) -> tuple[int, int, int, int]:
+        """Get range of cells, overlapped by the box: first and last
+        columns and rows.
+        """
+        size = self._cell_size
+        return (
+            int(box[0] // size), int(box[1] // size),
+            int(box[2] // size), int(box[3] // size)
+        )
+
+    def _get_cells(self, box: Box) -> list[tuple[int, int]]:
+        """Get cells, overlapped by the box.
+        """
+        column1, row1, column2, row2 = self._get_range(box)
+        return [
+            (column, row)
+            for column in range(column1, column2 + 1)
+            for row in range(row1, row2 + 1)
+        ]
+
+    def add(self, key: Hashable, box: Box):
+        """Add box, replacing the previous one, if box is indexed.
+        Moving box within the same cells (f.e. a point) costs no cells'
+        updates.
+        """
+        previous = self._boxes.get(key)
+        if previous is not None:
+            if self._get_range(previous) == self._get_range(box):
+                self._boxes[key] = box
+                return
+            self.remove(key)
+        self._boxes[key] = box
+        for cell in self._get_cells(box):
+            self._cells[cell].add(key)
+
+    def remove(self, key: Hashable):
+        """Remove box, if it's indexed.
+        """
+        box = self._boxes.pop(key, None)
+        if box is None:
+            return
+        for cell in self._get_cells(box):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def clear(self):
+        """Remove all boxes.
+        """
+        self._boxes.clear()
+        self._cells.clear()
+
+    def find(self, box: Box) -> set[Hashable]:
+        """Get keys of boxes, overlapping the box.
+        """
+        found = set()
+        for cell in self._get_cells(box):
+            for key in self._cells.get(cell, ()):
+                if key not in found and overlap(self._boxes[key], box):
+                    found.add(key)
+        return found
+
+    def is_free(self, box: Box) -> bool:
+        """Is box not overlapped by indexed ones.
+        It's the hot spot of label placement, so the cells and overlap
+        checks are inlined.
+        """
+        x1, y1, x2, y2 = box
+        size = self._cell_size
+        cells = self._cells
+        boxes = self._boxes
+        for column in range(int(x1 // size), int(x2 // size) + 1):
+            for row in range(int(y1 // size), int(y2 // size) + 1):
+                for key in cells.get((column, row), ()):
+                    other = boxes[key]
+                    if other[0] < x2 and x1 < other[2] \
+                            and other[1] < y2 and y1 < other[3]:
+                        return False
+        return True
+
+
+def overlap(a: Box, b: Box) -> bool:
+    """Do boxes overlap; touching boxes don't.
+    """
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def place_label(anchor: Coords, width: float, height: float,
+                placed: GridIndex) -> Optional[Box]:
+    """Get box of a label at anchor point: the first of candidate places
+    around it, which is not overlapped by placed labels. Return None, if
+    all of them are.
+    """
+    x, y = anchor
+    for column, row in CANDIDATES:
+        x1 = x + (column - 0.5) * width
+        y1 = y + (row - 0.5) * height
+        box = x1, y1, x1 + width, y1 + height
+        if placed.is_free(box):
+            return box
+    return None
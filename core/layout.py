@@ -0,0 +1,76 @@
+"""Automatic layout of diagram documents.
+"""
+
+from collections import defaultdict
+from dataclasses import replace
+
+from core.document import Document
+
+
+def layered_layout(document: Document, step_x: int = 300,
+                   step_y: int = 150) -> Document:
+    """Get new document with nodes placed in layers, from left to right:
+    each node is a layer right of all its predecessors (longest path
+    layering). Within a layer, nodes are ordered by the mean position
+    of their predecessors, to reduce edge crossings.
+    Edges, closing cycles, are ignored for layering.
+    """
+    ids = [node.id for node in document.nodes]
+    successors: dict[str, list[str]] = defaultdict(list)
+    predecessors: dict[str, list[str]] = defaultdict(list)
+    in_degree = dict.fromkeys(ids, 0)
+    for edge in document.edges:
+        if edge.source in in_degree and edge.target in in_degree \
+                and edge.source != edge.target:
+            successors[edge.source].append(edge.target)
+            predecessors[edge.target].append(edge.source)
+            in_degree[edge.target] += 1
+
+    # Kahn's topological order; nodes left in cycles are released
+    # one by one, in document order:
+    layers = dict.fromkeys(ids, 0)
+    order = []
+    ready = [node_id for node_id in reversed(ids) if not in_degree[node_id]]
+    pending = iter(ids)
+    while len(order) < len(ids):
+        if not ready:
+            node_id = next(
+                node_id for node_id in pending if in_degree[node_id] > 0
+            )
+            in_degree[node_id] = 0
+            ready.append(node_id)
+        node_id = ready.pop()
+        order.append(node_id)
+        for successor in successors[node_id]:
+            if in_degree[successor] <= 0:
+                continue
+            layers[successor] = max(layers[successor], layers[node_id] + 1)
+            in_degree[successor] -= 1
+            if not in_degree[successor]:
+                ready.append(successor)
+
+    rows: dict[str, float] = {}
+    by_layer: dict[int, list[str]] = defaultdict(list)
+    for node_id in order:
+        by_layer[layers[node_id]].append(node_id)
+    for layer in sorted(by_layer):
+        nodes = by_layer[layer]
+        keys = {}
+        for n, node_id in enumerate(nodes):
+            placed = [rows[p] for p in predecessors[node_id] if p in rows]
+            keys[node_id] = sum(placed) / len(placed) if placed else n
+        nodes.sort(key=keys.__getitem__)
+        for row, node_id in enumerate(nodes):
+            rows[node_id] = row
+
+    return Document(
+        nodes=[
+            replace(
+                node,
+                x=layers[node.id] * step_x,
+                y=int(rows[node.id]) * step_y
+            )
+            for node in document.nodes
+        ],
+        edges=list(document.edges)
+    )
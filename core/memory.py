@@ -0,0 +1,138 @@
+"""Memory footprint of diagram elements.
+"""
+
+import sys
+from typing import Any, Iterable, Iterator, Optional, Sized
+
+
+class MemoryReport:
+    """Bytes, taken by elements of each kind, by categories:
+        object - element itself, with its slots (or dict);
+        strings - its ids, texts and names;
+        numbers - its coordinates and canvas item ids;
+        containers - its lists and tuples, without their items;
+        indexes - its share of registry's and workspace's dicts.
+    Objects, shared by elements (interned strings, geometry prototypes,
+    cached small ints), are counted once, for the first element. Canvas
+    items are kept by Tk, out of Python's heap, and are not counted.
+    """
+    CATEGORIES = ('object', 'strings', 'numbers', 'containers', 'indexes')
+    # Elements, for which total memory is estimated:
+    ESTIMATED_COUNT = 1_000_000
+
+    def __init__(self):
+        """Init.
+        """
+        self._counts: dict[str, int] = {}
+        self._bytes: dict[str, dict[str, float]] = {}
+        # Ids of counted objects:
+        self._seen: set[int] = set()
+
+    def _get_sizes(self, kind: str) -> dict[str, float]:
+        """Get bytes of the kind's elements by categories.
+        """
+        if kind not in self._bytes:
+            self._counts[kind] = 0
+            self._bytes[kind] = dict.fromkeys(self.CATEGORIES, 0)
+        return self._bytes[kind]
+
+    @staticmethod
+    def _get_category(value: Any) -> Optional[str]:
+        """Get category of element's field value, None for references to
+        other objects, which are not element's own.
+        """
+        if isinstance(value, str):
+            return 'strings'
+        if isinstance(value, (int, float)):
+            return 'numbers'
+        if isinstance(value, (list, tuple, dict, set)):
+            return 'containers'
+        return None
+
+    @staticmethod
+    def _get_fields(element: Any) -> Iterator[Any]:
+        """Get values of element's slots and dict.
+        """
+        for cls in type(element).__mro__:
+            slots = cls.__dict__.get('__slots__', ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in ('__dict__', '__weakref__'):
+                    yield getattr(element, name, None)
+        yield from getattr(element, '__dict__', {}).values()
+
+    def add(self, kind: str, elements: Iterable[Any]):
+        """Add elements of the kind.
+        """
+        sizes = self._get_sizes(kind)
+        seen = self._seen
+        count = 0
+        for element in elements:
+            count += 1
+            sizes['object'] += sys.getsizeof(element)
+            if hasattr(element, '__dict__'):
+                sizes['object'] += sys.getsizeof(element.__dict__)
+            for value in self._get_fields(element):
+                category = self._get_category(value)
+                if category and id(value) not in seen:
+                    seen.add(id(value))
+                    sizes[category] += sys.getsizeof(value)
+        self._counts[kind] += count
+
+    def add_index(self, kind: str, index: Sized,
+                  count: Optional[int] = None):
+        """Add index (f.e. registry's dict), without its keys and values,
+        to the kind's indexes. If count is given, only that many index's
+        entries belong to the kind, so only their share is added.
+        """
+        size = sys.getsizeof(index)
+        if count is not None and len(index):
+            size = size * count / len(index)
+        self._get_sizes(kind)['indexes'] += size
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get report as JSON-compatible dict: by kinds, their amounts,
+        bytes per element by categories, and total bytes.
+        """
+        kinds = {}
+        for kind, sizes in self._bytes.items():
+            count = self._counts[kind]
+            kinds[kind] = {
+                'count': count,
+                'per_element': {
+                    category: size / count if count else 0.0
+                    for category, size in sizes.items()
+                },
+                'total': sum(sizes.values()),
+            }
+        count = sum(self._counts.values())
+        total = sum(kind['total'] for kind in kinds.values())
+        return {
+            'kinds': kinds,
+            'count': count,
+            'total': total,
+            'per_element': total / count if count else 0.0,
+        }
+
+    def format(self) -> str:
+        """Get report as text table, in bytes per element.
+        """
+        data = self.to_dict()
+        columns = self.CATEGORIES + ('total',)
+        lines = [
+            f'{"bytes per element":18}{"count":>10}'
+            + ''.join(f'{c:>11}' for c in columns)
+        ]
+        for kind, summary in data['kinds'].items():
+            per_element = summary['per_element']
+            lines.append(
+                f'{kind:18}{summary["count"]:10}'
+                + ''.join(f'{per_element[c]:11.1f}' for c in self.CATEGORIES)
+                + f'{sum(per_element.values()):11.1f}'
+            )
+        estimated = data['per_element'] * self.ESTIMATED_COUNT / 2 ** 20
+        lines.append(
+            f'{data["count"]} elements, {data["total"] / 2 ** 20:.1f} MB, '
+            f'{data["per_element"]:.1f} bytes per element, '
+            f'{estimated:.0f} MB per {self.ESTIMATED_COUNT:,} elements'
+        )
+        return '\n'.join(lines)
@@ -0,0 +1,136 @@
+"""Diagram editing operations.
+Operations describe changes of the diagram and can be replayed on
+a serialized Document.
+"""
+
+from dataclasses import dataclass, field, asdict, replace
+from typing import Any, Iterable
+
+from core.document import Document, NodeData, EdgeData
+
+
+class OperationKind:
+    """Kind of diagram operation.
+    """
+    CREATE_NODE = 'create_node'
+    CONNECT = 'connect'
+    MOVE = 'move'
+    EDIT = 'edit'
+    LABEL = 'label'
+    DELETE = 'delete'
+
+
+@dataclass
+class Operation:
+    """Diagram operation over element with tag_id `id`.
+    Payload depends on the kind:
+        CREATE_NODE: NodeData fields;
+        CONNECT: source, target, source_port, target_port, label;
+        MOVE: x, y (new position);
+        EDIT: text_head, text_desc (new node's text);
+        LABEL: label (new edge's label);
+        DELETE: empty (node deletion also deletes its edges).
+    """
+    kind: str
+    id: str
+    payload: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def create_node(cls, data: NodeData) -> 'Operation':
+        """Operation of node creation.
+        """
+        return cls(OperationKind.CREATE_NODE, data.id, asdict(data))
+
+    @classmethod
+    def connect(cls, data: EdgeData) -> 'Operation':
+        """Operation of edge creation.
+        """
+        return cls(
+            OperationKind.CONNECT,
+            data.id,
+            {
+                'source': data.source,
+                'target': data.target,
+                'source_port': data.source_port,
+                'target_port': data.target_port,
+                'label': data.label,
+            }
+        )
+
+    @classmethod
+    def move(cls, tag_id: str, x: int, y: int) -> 'Operation':
+        """Operation of node moving to (x, y).
+        """
+        return cls(OperationKind.MOVE, tag_id, {'x': x, 'y': y})
+
+    @classmethod
+    def edit(cls, tag_id: str, text_head: str,
+             text_desc: str) -> 'Operation':
+        """Operation of node's text changing.
+        """
+        return cls(
+            OperationKind.EDIT,
+            tag_id,
+            {'text_head': text_head, 'text_desc': text_desc}
+        )
+
+    @classmethod
+    def label(cls, tag_id: str, label: str) -> 'Operation':
+        """Operation of edge's label changing.
+        """
+        return cls(OperationKind.LABEL, tag_id, {'label': label})
+
+    @classmethod
+    def delete(cls, tag_id: str) -> 'Operation':
+        """Operation of node or edge deletion.
+        """
+        return cls(OperationKind.DELETE, tag_id)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get operation as JSON-compatible dict.
+        """
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'Operation':
+        """Create operation from dict, made by `to_dict`.
+        Raise ValueError, if data is malformed.
+        """
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError(f'Malformed operation: {e!r}') from e
+
+
+def apply_operations(document: Document,
+                     operations: Iterable[Operation]) -> Document:
+    """Get new document: the given one with operations applied.
+    Operations over absent elements are skipped.
+    """
+    nodes = {node.id: node for node in document.nodes}
+    edges = {edge.id: edge for edge in document.edges}
+
+    for op in operations:
+        if op.kind == OperationKind.CREATE_NODE:
+            nodes[op.id] = NodeData(**op.payload)
+        elif op.kind == OperationKind.CONNECT:
+            if op.payload['source'] in nodes and op.payload['target'] in nodes:
+                edges[op.id] = EdgeData(id=op.id, **op.payload)
+        elif op.kind in (OperationKind.MOVE, OperationKind.EDIT):
+            if op.id in nodes:
+                nodes[op.id] = replace(nodes[op.id], **op.payload)
+        elif op.kind == OperationKind.LABEL:
+            if op.id in edges:
+                edges[op.id] = replace(edges[op.id], **op.payload)
+        elif op.kind == OperationKind.DELETE:
+            # Edges of deleted nodes are dropped below, at once.
+            if nodes.pop(op.id, None) is None:
+                edges.pop(op.id, None)
+
+    return Document(
+        nodes=list(nodes.values()),
+        edges=[
+            edge for edge in edges.values()
+            if edge.source in nodes and edge.target in nodes
+        ]
+    )
@@ -0,0 +1,119 @@
+"""Typed ports of nodes.
+Port is declared by a spec string: "name" or "name:type".
+Node without declared ports on a side has a single default port, with
+empty name and any type.
+"""
+
+from bisect import bisect_left
+from typing import NamedTuple, Optional, Sequence
+
+from core.aliases import Tags
+
+
+class Port(NamedTuple):
+    """Named connection point of a node side, accepting edges of its type.
+    """
+    name: str
+    type: str
+
+    # Type, compatible with all the others:
+    ANY = 'any'
+    # Prefix of canvas tag, which marks item of the port:
+    TAG_PREFIX = 'port-'
+
+    @classmethod
+    def from_spec(cls, spec: str) -> 'Port':
+        """Create port from spec: "name" or "name:type".
+        """
+        name, _, port_type = spec.partition(':')
+        return cls(name.strip(), port_type.strip() or cls.ANY)
+
+    def is_compatible(self, other: 'Port') -> bool:
+        """Check, if edge may connect the port with other one.
+        """
+        return self.ANY in (self.type, other.type) or self.type == other.type
+
+    @property
+    def tag(self) -> str:
+        """Canvas tag of port's items.
+        """
+        return f'{self.TAG_PREFIX}{self.name}'
+
+    @classmethod
+    def get_name_from_tags(cls, tags: Tags) -> str:
+        """Get port's name from tags of its item, default port's name,
+        if there is no port tag.
+        """
+        for tag in tags:
+            if tag.startswith(cls.TAG_PREFIX):
+                return tag[len(cls.TAG_PREFIX):]
+        return ''
+
+
+DEFAULT_PORT = Port('', Port.ANY)
+
+
+class PortIndex:
+    """Ports of one node side, evenly spaced along it, with their offsets
+    from node's top.
+    The nearest port of a type is found by computing the nearest slot
+    from coordinate, and bisecting indices of the type's ports, so it's
+    independent of amount of the node's ports.
+    """
+    def __init__(self, specs: Sequence[str], top: float, bottom: float):
+        """Init. Ports are placed between top and bottom offsets.
+        """
+        self._specs = tuple(specs)
+        self._ports = [Port.from_spec(spec) for spec in specs] \
+            or [DEFAULT_PORT]
+
+        self._step = (bottom - top) / len(self._ports)
+        self._first = top + self._step / 2
+        self._by_name = {
+            port.name: index for index, port in enumerate(self._ports)
+        }
+        # Port type -> sorted indices of compatible ports; lazily filled:
+        self._compatible: dict[str, list[int]] = {}
+
+    @property
+    def specs(self) -> tuple[str, ...]:
+        """Declared specs of ports.
+        """
+        return self._specs
+
+    @property
+    def ports(self) -> list[Port]:
+        """Ports of the side, from top to bottom.
+        """
+        return self._ports
+
+    def get(self, name: str) -> Port:
+        """Get port by name; default (first) port, if there is no such.
+        """
+        return self._ports[self._by_name.get(name, 0)]
+
+    def get_offset(self, name: str) -> float:
+        """Get port's offset from node's top.
+        """
+        return self._first + self._by_name.get(name, 0) * self._step
+
+    def find_nearest(self, offset: float, port: Port) -> Optional[Port]:
+        """Get port, compatible with the given one, nearest to offset from
+        node's top. None, if there is no compatible port.
+        """
+        indices = self._compatible.get(port.type)
+        if indices is None:
+            indices = self._compatible[port.type] = [
+                index for index, candidate in enumerate(self._ports)
+                if candidate.is_compatible(port)
+            ]
+        if not indices:
+            return None
+
+        slot = round((offset - self._first) / self._step)
+        position = bisect_left(indices, slot)
+        nearest = min(
+            indices[max(position - 1, 0):position + 1],
+            key=lambda index: abs(index - slot)
+        )
+        return self._ports[nearest]
@@ -0,0 +1,341 @@
+"""Headless batch processing of diagram files over a process pool.
+
+Each file is processed by a single task in a worker process: the task
+loads the file, runs the operation and returns a small JSON-compatible
+result, so only paths and results cross process boundaries.
+"""
+
+import os
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from core.document import Document
+from core.enums import Gamma
+from core.exporters import ExportFormat, export_document, write_svg
+from core.importers import ImportFormat, import_document
+from core.layout import layered_layout
+from core.operations import Operation
+from core.rules import ConnectionRules, RulesChecker
+from core.themes import THEMES
+
+
+class Task:
+    """Names of batch operations.
+    """
+    VALIDATE = 'validate'
+    LAYOUT = 'layout'
+    CONVERT = 'convert'
+    SVG = 'svg'
+    STATS = 'stats'
+
+    ALL = (VALIDATE, LAYOUT, CONVERT, SVG, STATS)
+    # Operations, writing output files:
+    WITH_OUTPUT = (LAYOUT, CONVERT, SVG)
+
+
+@dataclass
+class TaskOptions:
+    """Options of batch operation, shared by all files.
+        output_dir - directory of output files;
+        output_format - format of converted files, see `ExportFormat`;
+        rules_path - connection rules to validate against;
+        theme - name of theme for SVG rendering.
+    """
+    output_dir: Optional[str] = None
+    output_format: str = ExportFormat.JSON
+    rules_path: Optional[str] = None
+    theme: str = 'dark'
+
+
+@dataclass
+class TaskResult:
+    """Result of the operation over one file.
+    `seconds` is the time of processing in the worker, without queueing.
+    """
+    path: str
+    ok: bool
+    seconds: float
+    data: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def load_any(path: str) -> Document:
+    """Load diagram document or import file of other format.
+    """
+    if path.lower().endswith('.json'):
+        return Document.load(path)
+    return import_document(path)
+
+
+# ---------------------- OPERATIONS ------------------------- #
+
+def validate(document: Document,
+             rules: Optional[ConnectionRules] = None) -> dict[str, Any]:
+    """Check document's consistency: unique ids, known gammas, existing
+    edge ends, and connection rules, if given.
+    Edges are checked against the rules in document's order, as if they
+    were made one by one.
+    """
+    problems = []
+    node_ids = set()
+    for node in document.nodes:
+        if node.id in node_ids:
+            problems.append(f'Duplicate node id: {node.id}')
+        node_ids.add(node.id)
+        if node.gamma not in Gamma.__members__:
+            problems.append(f'Unknown gamma of {node.id}: {node.gamma}')
+
+    checker = None
+    if rules is not None and not problems:
+        checker = RulesChecker(rules)
+        checker.rebuild(Document(nodes=document.nodes))
+
+    edge_ids = set()
+    for edge in document.edges:
+        if edge.id in edge_ids or edge.id in node_ids:
+            problems.append(f'Duplicate edge id: {edge.id}')
+        edge_ids.add(edge.id)
+        missing = {edge.source, edge.target} - node_ids
+        if missing:
+            problems.append(
+                f'Edge {edge.id} refers absent nodes: {sorted(missing)}'
+            )
+        elif checker is not None:
+            violated = checker.check(edge.source, edge.target)
+            if violated:
+                problems.append(f'Edge {edge.id} violates rule: {violated}')
+            checker.apply(Operation.connect(edge))
+    return {'valid': not problems, 'problems': problems}
+
+
+def get_stats(document: Document) -> dict[str, Any]:
+    """Get document's statistics: sizes, gammas, degrees and amount of
+    weakly connected components.
+    """
+    in_degree = Counter(edge.target for edge in document.edges)
+    out_degree = Counter(edge.source for edge in document.edges)
+
+    # Components by union-find with path halving:
+    parents = {node.id: node.id for node in document.nodes}
+
+    def find(node_id: str) -> str:
+        while parents[node_id] != node_id:
+            parents[node_id] = parents[parents[node_id]]
+            node_id = parents[node_id]
+        return node_id
+
+    for edge in document.edges:
+        if edge.source in parents and edge.target in parents:
+            parents[find(edge.source)] = find(edge.target)
+
+    return {
+        'nodes': len(document.nodes),
+        'edges': len(document.edges),
+        'groups': sum(1 for node in document.nodes if node.group),
+        'gammas': dict(Counter(node.gamma for node in document.nodes)),
+        'max_in_degree': max(in_degree.values(), default=0),
+        'max_out_degree': max(out_degree.values(), default=0),
+        'components': sum(
+            1 for node_id in parents if find(node_id) == node_id
+        ),
+    }
+
+
+class _Worker:
+    """State of a worker process, made once by pool's initializer.
+    """
+    OPTIONS = TaskOptions()
+    RULES: Optional[ConnectionRules] = None
+    # Output name of the processed file, see `find_files`:
+    NAME = ''
+
+    @classmethod
+    def init(cls, options: TaskOptions, rules: Optional[ConnectionRules]):
+        """Init worker process with rules, loaded by the parent one.
+        """
+        cls.OPTIONS = options
+        cls.RULES = rules
+
+    @classmethod
+    def get_output_path(cls, extension: str) -> str:
+        """Get path of output file for the processed one, creating its
+        directory.
+        """
+        output = os.path.join(cls.OPTIONS.output_dir, cls.NAME + extension)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        return output
+
+    @classmethod
+    def run(cls, task: str, path: str, name: str) -> TaskResult:
+        """Run task over the file, catching its errors into the result.
+        """
+        started = time.perf_counter()
+        cls.NAME = name
+        try:
+            data = getattr(cls, f'_{task}')(path)
+        except (OSError, ValueError) as e:
+            return TaskResult(
+                path, False, time.perf_counter() - started, error=str(e)
+            )
+        except Exception:
+            return TaskResult(
+                path, False, time.perf_counter() - started,
+                error=traceback.format_exc()
+            )
+        ok = data.get('valid', True)
+        return TaskResult(path, ok, time.perf_counter() - started, data)
+
+    @classmethod
+    def _validate(cls, path: str) -> dict[str, Any]:
+        """Validate file.
+        """
+        return validate(load_any(path), cls.RULES)
+
+    @classmethod
+    def _layout(cls, path: str) -> dict[str, Any]:
+        """Lay out file, save as document.
+        """
+        output = cls.get_output_path('.json')
+        layered_layout(load_any(path)).save(output)
+        return {'output': output}
+
+    @classmethod
+    def _convert(cls, path: str) -> dict[str, Any]:
+        """Convert file to the output format.
+        """
+        output_format = cls.OPTIONS.output_format
+        extension = next(
+            extension
+            for extension, export_format in ExportFormat.EXTENSIONS.items()
+            if export_format == output_format
+        )
+        output = cls.get_output_path(extension)
+        export_document(load_any(path), output, output_format)
+        return {'output': output}
+
+    @classmethod
+    def _svg(cls, path: str) -> dict[str, Any]:
+        """Render file to SVG image.
+        """
+        document = load_any(path)
+        output = cls.get_output_path('.svg')
+        with open(output, 'w', encoding='utf-8') as f:
+            write_svg(document, f, THEMES[cls.OPTIONS.theme])
+        return {'output': output}
+
+    @classmethod
+    def _stats(cls, path: str) -> dict[str, Any]:
+        """Get statistics of file.
+        """
+        return get_stats(load_any(path))
+
+
+# ---------------------- POOL ------------------------- #
+
+def find_files(paths: Iterable[str]) -> dict[str, str]:
+    """Get diagram files: given files, and supported files from given
+    directories, recursively, with their output names: paths relative to
+    their directories (names for given files), without extensions.
+    """
+    extensions = set(ImportFormat.EXTENSIONS) | {'.json'}
+    files = {}
+    for path in paths:
+        if not os.path.isdir(path):
+            files[path] = os.path.splitext(os.path.basename(path))[0]
+            continue
+        for directory, _, names in os.walk(path):
+            for name in sorted(names):
+                stem, extension = os.path.splitext(name)
+                if extension.lower() in extensions:
+                    files[os.path.join(directory, name)] = os.path.relpath(
+                        os.path.join(directory, stem), path
+                    )
+    return files
+
+
+def _find_collisions(files: dict[str, str]) -> dict[str, str]:
+    """Get files, which output names are taken by preceding files (f.e.
+    "x.csv" and "x.dot"), with those preceding files.
+    """
+    owners: dict[str, str] = {}
+    collisions = {}
+    for path, name in files.items():
+        key = os.path.normcase(name)
+        if key in owners:
+            collisions[path] = owners[key]
+        else:
+            owners[key] = path
+    return collisions
+
+
+def run_batch(task: str, files: Union[dict[str, str], Iterable[str]],
+              options: Optional[TaskOptions] = None,
+              workers: Optional[int] = None) -> Iterator[TaskResult]:
+    """Run task over files in a pool of worker processes, yield results
+    as soon as they are done, in order of completion.
+    files map paths to output names (see `find_files`); output names of
+    given paths are their names. Files, which outputs would overwrite
+    outputs of preceding ones, fail without processing.
+    The largest files are submitted first, so a big file doesn't finish
+    alone at the end; at most a few tasks per worker are queued at once,
+    so thousands of files don't flood the pool.
+    Raise ValueError, if options or rules are not valid.
+    """
+    options = options or TaskOptions()
+    if task not in Task.ALL:
+        raise ValueError(f'Unknown task: "{task}"')
+    if options.output_format not in ExportFormat.EXTENSIONS.values():
+        raise ValueError(f'Unknown export format: "{options.output_format}"')
+    if options.theme not in THEMES:
+        raise ValueError(f'Unknown theme: "{options.theme}"')
+    if task in Task.WITH_OUTPUT:
+        if not options.output_dir:
+            raise ValueError(f'Output directory is required for "{task}"')
+        os.makedirs(options.output_dir, exist_ok=True)
+    rules = None
+    if options.rules_path:
+        try:
+            rules = ConnectionRules.load(options.rules_path)
+        except OSError as e:
+            raise ValueError(f'Can\'t load rules: {e}') from e
+
+    if not isinstance(files, dict):
+        files = {
+            path: os.path.splitext(os.path.basename(path))[0]
+            for path in files
+        }
+    pending = dict(files)
+    if task in Task.WITH_OUTPUT:
+        for path, owner in _find_collisions(files).items():
+            del pending[path]
+            yield TaskResult(
+                path, False, 0.0,
+                error=f'Output name "{files[path]}" is taken by "{owner}"'
+            )
+
+    def get_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    paths = sorted(pending, key=get_size)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+            workers, initializer=_Worker.init, initargs=(options, rules)
+            ) as executor:
+        running = set()
+        while paths or running:
+            while paths and len(running) < workers * 2:
+                path = paths.pop()
+                running.add(
+                    executor.submit(_Worker.run, task, path, pending[path])
+                )
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
@@ -1,7 +1,8 @@
 """Registry mixin.
 """
 
-from typing import Any, Optional
+import sys
+from typing import Any, Hashable, Optional, Sequence
 from collections import defaultdict
 
 from core.aliases import Tags
@@ -10,40 +11,106 @@ from core.aliases import Tags
 class Registry:
     """Registry to adding items by special tag_id, based on their class
     and amount of items of this class.
+    Items are kept by scopes (f.e. canvases): views of the same diagram
+    have their own items with the same tag_ids. Counters are common, so
+    new tag_ids are unique among all scopes.
+    Numbers of new tag_ids are equal to ID_SLOT modulo ID_STRIDE, so
+    editors, sharing a diagram, don't produce the same tag_ids.
     """
-    REGISTRY = {}
+    REGISTRY: dict[Hashable, dict[str, Any]] = defaultdict(dict)
     COUNTERS = defaultdict(int)
+    ID_SLOT = 0
+    ID_STRIDE = 1
 
     @classmethod
-    def add(cls, item: Any) -> str:
+    def set_id_slot(cls, slot: int, stride: int):
+        """Set residue and modulus of numbers of new tag_ids.
+        """
+        cls.ID_SLOT = slot
+        cls.ID_STRIDE = stride
+
+    @classmethod
+    def _get_next_number(cls, category: type) -> int:
+        """Get number of the next new tag_id of the category.
+        """
+        number = cls.COUNTERS[category] + 1
+        return number + (cls.ID_SLOT - number) % cls.ID_STRIDE
+
+    @classmethod
+    def add(cls, item: Any, tag_id: Optional[str] = None,
+            scope: Hashable = None) -> str:
         """Add item to registry.
+        If tag_id is given (f.e. restored from saved document), it's used
+        instead of a new one; it's interned, so views of the same diagram
+        share their tag_ids.
         Return item's tag_id.
         """
         category = item.__class__
-        cls.COUNTERS[category] += 1
-        name = f'id-{category.__name__.lower()}-{cls.COUNTERS[category]}'
-        cls.REGISTRY[name] = item
-        return name
+        if tag_id is None:
+            cls.COUNTERS[category] = cls._get_next_number(category)
+            tag_id = f'id-{category.__name__.lower()}-{cls.COUNTERS[category]}'
+        else:
+            tag_id = sys.intern(tag_id)
+            # Keep counter ahead of restored ids, to avoid collisions:
+            _, _, number = tag_id.rpartition('-')
+            if number.isdigit():
+                cls.COUNTERS[category] = max(
+                    cls.COUNTERS[category], int(number)
+                )
+        cls.REGISTRY[scope][tag_id] = item
+        return tag_id
+
+    @classmethod
+    def add_many(cls, items: Sequence[Any],
+                 scope: Hashable = None) -> list[str]:
+        """Add bunch of items of the same class to registry.
+        Return items' tag_ids.
+        """
+        if not items:
+            return []
+        category = items[0].__class__
+        prefix = f'id-{category.__name__.lower()}-'
+        first = cls._get_next_number(category)
+        numbers = range(
+            first, first + len(items) * cls.ID_STRIDE, cls.ID_STRIDE
+        )
+        cls.COUNTERS[category] = numbers[-1]
+        names = [f'{prefix}{n}' for n in numbers]
+        cls.REGISTRY[scope].update(zip(names, items))
+        return names
 
     @classmethod
-    def get(cls, tag_id: str) -> Any:
+    def get(cls, tag_id: str, scope: Hashable = None) -> Any:
         """Get item from registry by name.
         """
-        return cls.REGISTRY[tag_id]
+        return cls.REGISTRY[scope][tag_id]
+
+    @classmethod
+    def contains(cls, tag_id: str, scope: Hashable = None) -> bool:
+        """Check, if the scope has item with the name.
+        """
+        return tag_id in cls.REGISTRY[scope]
 
     @classmethod
     def get_tag_id(cls, item: Any) -> Optional[str]:
         """Get item from registry by name.
         """
-        for key, value in cls.REGISTRY.items():
-            if value == item:
-                return key
+        for items in cls.REGISTRY.values():
+            for key, value in items.items():
+                if value == item:
+                    return key
 
     @classmethod
-    def delete(cls, tag_id: str) -> Any:
+    def delete(cls, tag_id: str, scope: Hashable = None) -> Any:
         """Get item from registry by name.
         """
-        del cls.REGISTRY[tag_id]
+        del cls.REGISTRY[scope][tag_id]
+
+    @classmethod
+    def delete_scope(cls, scope: Hashable):
+        """Delete all items of the scope, f.e. of a destroyed canvas.
+        """
+        cls.REGISTRY.pop(scope, None)
 
     @staticmethod
     def get_id_from_tags(tags: Tags) -> Optional[str]:
@@ -0,0 +1,316 @@
+"""Connection rules: which nodes may be connected.
+"""
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from core.document import Document
+from core.enums import Gamma
+from core.operations import Operation, OperationKind
+
+
+@dataclass
+class ConnectionRules:
+    """Declarative connection rules. Gammas are given by names, "*" stands
+    for any gamma.
+        connections - source gamma -> gammas of allowed targets; if empty,
+            all connections are allowed;
+        max_in_degree, max_out_degree - gamma -> max amount of node's
+            input/output edges;
+        acyclic - edges must not form cycles.
+    """
+    ANY = '*'
+
+    connections: dict[str, list[str]] = field(default_factory=dict)
+    max_in_degree: dict[str, int] = field(default_factory=dict)
+    max_out_degree: dict[str, int] = field(default_factory=dict)
+    acyclic: bool = False
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'ConnectionRules':
+        """Create rules from dict.
+        Raise ValueError, if data is malformed or refers unknown gammas.
+        """
+        try:
+            rules = cls(**data)
+        except TypeError as e:
+            raise ValueError(f'Malformed rules: {e}') from e
+        if not (isinstance(rules.connections, dict) and all(
+                isinstance(targets, list)
+                and all(isinstance(target, str) for target in targets)
+                for targets in rules.connections.values())):
+            raise ValueError('Malformed rules: connections must map gammas '
+                             'to lists of gammas')
+        for limits in (rules.max_in_degree, rules.max_out_degree):
+            if not (isinstance(limits, dict) and all(
+                    type(limit) is int and limit >= 0
+                    for limit in limits.values())):
+                raise ValueError('Malformed rules: degree limits must map '
+                                 'gammas to not negative integers')
+        if not isinstance(rules.acyclic, bool):
+            raise ValueError('Malformed rules: acyclic must be boolean')
+        names = set(rules.connections)
+        for targets in rules.connections.values():
+            names.update(targets)
+        names.update(rules.max_in_degree, rules.max_out_degree)
+        unknown = names - {cls.ANY} - set(Gamma.__members__)
+        if unknown:
+            raise ValueError(f'Unknown gammas in rules: {sorted(unknown)}')
+        return rules
+
+    @classmethod
+    def load(cls, path: str) -> 'ConnectionRules':
+        """Load rules from JSON file.
+        Raise ValueError, if file is not valid rules.
+        """
+        with open(path, encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Not a JSON document: {e}') from e
+        if not isinstance(data, dict):
+            raise ValueError('Malformed rules: object expected')
+        return cls.from_dict(data)
+
+
+class RulesChecker:
+    """Checks candidate connections against compiled rules.
+
+    Rules are compiled into tables, indexed by gamma's number: allowed
+    target gammas and degree limits, so these checks are O(1).
+    For the acyclic rule, each node has a bit number, and transitive
+    closure of the graph is kept as Python int bitsets: nodes, reachable
+    from the node, and nodes, which reach it. Adding an edge updates
+    the closure incrementally; deletions invalidate it, and it's rebuilt
+    lazily, at the next check.
+    """
+    # Violated rules, returned by `check`:
+    GAMMA = 'gamma'
+    MAX_OUT_DEGREE = 'max_out_degree'
+    MAX_IN_DEGREE = 'max_in_degree'
+    CYCLE = 'cycle'
+
+    def __init__(self, rules: ConnectionRules):
+        """Init.
+        """
+        self._rules = rules
+        self._compile(rules)
+        self.rebuild(Document())
+
+    def _compile(self, rules: ConnectionRules):
+        """Compile rules into lookup tables.
+        """
+        gammas = list(Gamma)
+        self._gamma_numbers = {
+            gamma.name: number for number, gamma in enumerate(gammas)
+        }
+
+        def expand(names: list[str]) -> set[int]:
+            if ConnectionRules.ANY in names:
+                return set(range(len(gammas)))
+            return {self._gamma_numbers[name] for name in names}
+
+        if rules.connections:
+            allowed = [set() for _ in gammas]
+            for source, targets in rules.connections.items():
+                for number in expand([source]):
+                    allowed[number] |= expand(targets)
+            self._allowed = [
+                [target in allowed[source] for target in range(len(gammas))]
+                for source in range(len(gammas))
+            ]
+        else:
+            self._allowed = [[True] * len(gammas) for _ in gammas]
+
+        def get_limits(limits: dict[str, int]) -> list[Optional[int]]:
+            default = limits.get(ConnectionRules.ANY)
+            return [limits.get(gamma.name, default) for gamma in gammas]
+
+        self._max_in = get_limits(rules.max_in_degree)
+        self._max_out = get_limits(rules.max_out_degree)
+
+    def rebuild(self, document: Document):
+        """Re-create graph state from the document.
+        """
+        self._gammas: dict[str, int] = {}
+        self._edges: dict[str, tuple[str, str]] = {}
+        self._node_edges: dict[str, set[str]] = defaultdict(set)
+        self._in_degree: dict[str, int] = defaultdict(int)
+        self._out_degree: dict[str, int] = defaultdict(int)
+        self._valid = True
+        self._closure_valid = False
+
+        for node in document.nodes:
+            self._gammas[node.id] = self._gamma_numbers[node.gamma]
+        for edge in document.edges:
+            self._add_edge(edge.id, edge.source, edge.target)
+
+    @property
+    def is_valid(self) -> bool:
+        """Is graph state up to date. See `invalidate`.
+        """
+        return self._valid
+
+    def invalidate(self):
+        """Mark graph state as outdated: nodes or edges were changed
+        without operations. Operations are ignored, until `rebuild`.
+        """
+        self._valid = False
+
+    def apply(self, operation: Operation):
+        """Update graph state by the diagram operation. Creations of
+        existing elements are ignored.
+        """
+        if not self._valid:
+            return
+        if operation.kind == OperationKind.CREATE_NODE:
+            if operation.id in self._gammas:
+                return
+            self._gammas[operation.id] = \
+                self._gamma_numbers[operation.payload['gamma']]
+            if self._closure_valid:
+                self._add_to_closure_node(operation.id)
+        elif operation.kind == OperationKind.CONNECT:
+            self._add_edge(
+                operation.id,
+                operation.payload['source'],
+                operation.payload['target']
+            )
+        elif operation.kind == OperationKind.DELETE:
+            if operation.id in self._gammas:
+                del self._gammas[operation.id]
+                for edge_id in list(self._node_edges[operation.id]):
+                    self._remove_edge(edge_id)
+                del self._node_edges[operation.id]
+                self._in_degree.pop(operation.id, None)
+                self._out_degree.pop(operation.id, None)
+                self._closure_valid = False
+            else:
+                self._remove_edge(operation.id)
+
+    def check(self, source: str, target: str) -> Optional[str]:
+        """Get the rule, which is violated by edge from source to target
+        node, None, if the edge is allowed.
+        """
+        source_gamma = self._gammas.get(source)
+        target_gamma = self._gammas.get(target)
+        if source_gamma is None or target_gamma is None:
+            return None
+        if not self._allowed[source_gamma][target_gamma]:
+            return self.GAMMA
+
+        limit = self._max_out[source_gamma]
+        if limit is not None and self._out_degree[source] >= limit:
+            return self.MAX_OUT_DEGREE
+        limit = self._max_in[target_gamma]
+        if limit is not None and self._in_degree[target] >= limit:
+            return self.MAX_IN_DEGREE
+
+        if self._rules.acyclic:
+            if not self._closure_valid:
+                self._build_closure()
+            # Edge makes a cycle, if target already reaches source:
+            if self._reach[target] >> self._bits[source] & 1:
+                return self.CYCLE
+        return None
+
+    # ---------------------- EDGES ------------------------- #
+
+    def _add_edge(self, edge_id: str, source: str, target: str):
+        """Add edge, update degrees and closure.
+        """
+        if edge_id in self._edges or source not in self._gammas \
+                or target not in self._gammas:
+            return
+        self._edges[edge_id] = source, target
+        self._node_edges[source].add(edge_id)
+        self._node_edges[target].add(edge_id)
+        self._out_degree[source] += 1
+        self._in_degree[target] += 1
+        if self._closure_valid:
+            self._add_to_closure(source, target)
+
+    def _remove_edge(self, edge_id: str):
+        """Remove edge, update degrees; closure becomes outdated.
+        """
+        ends = self._edges.pop(edge_id, None)
+        if ends is None:
+            return
+        source, target = ends
+        self._node_edges[source].discard(edge_id)
+        self._node_edges[target].discard(edge_id)
+        self._out_degree[source] -= 1
+        self._in_degree[target] -= 1
+        self._closure_valid = False
+
+    # ---------------------- REACHABILITY ------------------------- #
+
+    def _build_closure(self):
+        """Compute reachability bitsets of all nodes.
+        Nodes are visited in reverse topological order, so each node's
+        set is the union of its successors' ones; for a cyclic graph
+        the sets are approximate, but it can only become cyclic by edges,
+        made before the rules were set.
+        """
+        nodes = list(self._gammas)
+        self._nodes_by_bit = nodes
+        self._bits = {node: bit for bit, node in enumerate(nodes)}
+        successors: dict[str, list[str]] = defaultdict(list)
+        for source, target in self._edges.values():
+            successors[source].append(target)
+
+        self._reach: dict[str, int] = {}
+        for root in nodes:
+            if root in self._reach:
+                continue
+            # Iterative DFS, post-order:
+            stack = [(root, iter(successors[root]))]
+            self._reach[root] = 1 << self._bits[root]
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    if stack:
+                        self._reach[stack[-1][0]] |= self._reach[node]
+                elif child not in self._reach:
+                    self._reach[child] = 1 << self._bits[child]
+                    stack.append((child, iter(successors[child])))
+                else:
+                    self._reach[node] |= self._reach[child]
+
+        self._ancestors = {node: 0 for node in nodes}
+        for node in nodes:
+            bit = 1 << self._bits[node]
+            for descendant in self._iter_bits(self._reach[node]):
+                self._ancestors[descendant] |= bit
+        self._closure_valid = True
+
+    def _add_to_closure_node(self, node: str):
+        """Add new node to closure: it reaches only itself.
+        """
+        bit = len(self._nodes_by_bit)
+        self._nodes_by_bit.append(node)
+        self._bits[node] = bit
+        self._reach[node] = self._ancestors[node] = 1 << bit
+
+    def _add_to_closure(self, source: str, target: str):
+        """Update closure by new edge: all ancestors of source now reach
+        all descendants of target.
+        """
+        descendants = self._reach[target]
+        ancestors = self._ancestors[source]
+        for node in self._iter_bits(ancestors):
+            self._reach[node] |= descendants
+        for node in self._iter_bits(descendants):
+            self._ancestors[node] |= ancestors
+
+    def _iter_bits(self, bits: int):
+        """Iterate nodes, which bits are set.
+        """
+        while bits:
+            low = bits & -bits
+            yield self._nodes_by_bit[low.bit_length() - 1]
+            bits ^= low
@@ -0,0 +1,225 @@
+"""Search index over diagram nodes.
+"""
+
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import count, islice
+from typing import Iterable, Optional
+
+from core.document import Document, NodeData
+from core.enums import Gamma
+from core.operations import Operation, OperationKind
+
+
+class SearchIndex:
+    """Inverted index over nodes' text, gamma and connectivity.
+    Kept up to date incrementally, by diagram operations.
+
+    Query is a set of terms, all of them should match:
+        word - prefix of some word in node's header or description;
+        color:<gamma> - node's gamma, f.e. "color:red";
+        in:<n>, out:<n> - exact amount of input/output edges.
+    """
+    _WORD = re.compile(r'\w+')
+
+    def __init__(self):
+        """Init.
+        """
+        self._tokens: dict[str, set[str]] = defaultdict(set)
+        self._sorted_tokens: list[str] = []
+        self._gammas: dict[str, set[str]] = defaultdict(set)
+
+        # Per-node data, to update the index on changes:
+        self._node_tokens: dict[str, set[str]] = {}
+        self._node_gamma: dict[str, str] = {}
+        self._order: dict[str, int] = {}
+        self._counter = count()
+
+        # Connectivity:
+        self._edges: dict[str, tuple[str, str]] = {}
+        self._node_edges: dict[str, set[str]] = defaultdict(set)
+        self._in_degree: dict[str, int] = defaultdict(int)
+        self._out_degree: dict[str, int] = defaultdict(int)
+
+    def __len__(self):
+        """Amount of indexed nodes.
+        """
+        return len(self._order)
+
+    def rebuild(self, document: Document):
+        """Re-create index from the document.
+        """
+        self.__init__()
+        self.add_document(document)
+
+    def add_document(self, document: Document):
+        """Add nodes and edges of the document, f.e. a loaded part of the
+        diagram. Edges may end at not indexed nodes.
+        """
+        for node in document.nodes:
+            self._add_node(node)
+        for edge in document.edges:
+            self._add_edge(edge.id, edge.source, edge.target)
+
+    def remove_nodes(self, tag_ids: Iterable[str]):
+        """Remove nodes with their edges, f.e. an unloaded part of the
+        diagram. Absent nodes are skipped.
+        """
+        for tag_id in tag_ids:
+            if tag_id in self._order:
+                self._remove_node(tag_id)
+
+    def apply(self, operation: Operation):
+        """Update index by the diagram operation.
+        """
+        if operation.kind == OperationKind.CREATE_NODE:
+            self._add_node(NodeData(**operation.payload))
+        elif operation.kind == OperationKind.EDIT:
+            if operation.id in self._order:
+                self._set_tokens(operation.id, self._tokenize(
+                    operation.payload['text_head'],
+                    operation.payload['text_desc'],
+                ))
+        elif operation.kind == OperationKind.CONNECT:
+            self._add_edge(
+                operation.id,
+                operation.payload['source'],
+                operation.payload['target']
+            )
+        elif operation.kind == OperationKind.DELETE:
+            if operation.id in self._order:
+                self._remove_node(operation.id)
+            else:
+                self._remove_edge(operation.id)
+
+    def search(self, query: str) -> list[str]:
+        """Get tag_ids of nodes, matched the query, in creation order.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        result: Optional[set[str]] = None
+        degree_terms = []
+        for term in terms:
+            key, _, value = term.partition(':')
+            if key == 'color' and value:
+                ids = self._search_gamma(value)
+            elif key in ('in', 'out') and value.isdigit():
+                degree_terms.append((key, int(value)))
+                continue
+            else:
+                ids = set()
+                for word in self._WORD.findall(term):
+                    ids |= self._search_prefix(word)
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+
+        if result is None:
+            result = set(self._order)
+        for key, value in degree_terms:
+            degrees = self._in_degree if key == 'in' else self._out_degree
+            result = {id_ for id_ in result if degrees[id_] == value}
+
+        return sorted(result, key=self._order.__getitem__)
+
+    def _search_prefix(self, prefix: str) -> set[str]:
+        """Get ids of nodes, having word, started with prefix.
+        """
+        ids = set()
+        position = bisect_left(self._sorted_tokens, prefix)
+        for token in islice(self._sorted_tokens, position, None):
+            if not token.startswith(prefix):
+                break
+            ids |= self._tokens[token]
+        return ids
+
+    def _search_gamma(self, prefix: str) -> set[str]:
+        """Get ids of nodes, which gamma's name starts with prefix.
+        """
+        ids = set()
+        for gamma in Gamma:
+            if gamma.name.lower().startswith(prefix):
+                ids |= self._gammas[gamma.name]
+        return ids
+
+    # ---------------------- NODES ------------------------- #
+
+    @classmethod
+    def _tokenize(cls, *texts: str) -> set[str]:
+        """Get set of lowercase words in texts.
+        """
+        return {
+            word for text in texts for word in cls._WORD.findall(text.lower())
+        }
+
+    def _add_node(self, node: NodeData):
+        """Add node to index. Node, which is indexed already, is replaced.
+        """
+        if node.id in self._order:
+            self._remove_node(node.id)
+        self._order[node.id] = next(self._counter)
+        self._node_gamma[node.id] = node.gamma
+        self._gammas[node.gamma].add(node.id)
+        self._node_tokens[node.id] = set()
+        self._set_tokens(
+            node.id, self._tokenize(node.text_head, node.text_desc)
+        )
+
+    def _set_tokens(self, tag_id: str, tokens: Iterable[str]):
+        """Replace node's tokens.
+        """
+        old_tokens = self._node_tokens[tag_id]
+        tokens = set(tokens)
+        for token in old_tokens - tokens:
+            ids = self._tokens[token]
+            ids.discard(tag_id)
+            if not ids:
+                del self._tokens[token]
+                del self._sorted_tokens[
+                    bisect_left(self._sorted_tokens, token)
+                ]
+        for token in tokens - old_tokens:
+            if token not in self._tokens:
+                insort(self._sorted_tokens, token)
+            self._tokens[token].add(tag_id)
+        self._node_tokens[tag_id] = tokens
+
+    def _remove_node(self, tag_id: str):
+        """Remove node and its edges from index.
+        """
+        self._set_tokens(tag_id, ())
+        del self._node_tokens[tag_id]
+        self._gammas[self._node_gamma.pop(tag_id)].discard(tag_id)
+        del self._order[tag_id]
+        for edge_id in list(self._node_edges.get(tag_id, ())):
+            self._remove_edge(edge_id)
+        self._node_edges.pop(tag_id, None)
+        self._in_degree.pop(tag_id, None)
+        self._out_degree.pop(tag_id, None)
+
+    # ---------------------- EDGES ------------------------- #
+
+    def _add_edge(self, edge_id: str, source: str, target: str):
+        """Add edge to connectivity index. Edge, which is indexed already,
+        is replaced.
+        """
+        self._remove_edge(edge_id)
+        self._edges[edge_id] = source, target
+        self._node_edges[source].add(edge_id)
+        self._node_edges[target].add(edge_id)
+        self._out_degree[source] += 1
+        self._in_degree[target] += 1
+
+    def _remove_edge(self, edge_id: str):
+        """Remove edge from connectivity index.
+        """
+        if edge_id not in self._edges:
+            return
+        source, target = self._edges.pop(edge_id)
+        self._node_edges[source].discard(edge_id)
+        self._node_edges[target].discard(edge_id)
+        self._out_degree[source] -= 1
+        self._in_degree[target] -= 1
@@ -0,0 +1,167 @@
+"""Recorded user sessions and latency reports of their replays.
+"""
+
+import json
+from dataclasses import dataclass, field, astuple
+from typing import Any, Optional
+
+from core.document import Document
+from core.templates import NodeTemplate
+
+
+@dataclass
+class SessionEvent:
+    """Input event of the workspace.
+        time - seconds from the session start;
+        sequence - Tk sequence, which the event was bound by;
+        x, y - pointer's window coordinates;
+        keysym, state - key and modifiers;
+        gamma - name of gamma of node, created from the toolbar by
+            the event, in sessions, recorded before templates;
+        template - template of node, created from the toolbar by
+            the event, if any.
+    """
+    time: float
+    sequence: str
+    x: int = 0
+    y: int = 0
+    keysym: str = ''
+    state: int = 0
+    gamma: str = ''
+    template: dict[str, Any] = field(default_factory=dict)
+
+    def get_template(self) -> Optional[NodeTemplate]:
+        """Get template of node, created from the toolbar by the event,
+        None, if there is no such.
+        """
+        if self.template:
+            return NodeTemplate(**self.template)
+        if self.gamma:
+            return NodeTemplate(self.gamma.capitalize(), self.gamma)
+        return None
+
+
+@dataclass
+class Session:
+    """Recorded session: initial diagram and scroll position, and input
+    events.
+    Saved as JSON lines: a header with the initial state, then an event
+    per line, as a list of `SessionEvent` fields.
+    """
+    VERSION = 1
+
+    document: Document = field(default_factory=Document)
+    view: tuple[float, float] = (0.0, 0.0)
+    events: list[SessionEvent] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """Time of the last event.
+        """
+        return self.events[-1].time if self.events else 0.0
+
+    def save(self, path: str):
+        """Save session to file.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'version': self.VERSION,
+                'document': self.document.to_dict(),
+                'view': self.view,
+            }, ensure_ascii=False) + '\n')
+            for event in self.events:
+                f.write(json.dumps(astuple(event), ensure_ascii=False) + '\n')
+
+    @classmethod
+    def load(cls, path: str) -> 'Session':
+        """Load session from file.
+        Raise ValueError, if file is not a valid session.
+        """
+        with open(path, encoding='utf-8') as f:
+            try:
+                header = json.loads(f.readline())
+                session = cls(
+                    Document.from_dict(header['document']),
+                    tuple(header['view'])
+                )
+                for line in f:
+                    if line.strip():
+                        session.events.append(
+                            SessionEvent(*json.loads(line))
+                        )
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                raise ValueError(f'Malformed session: {e!r}') from e
+        return session
+
+
+class LatencyReport:
+    """Latencies of replayed events, grouped by sequence.
+    Latency is the time of event's handling, with redraws; lag is
+    the delay of event's start from its recorded time, for real-time
+    replays.
+    """
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        """Init.
+        """
+        self._latencies: dict[str, list[float]] = {}
+        self._max_lag = 0.0
+        self.elapsed = 0.0
+
+    def add(self, sequence: str, latency: float, lag: float = 0.0):
+        """Add latency of the event.
+        """
+        self._latencies.setdefault(sequence, []).append(latency)
+        self._max_lag = max(self._max_lag, lag)
+
+    @classmethod
+    def _get_summary(cls, latencies: list[float]) -> dict[str, Any]:
+        """Get count, mean, percentiles and max of latencies, in ms.
+        """
+        ordered = sorted(latencies)
+        summary = {
+            'count': len(ordered),
+            'mean': sum(ordered) / len(ordered) * 1000,
+        }
+        for percentile in cls.PERCENTILES:
+            index = min(len(ordered) - 1, len(ordered) * percentile // 100)
+            summary[f'p{percentile}'] = ordered[index] * 1000
+        summary['max'] = ordered[-1] * 1000
+        return summary
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get report as JSON-compatible dict: summaries by sequence and
+        of all events.
+        """
+        every = [t for ts in self._latencies.values() for t in ts]
+        return {
+            'elapsed': self.elapsed,
+            'max_lag': self._max_lag * 1000,
+            'all': self._get_summary(every) if every else None,
+            'sequences': {
+                sequence: self._get_summary(latencies)
+                for sequence, latencies in sorted(self._latencies.items())
+            },
+        }
+
+    def format(self) -> str:
+        """Get report as text table.
+        """
+        data = self.to_dict()
+        columns = ['count', 'mean'] \
+            + [f'p{p}' for p in self.PERCENTILES] + ['max']
+        lines = [
+            f'{"sequence, ms":28}' + ''.join(f'{c:>9}' for c in columns)
+        ]
+        rows: list[tuple[str, Optional[dict]]] = \
+            list(data['sequences'].items()) + [('all', data['all'])]
+        for name, summary in rows:
+            if summary:
+                lines.append(f'{name:28}' + ''.join(
+                    f'{summary[c]:9.2f}' if c != 'count'
+                    else f'{summary[c]:9}' for c in columns
+                ))
+        lines.append(f'elapsed {data["elapsed"]:.2f}s, '
+                     f'max lag {data["max_lag"]:.1f}ms')
+        return '\n'.join(lines)
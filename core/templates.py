@@ -0,0 +1,143 @@
+"""Node templates: types of nodes, offered by the toolbar's palette.
+
+Templates are loaded from a JSON file:
+    {"templates": [
+        {"name": "Filter", "gamma": "GREEN", "text_desc": "Drops rows",
+         "width": 200, "height": 120, "inputs": ["rows:table"],
+         "outputs": ["kept:table", "dropped:table"]},
+        ...
+    ]}
+Only the name is required; header text is the name by default.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+from core.document import NodeData
+from core.enums import Gamma
+
+
+@dataclass
+class NodeTemplate:
+    """Type of nodes: gamma (style), default size, texts and specs of
+    ports, see `core.ports`.
+    """
+    name: str
+    gamma: str = Gamma.BLUE.name
+    text_head: str = ''
+    text_desc: str = ''
+    width: int = NodeData.WIDTH
+    height: int = NodeData.HEIGHT
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        """Check template, default header text.
+        Raise ValueError, if a field has wrong type, name is empty, gamma
+        is unknown or size is not positive.
+        """
+        if not isinstance(self.name, str) or not self.name:
+            raise ValueError(f'Bad template name: {self.name!r}')
+        if not isinstance(self.gamma, str) \
+                or self.gamma not in Gamma.__members__:
+            raise ValueError(f'Unknown gamma of "{self.name}": {self.gamma}')
+        if not isinstance(self.text_head, str) \
+                or not isinstance(self.text_desc, str):
+            raise ValueError(f'Bad texts of "{self.name}"')
+        for size in (self.width, self.height):
+            if type(size) is not int or size <= 0:
+                raise ValueError(f'Bad size of "{self.name}"')
+        for specs in (self.inputs, self.outputs):
+            if not isinstance(specs, list) \
+                    or not all(isinstance(spec, str) for spec in specs):
+                raise ValueError(
+                    f'Ports of "{self.name}" must be lists of specs'
+                )
+        self.text_head = self.text_head or self.name
+
+    @property
+    def gamma_value(self) -> Gamma:
+        """Template's gamma as enum member.
+        """
+        return Gamma[self.gamma]
+
+
+class TemplateLibrary:
+    """Ordered templates with type-ahead filtering by name.
+
+    Names are lowercased once, on creation. A query, which extends
+    the previous one (the next typed letter), is looked up among
+    the previous matches only, so filtering gets cheaper with each
+    letter.
+    """
+    def __init__(self, templates: Sequence[NodeTemplate]):
+        """Init.
+        """
+        self._templates = list(templates)
+        self._names = [template.name.lower() for template in templates]
+        self._query = ''
+        # Indices of templates, matching the last query:
+        self._matches = list(range(len(self._templates)))
+
+    def __len__(self):
+        """Amount of templates.
+        """
+        return len(self._templates)
+
+    @property
+    def templates(self) -> list[NodeTemplate]:
+        """All templates, in their order.
+        """
+        return self._templates
+
+    def filter(self, query: str) -> list[NodeTemplate]:
+        """Get templates, which names contain the query, case-insensitive.
+        """
+        query = query.strip().lower()
+        if query.startswith(self._query):
+            candidates = self._matches
+        else:
+            candidates = range(len(self._templates))
+        self._matches = [
+            index for index in candidates if query in self._names[index]
+        ]
+        self._query = query
+        return [self._templates[index] for index in self._matches]
+
+    @classmethod
+    def default(cls) -> 'TemplateLibrary':
+        """Get library of a plain template per gamma.
+        """
+        return cls([
+            NodeTemplate(gamma.name.capitalize(), gamma.name)
+            for gamma in Gamma
+        ])
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'TemplateLibrary':
+        """Create library from dict.
+        Raise ValueError, if data is malformed.
+        """
+        templates = data.get('templates')
+        if not isinstance(templates, list) or not all(
+                isinstance(template, dict) for template in templates):
+            raise ValueError('Malformed templates: list of objects expected')
+        try:
+            return cls([NodeTemplate(**template) for template in templates])
+        except TypeError as e:
+            raise ValueError(f'Malformed templates: {e!r}') from e
+
+    @classmethod
+    def load(cls, path: str) -> 'TemplateLibrary':
+        """Load library from JSON file.
+        Raise ValueError, if file is not a valid library.
+        """
+        with open(path, encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Not a JSON document: {e}') from e
+        if not isinstance(data, dict):
+            raise ValueError('Malformed templates: object expected')
+        return cls.from_dict(data)
@@ -0,0 +1,167 @@
+"""Visual themes: named styles of canvas items and widgets.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.enums import Color, Gamma
+
+
+class Style:
+    """Names of styles.
+    Overlay styles are put over base ones on state changes (selection,
+    highlight), so they are applied after base styles on theme switching.
+    """
+    GRID = 'grid'
+    NODE_FRAME = 'node-frame'
+    NODE_HEAD = 'node-head'
+    NODE_DESC = 'node-desc'
+    NODE_PORT = 'node-port'
+    NODE_PORT_LABEL = 'node-port-label'
+    GROUP_FRAME = 'group-frame'
+    EDGE = 'edge'
+    EDGE_LABEL = 'edge-label'
+    BUNDLE = 'bundle'
+    BUNDLE_LABEL = 'bundle-label'
+    GUIDE = 'guide'
+    SEARCH_MATCH = 'search-match'
+    ICON_FRAME = 'icon-frame'
+    CONNECTOR_FOUND = 'connector-found'
+    CONNECTOR_NOT_FOUND = 'connector-not-found'
+    DIFF_ADDED = 'diff-added'
+    DIFF_REMOVED = 'diff-removed'
+    DIFF_MOVED = 'diff-moved'
+    DIFF_RECOLORED = 'diff-recolored'
+    DIFF_EDITED = 'diff-edited'
+    DIFF_EDGE_ADDED = 'diff-edge-added'
+    DIFF_EDGE_EDITED = 'diff-edge-edited'
+    DIFF_EDGE_REMOVED = 'diff-edge-removed'
+    DIFF_PATH = 'diff-path'
+
+    # Overlays:
+    NODE_SELECTED = 'node-selected'
+    NODE_MARKED = 'node-marked'
+    GROUP_SELECTED = 'group-selected'
+    EDGE_SELECTED = 'edge-selected'
+    ICON_SELECTED = 'icon-selected'
+
+    # Widgets:
+    WINDOW = 'window'
+    WORKSPACE = 'workspace'
+    TOOLBAR = 'toolbar'
+    PANEL = 'panel'
+
+    CANVAS_ITEMS = (
+        GRID, NODE_FRAME, NODE_HEAD, NODE_DESC, NODE_PORT, NODE_PORT_LABEL,
+        GROUP_FRAME, EDGE, EDGE_LABEL, BUNDLE, BUNDLE_LABEL, GUIDE,
+        SEARCH_MATCH, ICON_FRAME, CONNECTOR_FOUND, CONNECTOR_NOT_FOUND,
+        DIFF_ADDED, DIFF_REMOVED, DIFF_MOVED, DIFF_RECOLORED, DIFF_EDITED,
+        DIFF_EDGE_ADDED, DIFF_EDGE_EDITED, DIFF_EDGE_REMOVED, DIFF_PATH,
+    )
+    OVERLAYS = (
+        NODE_SELECTED, NODE_MARKED, GROUP_SELECTED, EDGE_SELECTED,
+        ICON_SELECTED,
+    )
+    WIDGETS = (WINDOW, WORKSPACE, TOOLBAR, PANEL)
+
+
+@dataclass
+class Theme:
+    """Options of canvas items and widgets by style name, and colors of
+    gammas by gamma name.
+    """
+    name: str
+    styles: dict[str, dict[str, Any]]
+    gammas: dict[str, Color] = field(default_factory=lambda: {
+        gamma.name: gamma.value for gamma in Gamma
+    })
+
+
+DARK = Theme(
+    name='dark',
+    styles={
+        Style.GRID: {'fill': '#505050'},
+        Style.NODE_FRAME: {'outline': 'black', 'width': 2, 'dash': ()},
+        Style.NODE_HEAD: {'fill': 'white'},
+        Style.NODE_DESC: {'fill': 'black'},
+        Style.NODE_PORT: {'fill': '#DDD'},
+        Style.NODE_PORT_LABEL: {'fill': 'black'},
+        Style.GROUP_FRAME: {'outline': 'black', 'width': 2, 'dash': (8, 4)},
+        Style.EDGE: {'fill': '#AAA', 'dash': ()},
+        Style.EDGE_LABEL: {'fill': '#DDD'},
+        Style.BUNDLE: {'fill': '#AAA'},
+        Style.BUNDLE_LABEL: {'fill': '#FFF'},
+        Style.GUIDE: {'fill': '#00C8FF'},
+        Style.SEARCH_MATCH: {'fill': '#FFD500'},
+        Style.ICON_FRAME: {'outline': 'black', 'width': 2, 'dash': ()},
+        Style.CONNECTOR_FOUND: {'fill': '#6D6'},
+        Style.CONNECTOR_NOT_FOUND: {'fill': '#A44'},
+        Style.DIFF_ADDED: {'outline': '#5D5', 'width': 3},
+        Style.DIFF_REMOVED: {'outline': '#E55', 'width': 2, 'dash': (6, 4)},
+        Style.DIFF_MOVED: {'outline': '#5AF', 'width': 3},
+        Style.DIFF_RECOLORED: {'outline': '#E5E', 'width': 3},
+        Style.DIFF_EDITED: {'outline': '#FA0', 'width': 3},
+        Style.DIFF_EDGE_ADDED: {'fill': '#5D5', 'width': 5},
+        Style.DIFF_EDGE_EDITED: {'fill': '#FA0', 'width': 5},
+        Style.DIFF_EDGE_REMOVED: {'fill': '#E55', 'width': 2, 'dash': (6, 4)},
+        Style.DIFF_PATH: {'fill': '#5AF', 'dash': (2, 4)},
+
+        Style.NODE_SELECTED: {'outline': 'cyan', 'width': 3, 'dash': (30,)},
+        Style.NODE_MARKED: {'outline': '#ADA', 'width': 3, 'dash': (30,)},
+        Style.GROUP_SELECTED: {'outline': 'cyan', 'width': 3, 'dash': (30,)},
+        Style.EDGE_SELECTED: {'fill': 'cyan', 'dash': (6, 4)},
+        Style.ICON_SELECTED: {'outline': 'white', 'width': 3, 'dash': (30,)},
+
+        Style.WINDOW: {'bg': 'green'},
+        Style.WORKSPACE: {'bg': '#3C3C3C'},
+        Style.TOOLBAR: {'bg': '#303030'},
+        Style.PANEL: {'bg': '#303030', 'fg': '#DDD'},
+    }
+)
+
+LIGHT = Theme(
+    name='light',
+    styles={
+        Style.GRID: {'fill': '#DCDCDC'},
+        Style.NODE_FRAME: {'outline': '#444', 'width': 2, 'dash': ()},
+        Style.NODE_HEAD: {'fill': 'white'},
+        Style.NODE_DESC: {'fill': '#222'},
+        Style.NODE_PORT: {'fill': 'white'},
+        Style.NODE_PORT_LABEL: {'fill': '#222'},
+        Style.GROUP_FRAME: {'outline': '#444', 'width': 2, 'dash': (8, 4)},
+        Style.EDGE: {'fill': '#777', 'dash': ()},
+        Style.EDGE_LABEL: {'fill': '#333'},
+        Style.BUNDLE: {'fill': '#777'},
+        Style.BUNDLE_LABEL: {'fill': '#222'},
+        Style.GUIDE: {'fill': '#E0407B'},
+        Style.SEARCH_MATCH: {'fill': '#FFB000'},
+        Style.ICON_FRAME: {'outline': '#444', 'width': 2, 'dash': ()},
+        Style.CONNECTOR_FOUND: {'fill': '#2A2'},
+        Style.CONNECTOR_NOT_FOUND: {'fill': '#C33'},
+        Style.DIFF_ADDED: {'outline': '#2A2', 'width': 3},
+        Style.DIFF_REMOVED: {'outline': '#C33', 'width': 2, 'dash': (6, 4)},
+        Style.DIFF_MOVED: {'outline': '#0078D7', 'width': 3},
+        Style.DIFF_RECOLORED: {'outline': '#B2B', 'width': 3},
+        Style.DIFF_EDITED: {'outline': '#D80', 'width': 3},
+        Style.DIFF_EDGE_ADDED: {'fill': '#2A2', 'width': 5},
+        Style.DIFF_EDGE_EDITED: {'fill': '#D80', 'width': 5},
+        Style.DIFF_EDGE_REMOVED: {'fill': '#C33', 'width': 2, 'dash': (6, 4)},
+        Style.DIFF_PATH: {'fill': '#0078D7', 'dash': (2, 4)},
+
+        Style.NODE_SELECTED: {'outline': '#0078D7', 'width': 3,
+                              'dash': (30,)},
+        Style.NODE_MARKED: {'outline': '#3A3', 'width': 3, 'dash': (30,)},
+        Style.GROUP_SELECTED: {'outline': '#0078D7', 'width': 3,
+                               'dash': (30,)},
+        Style.EDGE_SELECTED: {'fill': '#0078D7', 'dash': (6, 4)},
+        Style.ICON_SELECTED: {'outline': '#0078D7', 'width': 3,
+                              'dash': (30,)},
+
+        Style.WINDOW: {'bg': '#CCC'},
+        Style.WORKSPACE: {'bg': '#F4F4F4'},
+        Style.TOOLBAR: {'bg': '#E4E4E4'},
+        Style.PANEL: {'bg': '#E4E4E4', 'fg': '#222'},
+    }
+)
+
+THEMES = {theme.name: theme for theme in (DARK, LIGHT)}
@@ -0,0 +1,244 @@
+"""Spatially tiled on-disk store of big diagrams, backed by SQLite.
+
+Nodes are kept with the tile of their position, so nodes of a region
+and edges touching them are read by indexed queries, without loading
+the rest of the diagram.
+
+Build a store from a document or an importable file:
+    python -m core.tiles <input file> <output.tiles>
+"""
+
+import json
+import math
+import os
+import sqlite3
+import sys
+from dataclasses import asdict
+from typing import Iterable, Iterator, Optional
+
+from core.aliases import Box
+from core.document import Document, NodeData, EdgeData
+from core.importers import iter_batches
+
+# Tile's column and row:
+Tile = tuple[int, int]
+
+
+class TileStore:
+    """Diagram, stored by square tiles of TILE_SIZE.
+    Elements are stored as serialized JSON, with node's tile and edge's
+    ends in indexed columns.
+    """
+    TILE_SIZE = 2048
+    EXTENSION = '.tiles'
+    # Max amount of SQL variables in one query:
+    MAX_VARIABLES = 500
+
+    _SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS nodes (
+            id TEXT PRIMARY KEY, col INTEGER, row INTEGER, data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS nodes_tile ON nodes (col, row);
+        CREATE TABLE IF NOT EXISTS edges (
+            id TEXT PRIMARY KEY, source TEXT, target TEXT, data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS edges_source ON edges (source);
+        CREATE INDEX IF NOT EXISTS edges_target ON edges (target);
+    '''
+
+    def __init__(self, path: str, tile_size: int = TILE_SIZE):
+        """Open store, create it, if doesn't exist.
+        Tile size is set on creation; existing store keeps its own one.
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(self._SCHEMA)
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'tile_size'"
+        ).fetchone()
+        if row is None:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO meta VALUES ('tile_size', ?)",
+                    (str(tile_size),)
+                )
+            self._tile_size = tile_size
+        else:
+            self._tile_size = int(row[0])
+
+    @property
+    def tile_size(self) -> int:
+        """Side of tiles.
+        """
+        return self._tile_size
+
+    def __len__(self):
+        """Amount of stored nodes.
+        """
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM nodes'
+        ).fetchone()[0]
+
+    def close(self):
+        """Close store.
+        """
+        self._connection.close()
+
+    def get_tile(self, x: float, y: float) -> Tile:
+        """Get tile of the point.
+        """
+        return (
+            math.floor(x / self._tile_size),
+            math.floor(y / self._tile_size)
+        )
+
+    def get_tiles(self, box: Box) -> list[Tile]:
+        """Get tiles, intersecting the box.
+        """
+        col1, row1 = self.get_tile(box[0], box[1])
+        col2, row2 = self.get_tile(box[2], box[3])
+        return [
+            (col, row)
+            for row in range(row1, row2 + 1)
+            for col in range(col1, col2 + 1)
+        ]
+
+    def get_bounds(self) -> Optional[Box]:
+        """Get bounds of occupied tiles, None if store is empty.
+        """
+        col1, row1, col2, row2 = self._connection.execute(
+            'SELECT MIN(col), MIN(row), MAX(col), MAX(row) FROM nodes'
+        ).fetchone()
+        if col1 is None:
+            return None
+        size = self._tile_size
+        return col1 * size, row1 * size, (col2 + 1) * size, (row2 + 1) * size
+
+    # ---------------------- READING ------------------------- #
+
+    def get_tile_nodes(self, tile: Tile) -> list[NodeData]:
+        """Get nodes of the tile.
+        """
+        return [
+            NodeData(**json.loads(data))
+            for data, in self._connection.execute(
+                'SELECT data FROM nodes WHERE col = ? AND row = ?', tile
+            )
+        ]
+
+    def get_tile_edges(self, tile: Tile) -> list[EdgeData]:
+        """Get edges, starting or ending at nodes of the tile.
+        """
+        return [
+            EdgeData(**json.loads(data))
+            for data, in self._connection.execute(
+                'SELECT e.data FROM nodes n JOIN edges e ON e.source = n.id '
+                'WHERE n.col = ?1 AND n.row = ?2 '
+                'UNION '
+                'SELECT e.data FROM nodes n JOIN edges e ON e.target = n.id '
+                'WHERE n.col = ?1 AND n.row = ?2',
+                tile
+            )
+        ]
+
+    def get_nodes(self, ids: Iterable[str]) -> list[NodeData]:
+        """Get nodes by ids; absent ones are skipped.
+        """
+        nodes = []
+        for chunk in self._chunks(list(ids)):
+            nodes.extend(
+                NodeData(**json.loads(data))
+                for data, in self._connection.execute(
+                    f'SELECT data FROM nodes WHERE id IN '
+                    f'({", ".join("?" * len(chunk))})',
+                    chunk
+                )
+            )
+        return nodes
+
+    def to_document(self) -> Document:
+        """Get the whole stored diagram.
+        """
+        return Document(
+            nodes=[
+                NodeData(**json.loads(data))
+                for data, in self._connection.execute(
+                    'SELECT data FROM nodes ORDER BY rowid'
+                )
+            ],
+            edges=[
+                EdgeData(**json.loads(data))
+                for data, in self._connection.execute(
+                    'SELECT data FROM edges ORDER BY rowid'
+                )
+            ]
+        )
+
+    # ---------------------- WRITING ------------------------- #
+
+    def write(self, nodes: Iterable[NodeData] = (),
+              edges: Iterable[EdgeData] = (),
+              deleted: Iterable[str] = ()):
+        """Delete elements by ids (with edges of deleted nodes), then add
+        or replace nodes and edges, in a single transaction.
+        """
+        deleted = [(tag_id,) for tag_id in deleted]
+        with self._connection:
+            self._connection.executemany(
+                'DELETE FROM nodes WHERE id = ?', deleted
+            )
+            self._connection.executemany(
+                'DELETE FROM edges WHERE id = ?1 OR source = ?1 '
+                'OR target = ?1',
+                deleted
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?)',
+                (
+                    (node.id, *self.get_tile(node.x, node.y),
+                     json.dumps(asdict(node), ensure_ascii=False))
+                    for node in nodes
+                )
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?)',
+                (
+                    (edge.id, edge.source, edge.target,
+                     json.dumps(asdict(edge), ensure_ascii=False))
+                    for edge in edges
+                )
+            )
+
+    def add_batches(self, batches: Iterator[Document]):
+        """Add documents, f.e. import batches, see `core.importers`.
+        """
+        for batch in batches:
+            self.write(batch.nodes, batch.edges)
+
+    def _chunks(self, items: list) -> Iterator[list]:
+        """Split items into chunks, fitting one query.
+        """
+        for start in range(0, len(items), self.MAX_VARIABLES):
+            yield items[start:start + self.MAX_VARIABLES]
+
+
+def _iter_document_batches(path: str) -> Iterator[Document]:
+    """Get document or imported file as batches.
+    """
+    if path.lower().endswith('.json'):
+        yield Document.load(path)
+    else:
+        yield from iter_batches(path)
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('Usage: python -m core.tiles <input> <output.tiles>')
+    if os.path.exists(sys.argv[2]):
+        sys.exit(f'"{sys.argv[2]}" already exists')
+    store = TileStore(sys.argv[2])
+    store.add_batches(_iter_document_batches(sys.argv[1]))
+    print(f'{len(store)} nodes stored')
+    store.close()
@@ -1,11 +1,37 @@
 """Diagram editor.
 Main application.
+
+Usage:
+    python main.py [document] [--startup-benchmark]
 """
 
+import argparse
+import os
+import sqlite3
+import time
 import tkinter as tk
+from functools import partial
+from tkinter import filedialog, messagebox, simpledialog
+from typing import Callable, Optional
 
+from core.collaboration import SyncServer
+from core.diff import compare, merge
+from core.document import Document
+from core.enums import TkEvents
+from core.importers import iter_batches
+from core.journal import Journal
+from core.rules import ConnectionRules
+from core.templates import TemplateLibrary
+from core.tiles import TileStore
+from core.themes import Style, Theme, THEMES
+from ui.change_bus import ChangeBus
+from ui.collaboration import CollaborationClient
+from ui.pager import TilePager
+from ui.styles import Styles
 from ui.workspace import Workspace
 from ui.toolbar import Toolbar
+from ui.search_panel import SearchPanel
+from ui.session import SessionRecorder
 
 
 class Main:
@@ -13,21 +39,599 @@ class Main:
     """
     WINDOW_WIDTH = 1200
     WINDOW_HEIGHT = 800
+    TITLE = 'Diagram editor'
+    FILE_TYPES = (('Diagram', '*.json'), ('All files', '*'))
+    OPEN_FILE_TYPES = (
+        ('Diagram', '*.json'),
+        ('Tiled diagram', f'*{TileStore.EXTENSION}'),
+        ('All files', '*'),
+    )
+    IMPORT_FILE_TYPES = (
+        ('Graphviz DOT', '*.dot *.gv'),
+        ('GraphML', '*.graphml *.xml'),
+        ('CSV edge list', '*.csv *.tsv'),
+    )
+    RECOVERY_DIR = os.path.join(
+        os.path.expanduser('~'), '.diagram_editor', 'recovery'
+    )
+    RULES_FILE = os.path.join(
+        os.path.expanduser('~'), '.diagram_editor', 'rules.json'
+    )
+    TEMPLATES_FILE = os.path.join(
+        os.path.expanduser('~'), '.diagram_editor', 'templates.json'
+    )
+    SESSIONS_DIR = os.path.join(
+        os.path.expanduser('~'), '.diagram_editor', 'sessions'
+    )
+    # Max amount of merge conflicts, listed to user:
+    CONFLICTS_SHOWN = 20
+    # Elements, added by one Tk event loop iteration of document loading:
+    LOAD_BATCH_SIZE = 2000
 
-    def __init__(self):
-        """Init.
+    def __init__(self, path: Optional[str] = None,
+                 benchmark: bool = False):
+        """Init. Only the window with empty widgets is built here, so it's
+        shown at once; the rest of startup is done by idle callbacks, see
+        `_run_startup`. Then the document from path, if it's given, is
+        loaded.
+        If benchmark is set, times of startup phases are printed, and
+        the application is closed, when the document is loaded.
         """
+        self._started = time.perf_counter()
+        # Startup phase -> seconds since the start, when it's done:
+        self._startup_times: dict[str, float] = {}
+        self._startup_path = path
+        self._benchmark = benchmark
+
         self._root = tk.Tk()
-        self._root['bg'] = 'green'
-        self._root.title('Diagram editor')
+        self._root.configure(**Styles.get(Style.WINDOW))
+        self._root.title(self.TITLE)
         self._root.geometry(
             f'{self.WINDOW_WIDTH}x{self.WINDOW_HEIGHT}+100+100'
         )
 
         self._toolbar = Toolbar(self._root)
+        self._recorder = SessionRecorder()
         self._workspace = Workspace(
             self._root,
-            pop_selection_from_toolbar_callback=self._toolbar.pop_selected
+            pop_selection_from_toolbar_callback=self._recorder.wrap_toolbar(
+                self._toolbar.pop_selected
+            )
+        )
+        self._recorder.attach(self._workspace)
+        self._search_panel = SearchPanel(self._root, self._workspace)
+        self._document_path: Optional[str] = None
+        # Document is being loaded by batches, so the diagram is partial:
+        self._is_loading = False
+        # Pager of the opened tiled diagram, if any:
+        self._pager: Optional[TilePager] = None
+        # Extra views of the diagram, with their windows:
+        self._bus = ChangeBus(self._root)
+        self._views: dict[Workspace, tk.Toplevel] = {}
+        # Connection to the collaboration server, if any:
+        self._collaboration: Optional[CollaborationClient] = None
+        self._diff_shown = False
+
+        self._root.bind(TkEvents.SAVE, self._callback_save)
+        self._root.bind(TkEvents.OPEN, self._callback_open)
+        self._root.bind(TkEvents.IMPORT, self._callback_import)
+        self._root.bind(TkEvents.SWITCH_THEME, self._callback_switch_theme)
+        self._root.bind(TkEvents.RECORD_SESSION, self._callback_record)
+        self._root.bind(TkEvents.NEW_VIEW, self._callback_new_view)
+        self._root.bind(TkEvents.COLLABORATE, self._callback_collaborate)
+        self._root.bind(TkEvents.COMPARE, self._callback_compare)
+        self._root.bind(TkEvents.MERGE, self._callback_merge)
+        self._root.bind(TkEvents.EXPOSE, self._callback_first_paint)
+        Styles.add_listener(self._callback_theme)
+        self._root.protocol('WM_DELETE_WINDOW', self._callback_close)
+
+        # Journal is started, when the startup document is loaded:
+        self._journal = Journal(self.RECOVERY_DIR)
+        self._workspace.add_operation_listener(self._journal.record)
+        self._journaling = True
+
+        self._root.after_idle(self._run_startup, [
+            ('grid', self._workspace.draw_grid),
+            ('palette', self._load_templates),
+            ('rules', self._load_rules),
+        ])
+        self._mark_startup('window')
+
+    def _run_startup(self, phases: list[tuple[str, Callable[[], None]]]):
+        """Run the next startup phase; the rest are run at the next idle
+        times, so user's events are handled between them. After all
+        phases, the startup document is loaded. The rest are scheduled
+        before the phase, so its unexpected error doesn't stop them.
+        """
+        name, phase = phases[0]
+        if phases[1:]:
+            self._root.after_idle(self._run_startup, phases[1:])
+        else:
+            self._root.after_idle(self._finish_phases)
+        phase()
+        self._mark_startup(name)
+
+    def _finish_phases(self):
+        """All startup phases are run: load the startup document.
+        """
+        self._mark_startup('interactive')
+        self._load_startup_document()
+
+    def _mark_startup(self, phase: str):
+        """Remember the time of the startup phase.
+        """
+        if phase not in self._startup_times:
+            self._startup_times[phase] = time.perf_counter() - self._started
+
+    def _callback_first_paint(self, _: tk.Event):
+        """Callback. The window is drawn for the first time.
+        """
+        self._root.unbind(TkEvents.EXPOSE)
+        self._mark_startup('first paint')
+
+    def _load_startup_document(self):
+        """Load work of the crashed session, if user wants to recover it,
+        or the document, given on start.
+        """
+        document = self._get_recovered()
+        path = self._startup_path
+        if document:
+            self._load_document(document, None)
+        elif path and path.endswith(TileStore.EXTENSION):
+            self._open_tiled(path)
+            self._finish_startup()
+        elif not (path and self._open_document(path)):
+            self._callback_loaded(None)
+
+    def _finish_startup(self):
+        """The startup document is loaded. Report times of startup phases,
+        if startup is benchmarked.
+        """
+        if 'document' in self._startup_times:
+            return
+        self._mark_startup('document')
+        if not self._benchmark:
+            return
+        for phase, seconds in self._startup_times.items():
+            print(f'{phase:<12} {seconds * 1000:8.1f} ms')
+        self._callback_close()
+
+    def _load_templates(self):
+        """Fill the toolbar with templates from templates file, if it
+        exists, with default ones otherwise.
+        """
+        library = None
+        if os.path.exists(self.TEMPLATES_FILE):
+            try:
+                library = TemplateLibrary.load(self.TEMPLATES_FILE)
+            except (OSError, ValueError) as e:
+                messagebox.showerror(
+                    'Templates', f'Can\'t load templates:\n{e}'
+                )
+        self._toolbar.populate(library)
+
+    def _load_rules(self):
+        """Load connection rules, if rules file exists.
+        """
+        if not os.path.exists(self.RULES_FILE):
+            return
+        try:
+            self._workspace.set_rules(ConnectionRules.load(self.RULES_FILE))
+        except (OSError, ValueError) as e:
+            messagebox.showerror('Rules', f'Can\'t load rules:\n{e}')
+
+    def _get_recovered(self) -> Optional[Document]:
+        """Offer to recover work of the crashed session, if any.
+        Return recovered document, if user wants it.
+        """
+        if not Journal.has_recovery(self.RECOVERY_DIR):
+            return None
+        if not messagebox.askyesno(
+                'Recovery',
+                'Previous session was not closed properly.\n'
+                'Recover unsaved work?'):
+            return None
+        try:
+            return Journal.read(self.RECOVERY_DIR)
+        except (OSError, ValueError) as e:
+            messagebox.showerror('Recovery', f'Can\'t recover:\n{e}')
+            return None
+
+    def _callback_close(self):
+        """Callback. Main window is closed by user.
+        """
+        self._close_pager()
+        self._disconnect()
+        self._journal.close()
+        self._root.destroy()
+
+    def _callback_save(self, _: tk.Event):
+        """Callback. Save document, asking for the path at the first time.
+        """
+        if self._pager:
+            self._pager.flush()
+            return
+        if self._refuse_while_loading('Save'):
+            return
+        if not self._document_path:
+            self._document_path = filedialog.asksaveasfilename(
+                defaultextension='.json',
+                filetypes=self.FILE_TYPES
+            ) or None
+        if self._document_path:
+            self._workspace.save(self._document_path)
+
+    def _callback_open(self, _: tk.Event):
+        """Callback. Open document or tiled diagram from file.
+        """
+        path = filedialog.askopenfilename(filetypes=self.OPEN_FILE_TYPES)
+        if not path:
+            return
+        if path.endswith(TileStore.EXTENSION):
+            self._open_tiled(path)
+        else:
+            self._open_document(path)
+
+    def _open_document(self, path: str) -> bool:
+        """Open document from file.
+        Return False, if it can't be loaded.
+        """
+        try:
+            document = Document.load(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror('Open', f'Can\'t open "{path}":\n{e}')
+            return False
+        self._load_document(document, path)
+        return True
+
+    def _load_document(self, document: Document, path: Optional[str]):
+        """Replace the diagram with the document. It's loaded by batches,
+        so the window stays responsive, and the loaded part is shown.
+        """
+        self._close_pager()
+        self._close_views()
+        self._disconnect()
+        self._workspace.clear()
+        self._diff_shown = False
+        self._document_path = path
+        self._is_loading = True
+        self._set_journaling(True)
+        self._workspace.load_batches(
+            document.split(self.LOAD_BATCH_SIZE),
+            self._callback_load_progress,
+            self._callback_loaded
+        )
+
+    def _callback_load_progress(self, nodes_count: int, edges_count: int):
+        """Callback. Batch of the document is loaded.
+        """
+        self._root.title(
+            f'{self.TITLE} - loading: {nodes_count} nodes, '
+            f'{edges_count} edges'
+        )
+
+    def _callback_loaded(self, _: Optional[Exception]):
+        """Callback. Document is loaded.
+        """
+        self._is_loading = False
+        self._root.title(self.TITLE)
+        self._search_panel.reindex()
+        self._journal.start(self._workspace.get_document())
+        self._finish_startup()
+
+    def _refuse_while_loading(self, title: str) -> bool:
+        """Tell user, that the action needs the whole diagram, if it's
+        being loaded yet. Return True, if it is.
+        """
+        if self._is_loading:
+            messagebox.showinfo(
+                title, 'The document is still being loaded.'
+            )
+        return self._is_loading
+
+    def _open_tiled(self, path: str):
+        """Open tiled diagram: only its part near the viewport is loaded,
+        changes are written back to the file.
+        """
+        try:
+            store = TileStore(path)
+        except sqlite3.Error as e:
+            messagebox.showerror('Open', f'Can\'t open "{path}":\n{e}')
+            return
+        self._close_pager()
+        self._close_views()
+        self._disconnect()
+        self._workspace.clear()
+        self._diff_shown = False
+        self._document_path = None
+        self._is_loading = False
+        self._set_journaling(False)
+        self._pager = TilePager(self._root, self._workspace, store)
+        self._pager.add_load_listener(self._search_panel.add_document)
+        self._pager.add_unload_listener(self._search_panel.remove_nodes)
+        self._search_panel.reindex()
+        self._pager.start()
+
+    def _close_pager(self):
+        """Close the opened tiled diagram, if any.
+        """
+        if self._pager:
+            self._pager.close()
+            self._pager = None
+
+    def _set_journaling(self, enabled: bool):
+        """Turn recording of operations into the recovery journal on or
+        off. Tiled diagrams don't need it: their changes are written back
+        to the store.
+        """
+        if enabled == self._journaling:
+            return
+        self._journaling = enabled
+        if enabled:
+            self._workspace.add_operation_listener(self._journal.record)
+        else:
+            self._workspace.remove_operation_listener(self._journal.record)
+            self._journal.close()
+
+    def _callback_new_view(self, _: tk.Event):
+        """Callback. Open one more view of the diagram in a new window,
+        with its own scroll position. Changes are exchanged between views
+        by the change bus.
+        """
+        if self._pager:
+            messagebox.showinfo(
+                'View', 'Tiled diagram can\'t have several views.'
+            )
+            return
+        if self._refuse_while_loading('View'):
+            return
+        window = tk.Toplevel(self._root)
+        window.configure(**Styles.get(Style.WINDOW))
+        window.title(f'{self.TITLE} - view {len(self._views) + 2}')
+        window.geometry(f'{self.WINDOW_WIDTH}x{self.WINDOW_HEIGHT}')
+        view = Workspace(
+            window,
+            pop_selection_from_toolbar_callback=self._toolbar.pop_selected,
+            view_of=self._workspace
+        )
+        # Main view should have all changes of other views to be copied:
+        self._bus.flush()
+        view.add_document(self._workspace.get_document(), keep_ids=True)
+        view.set_view(*self._workspace.get_view())
+        if not self._views:
+            self._bus.attach(self._workspace)
+        self._bus.attach(view)
+        self._views[view] = window
+        window.protocol('WM_DELETE_WINDOW', partial(self._close_view, view))
+
+    def _close_view(self, view: Workspace):
+        """Close extra view of the diagram.
+        """
+        self._bus.flush()
+        self._bus.detach(view)
+        if len(self._bus.views) == 1:
+            self._bus.detach(self._workspace)
+        view.destroy()
+        self._views.pop(view).destroy()
+
+    def _close_views(self):
+        """Close all extra views, f.e. before replacing the diagram.
+        """
+        for view in list(self._views):
+            self._close_view(view)
+
+    def _callback_collaborate(self, _: tk.Event):
+        """Callback. Join the diagram of a collaboration server, or leave
+        it, if joined.
+        """
+        if self._collaboration:
+            self._disconnect()
+            return
+        if self._pager:
+            messagebox.showinfo(
+                'Collaborate', 'Tiled diagram can\'t be shared.'
+            )
+            return
+        if self._refuse_while_loading('Collaborate'):
+            return
+        address = simpledialog.askstring(
+            'Collaborate', 'Server (host:port):',
+            initialvalue=f'{SyncServer.HOST}:{SyncServer.PORT}',
+            parent=self._root
+        )
+        if not address:
+            return
+        host, _, port = address.rpartition(':')
+        if not host or not port.isdigit():
+            messagebox.showerror('Collaborate', f'Bad address "{address}"')
+            return
+        self._collaboration = CollaborationClient(
+            self._root, self._workspace,
+            self._callback_joined, self._callback_disconnected
+        )
+        self._collaboration.connect(host, int(port))
+        self._root.title(f'{self.TITLE} - connecting to {address}')
+
+    def _callback_joined(self, document: Document):
+        """Callback. Server's diagram replaces the current one.
+        """
+        self._close_views()
+        self._workspace.clear()
+        self._diff_shown = False
+        self._workspace.add_document(document, keep_ids=True)
+        self._document_path = None
+        self._search_panel.reindex()
+        self._set_journaling(True)
+        self._journal.start(document)
+        self._root.title(f'{self.TITLE} - collaborating')
+
+    def _callback_disconnected(self, error: Optional[Exception]):
+        """Callback. Connection to the server is closed by the server or
+        failed.
+        """
+        self._collaboration = None
+        self._root.title(self.TITLE)
+        if error:
+            messagebox.showerror('Collaborate', f'Disconnected:\n{error}')
+
+    def _disconnect(self):
+        """Leave the diagram of the collaboration server, if joined.
+        The diagram is kept locally.
+        """
+        if self._collaboration:
+            self._collaboration.close()
+            self._collaboration = None
+            self._root.title(self.TITLE)
+
+    def _load_version(self, title: str) -> Optional[Document]:
+        """Ask for a file with a version of the diagram and load it.
+        Return None, if it's not chosen or can't be loaded.
+        """
+        path = filedialog.askopenfilename(
+            title=title, filetypes=self.FILE_TYPES
+        )
+        if not path:
+            return None
+        try:
+            return Document.load(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror(title, f'Can\'t open "{path}":\n{e}')
+            return None
+
+    def _show_diff(self, old: Document, new: Document):
+        """Show changes of the new diagram, which is in the workspace,
+        against the old one.
+        """
+        diff = compare(old, new)
+        self._workspace.show_diff(diff)
+        self._diff_shown = True
+        counts = ', '.join(
+            f'{count} {kind}'
+            for kind, count in diff.get_counts().items() if count
+        )
+        self._root.title(f'{self.TITLE} - changes: {counts or "none"}')
+
+    def _callback_compare(self, _: tk.Event):
+        """Callback. Show changes of the diagram against its other version,
+        or hide them, if shown.
+        """
+        if self._diff_shown:
+            self._workspace.show_diff(None)
+            self._diff_shown = False
+            self._root.title(self.TITLE)
+            return
+        if self._pager:
+            messagebox.showinfo(
+                'Compare', 'Tiled diagram can\'t be compared.'
+            )
+            return
+        if self._refuse_while_loading('Compare'):
+            return
+        old = self._load_version('Compare with')
+        if old:
+            self._show_diff(old, self._workspace.get_document())
+
+    def _callback_merge(self, _: tk.Event):
+        """Callback. Merge changes of other version of the diagram, made
+        since their common base version. Merged changes are shown.
+        """
+        if self._pager or self._collaboration:
+            messagebox.showinfo(
+                'Merge', 'Tiled or shared diagram can\'t be merged.'
+            )
+            return
+        if self._refuse_while_loading('Merge'):
+            return
+        base = self._load_version('Merge: common base version')
+        if not base:
+            return
+        theirs = self._load_version('Merge: version to merge')
+        if not theirs:
+            return
+
+        ours = self._workspace.get_document()
+        result = merge(base, ours, theirs)
+        self._close_views()
+        self._workspace.clear()
+        self._workspace.add_document(result.document, keep_ids=True)
+        self._search_panel.reindex()
+        self._journal.start(result.document)
+        self._show_diff(ours, result.document)
+        if result.conflicts:
+            lines = [
+                f'{conflict.kind}: {conflict.id}'
+                for conflict in result.conflicts[:self.CONFLICTS_SHOWN]
+            ]
+            messagebox.showwarning(
+                'Merge',
+                f'{len(result.conflicts)} conflicts, resolved '
+                f'automatically:\n' + '\n'.join(lines)
+            )
+
+    def _callback_switch_theme(self, _: tk.Event):
+        """Callback. Switch to the next theme.
+        """
+        names = list(THEMES)
+        index = names.index(Styles.THEME.name)
+        Styles.set_theme(THEMES[names[(index + 1) % len(names)]])
+
+    def _callback_theme(self, _: Theme):
+        """Callback. Theme was switched.
+        """
+        self._root.configure(**Styles.get(Style.WINDOW))
+        for window in self._views.values():
+            window.configure(**Styles.get(Style.WINDOW))
+
+    def _callback_record(self, _: tk.Event):
+        """Callback. Start or stop recording of the session.
+        Stopped session is saved to the sessions directory, to be replayed
+        by `python -m ui.session`.
+        """
+        if not self._recorder.is_recording:
+            self._recorder.start()
+            self._root.title(f'{self.TITLE} - recording session')
+            return
+
+        session = self._recorder.stop()
+        self._root.title(self.TITLE)
+        path = os.path.join(
+            self.SESSIONS_DIR,
+            time.strftime('session-%Y%m%d-%H%M%S.jsonl')
+        )
+        try:
+            os.makedirs(self.SESSIONS_DIR, exist_ok=True)
+            session.save(path)
+        except OSError as e:
+            messagebox.showerror('Session', f'Can\'t save session:\n{e}')
+            return
+        messagebox.showinfo(
+            'Session',
+            f'Recorded {len(session.events)} events '
+            f'({session.duration:.1f}s) to:\n{path}'
+        )
+
+    def _callback_import(self, _: tk.Event):
+        """Callback. Import nodes and edges from DOT, GraphML or CSV file.
+        """
+        if self._refuse_while_loading('Import'):
+            return
+        path = filedialog.askopenfilename(filetypes=self.IMPORT_FILE_TYPES)
+        if not path:
+            return
+
+        def on_progress(nodes_count: int, edges_count: int):
+            self._root.title(
+                f'{self.TITLE} - importing: {nodes_count} nodes, '
+                f'{edges_count} edges'
+            )
+
+        def on_done(error: Optional[Exception]):
+            self._root.title(self.TITLE)
+            if error:
+                messagebox.showerror('Import', f'Import failed:\n{error}')
+
+        self._workspace.import_batches(
+            iter_batches(path), on_progress, on_done
         )
 
     def run(self):
@@ -39,4 +643,12 @@ class Main:
 # ---- START ---- #
 
 if __name__ == '__main__':
-    Main().run()
+    parser = argparse.ArgumentParser(prog='main.py', description=Main.TITLE)
+    parser.add_argument('document', nargs='?', help='diagram to open')
+    parser.add_argument(
+        '--startup-benchmark', action='store_true',
+        help='print times of startup phases and exit, when the document '
+             'is loaded'
+    )
+    args = parser.parse_args()
+    Main(args.document, args.startup_benchmark).run()
@@ -0,0 +1,78 @@
+"""Batched canvas items creation.
+"""
+
+import re
+import tkinter as tk
+from typing import Any, Sequence
+
+
+class CanvasBatch:
+    """Collects canvas `create_*` and other canvas commands and runs them
+    all in a single Tcl call, in their order, instead of one Python ->
+    Tcl round-trip per command.
+    """
+    _TCL_SPECIAL = re.compile(r'([\\"\[\]$\{\};])')
+
+    def __init__(self, canvas: tk.Canvas):
+        """Init.
+        """
+        self._canvas = canvas
+        self._commands: list[str] = []
+        # Positions of `create` commands among the commands:
+        self._creates: list[int] = []
+
+    def __len__(self):
+        """Amount of pending commands.
+        """
+        return len(self._commands)
+
+    @classmethod
+    def _quote(cls, value: Any) -> str:
+        """Quote value as a single Tcl word.
+        Tuples and lists are converted to Tcl lists.
+        """
+        if isinstance(value, (tuple, list)):
+            value = ' '.join(cls._quote(item) for item in value)
+        text = cls._TCL_SPECIAL.sub(r'\\\1', str(value))
+        text = text.replace('\n', '\\n').replace('\t', '\\t')
+        return f'"{text}"'
+
+    def create(self, kind: str, coords: Sequence[float], **options) -> int:
+        """Add item creation command, same as `canvas.create_<kind>`.
+        Return position of the item in the result of `flush`.
+        """
+        words = [str(self._canvas), 'create', kind]
+        words.extend(str(coord) for coord in coords)
+        self._creates.append(len(self._commands))
+        self._add(words, options)
+        return len(self._creates) - 1
+
+    def call(self, command: str, *args: Any, **options):
+        """Add other canvas command, f.e. `addtag` or `itemconfigure`,
+        same as canvas.<command>(*args, **options). Its result is not
+        returned by `flush`.
+        """
+        words = [str(self._canvas), command]
+        words.extend(self._quote(arg) for arg in args)
+        self._add(words, options)
+
+    def _add(self, words: list[str], options: dict[str, Any]):
+        """Add command of words and options.
+        """
+        for key, value in options.items():
+            words.append(f'-{key}')
+            words.append(self._quote(value))
+        self._commands.append(' '.join(words))
+
+    def flush(self) -> list[int]:
+        """Create all pending items.
+        Return list of created items ids, in order of `create` calls.
+        """
+        if not self._commands:
+            return []
+        script = 'list ' + ' '.join(f'[{cmd}]' for cmd in self._commands)
+        creates = self._creates
+        self._commands = []
+        self._creates = []
+        results = self._canvas.tk.splitlist(self._canvas.tk.eval(script))
+        return [int(results[position]) for position in creates]
@@ -0,0 +1,84 @@
+"""Change notifications between views of the same diagram.
+"""
+
+import tkinter as tk
+from functools import partial
+from typing import Callable
+
+from core.operations import Operation
+
+from ui.workspace import Workspace
+
+
+class ChangeBus:
+    """Delivers diagram operations, made in one view, to the other views.
+    Operations are collected and delivered once per frame, so a bulk
+    change (paste, import batch, deletion of selection) costs each view
+    a single `apply_operations` call, not a call per element.
+
+    Views don't share elements: nodes and edges own items of their
+    canvas, so each view keeps its own ones, made from the same data
+    under the same ids. The diagram's indexes (alignment, rules) are
+    shared: an operation updates them once, in the view, which made it.
+    """
+    FRAME_INTERVAL = 16
+
+    def __init__(self, master: tk.Misc):
+        """Init. Delivery is scheduled by master's timers.
+        """
+        self._master = master
+        self._listeners: dict[Workspace, Callable[[Operation], None]] = {}
+        # Not delivered operations, with their source views:
+        self._pending: list[tuple[Workspace, Operation]] = []
+        self._timer = ''
+        self._delivering = False
+
+    @property
+    def views(self) -> list[Workspace]:
+        """Attached views.
+        """
+        return list(self._listeners)
+
+    def attach(self, view: Workspace):
+        """Start exchanging operations of the view with other views.
+        """
+        listener = partial(self._callback_operation, view)
+        self._listeners[view] = listener
+        view.add_operation_listener(listener)
+
+    def detach(self, view: Workspace):
+        """Stop exchanging operations of the view. Its pending operations
+        are still delivered.
+        """
+        view.remove_operation_listener(self._listeners.pop(view))
+
+    def _callback_operation(self, view: Workspace, operation: Operation):
+        """Callback. Operation was made in the view.
+        Operations, applied by delivery, are not sent again.
+        """
+        if self._delivering:
+            return
+        self._pending.append((view, operation))
+        if not self._timer:
+            self._timer = self._master.after(
+                self.FRAME_INTERVAL, self.flush
+            )
+
+    def flush(self):
+        """Deliver pending operations to all views but their sources.
+        """
+        if self._timer:
+            self._master.after_cancel(self._timer)
+            self._timer = ''
+        pending, self._pending = self._pending, []
+        self._delivering = True
+        try:
+            for view in self._listeners:
+                operations = [
+                    operation for source, operation in pending
+                    if source is not view
+                ]
+                if operations:
+                    view.apply_operations(operations, indexes_updated=True)
+        finally:
+            self._delivering = False
@@ -0,0 +1,211 @@
+"""Workspace's client of the collaboration sync server.
+"""
+
+import asyncio
+import queue
+import threading
+import tkinter as tk
+from functools import partial
+from typing import Callable, Optional, Sequence
+
+from core.collaboration import PendingChanges, SyncClient
+from core.document import Document
+from core.operations import Operation
+from core.registry import Registry
+
+from ui.elements.node import Node
+from ui.workspace import Workspace
+
+
+class CollaborationClient:
+    """Connects the workspace to the sync server, see `core.collaboration`.
+
+    The connection runs its asyncio loop in a background thread. Received
+    operations are passed to the UI thread through a queue, polled every
+    POLL_INTERVAL, and applied to the workspace by a single call.
+    Local operations are sent every SEND_INTERVAL. Moves of a node,
+    including intermediate ones of dragging, are coalesced, so dragging
+    sends at most a move per node per interval.
+    """
+    POLL_INTERVAL = 16
+    SEND_INTERVAL = 50
+    CLOSE_TIMEOUT = 1.0
+
+    def __init__(self, master: tk.Misc, workspace: Workspace,
+                 on_joined: Callable[[Document], None],
+                 on_closed: Callable[[Optional[Exception]], None]):
+        """Init. Messages are handled by master's timers.
+        on_joined gets the server's diagram, which should replace
+        the workspace content. on_closed gets None or the connection
+        error, when connection is closed by the server or fails.
+        """
+        self._master = master
+        self._workspace = workspace
+        self._on_joined = on_joined
+        self._on_closed = on_closed
+
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[SyncClient] = None
+        # Calls from the connection's thread, made in the UI thread:
+        self._incoming: queue.SimpleQueue[Callable[[], None]] = \
+            queue.SimpleQueue()
+        # Received operations, not applied yet:
+        self._received: list[Operation] = []
+        self._pending = PendingChanges()
+        self._is_joined = False
+        self._is_applying = False
+        self._poll_timer = ''
+        self._send_timer = ''
+
+    @property
+    def is_joined(self) -> bool:
+        """Has the workspace joined the server's diagram.
+        """
+        return self._is_joined
+
+    def connect(self, host: str, port: int):
+        """Start connecting to the server.
+        """
+        self._thread = threading.Thread(
+            target=self._run, args=(host, port), daemon=True
+        )
+        self._thread.start()
+        self._poll()
+
+    def close(self):
+        """Send pending operations and disconnect.
+        """
+        if self._is_joined:
+            self._send()
+        self._stop()
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._client.close)
+        self._thread.join(self.CLOSE_TIMEOUT)
+
+    def _stop(self):
+        """Stop handling operations.
+        """
+        if self._poll_timer:
+            self._master.after_cancel(self._poll_timer)
+        if self._send_timer:
+            self._master.after_cancel(self._send_timer)
+        if self._is_joined:
+            self._workspace.remove_operation_listener(
+                self._callback_operation
+            )
+            self._workspace.remove_drag_listener(self._callback_drag)
+            Registry.set_id_slot(0, 1)
+        self._is_joined = False
+
+    # ---------------------- CONNECTION THREAD ------------------------- #
+
+    def _run(self, host: str, port: int):
+        """Run connection's loop. Works in the background thread.
+        """
+        try:
+            asyncio.run(self._communicate(host, port))
+        except (OSError, ValueError) as e:
+            self._incoming.put(partial(self._close_by_server, e))
+        else:
+            self._incoming.put(partial(self._close_by_server, None))
+
+    async def _communicate(self, host: str, port: int):
+        """Join the server's diagram, receive operations.
+        """
+        self._client = SyncClient(
+            lambda operations: self._incoming.put(
+                partial(self._receive, operations)
+            ),
+            lambda rejected, _: self._incoming.put(
+                partial(self._acknowledge, rejected)
+            )
+        )
+        document = await self._client.connect(host, port)
+        self._loop = asyncio.get_running_loop()
+        self._incoming.put(partial(self._join, document))
+        await self._client.receive()
+
+    # ---------------------- UI THREAD ------------------------- #
+
+    def _poll(self):
+        """Handle messages of the connection; apply received operations
+        by a single call.
+        """
+        while not self._incoming.empty():
+            self._incoming.get()()
+        if self._received:
+            self._apply()
+        if self._thread.is_alive() or not self._incoming.empty():
+            self._poll_timer = self._master.after(
+                self.POLL_INTERVAL, self._poll
+            )
+
+    def _join(self, document: Document):
+        """Server has sent its diagram.
+        """
+        Registry.set_id_slot(self._client.slot, self._client.id_stride)
+        self._on_joined(document)
+        self._workspace.add_operation_listener(self._callback_operation)
+        self._workspace.add_drag_listener(self._callback_drag)
+        self._is_joined = True
+        self._send_periodically()
+
+    def _receive(self, operations: list[Operation]):
+        """Remote operations arrived.
+        """
+        self._received.extend(self._pending.filter(operations))
+
+    def _acknowledge(self, rejected: list[str]):
+        """Local batch was acknowledged; rejected elements are deleted.
+        """
+        self._pending.acknowledge()
+        self._received.extend(
+            Operation.delete(tag_id) for tag_id in rejected
+        )
+
+    def _close_by_server(self, error: Optional[Exception]):
+        """Connection is closed or failed.
+        """
+        if self._received:
+            self._apply()
+        self._stop()
+        self._on_closed(error)
+
+    def _apply(self):
+        """Apply received operations to the workspace; they are not sent
+        back.
+        """
+        operations, self._received = self._received, []
+        self._is_applying = True
+        try:
+            self._workspace.apply_operations(operations)
+        finally:
+            self._is_applying = False
+
+    def _callback_operation(self, operation: Operation):
+        """Callback. Diagram was changed.
+        """
+        if not self._is_applying:
+            self._pending.add(operation)
+
+    def _callback_drag(self, nodes: Sequence[Node]):
+        """Callback. Nodes are being dragged.
+        """
+        for node in nodes:
+            self._pending.add(Operation.move(node.tag_id, *node.position))
+
+    def _send_periodically(self):
+        """Send queued operations by timer.
+        """
+        self._send()
+        self._send_timer = self._master.after(
+            self.SEND_INTERVAL, self._send_periodically
+        )
+
+    def _send(self):
+        """Send queued operations as a batch.
+        """
+        operations = self._pending.pop_batch()
+        if operations:
+            self._loop.call_soon_threadsafe(self._client.send, operations)
@@ -0,0 +1,235 @@
+"""Edge bundling for high-degree nodes.
+"""
+
+import tkinter as tk
+from typing import Callable, Iterable
+
+from core.bundling import cluster_by_direction, get_split_point
+from core.themes import Style
+
+from ui.batch import CanvasBatch
+from ui.elements.node import Node
+from ui.elements.directed_edge import DirectedEdge
+from ui.styles import Styles
+
+
+class EdgeBundler:
+    """Draws edges of hub nodes (nodes with many edges) as bundles.
+
+    Hub's edges with similar direction are hidden and drawn as one bundle:
+    a trunk from the hub to the split point, a fan from the split point
+    to the far ends (single polyline), and a label with amount of edges.
+    So, three canvas items stand for the whole bundle.
+
+    Edge, connecting two hubs, is bundled by its source.
+    Items of hub's bundled edges (with their labels) are tagged by
+    the hub, so they are hidden and shown by a single canvas call, and
+    rebuilding of hub's bundles takes a single Tcl call.
+    """
+    HUB_DEGREE = 8
+    SECTORS = 12
+    MIN_BUNDLE_SIZE = 3
+    TRUNK_RATIO = 0.4
+    MAX_TRUNK_WIDTH = 12
+
+    TAG_BUNDLE = 'edge-bundle'
+    TAG_BUNDLED = 'bundled-edge'
+
+    def __init__(self, canvas: tk.Canvas,
+                 get_nodes: Callable[[], Iterable[Node]]):
+        """Init.
+        """
+        self._canvas = canvas
+        self._get_nodes = get_nodes
+        self._enabled = False
+        self._rebuild_scheduled = False
+
+        self._hubs: set[Node] = set()
+        # Bundled edge -> hub, which owns its bundle:
+        self._edge_hub: dict[DirectedEdge, Node] = {}
+        # Hub -> its bundled edges:
+        self._hub_edges: dict[Node, list[DirectedEdge]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Is bundling mode on.
+        """
+        return self._enabled
+
+    def get_bundled_tags(self, edge: DirectedEdge) -> tuple[str, ...]:
+        """Get tags of items of edge, hidden in a bundle, f.e. of its
+        label, created later. Empty, if edge is not bundled.
+        """
+        hub = self._edge_hub.get(edge)
+        if hub is None:
+            return ()
+        return self.TAG_BUNDLED, self._get_bundled_tag(hub)
+
+    def toggle(self):
+        """Turn bundling mode on/off.
+        """
+        self._enabled = not self._enabled
+        if self._enabled:
+            self.rebuild()
+        else:
+            self._clear()
+
+    def schedule_rebuild(self):
+        """Rebuild all bundles, when Tk is idle.
+        Several calls before that lead to a single rebuild.
+        """
+        if self._enabled and not self._rebuild_scheduled:
+            self._rebuild_scheduled = True
+            self._canvas.after_idle(self.rebuild)
+
+    def rebuild(self):
+        """Find hubs and rebuild all bundles.
+        """
+        self._rebuild_scheduled = False
+        if not self._enabled:
+            return
+        self._clear()
+        self._hubs = {
+            node for node in self._get_nodes()
+            if len(node.input_connectors) + len(node.output_connectors)
+            >= self.HUB_DEGREE
+        }
+        for hub in self._hubs:
+            self._bundle_hub(hub)
+
+    def nodes_moved(self, nodes: Iterable[Node]):
+        """Rebuild bundles, affected by moving of nodes: bundles of moved
+        hubs, and bundles, containing edges of moved nodes.
+        """
+        if not self._enabled:
+            return
+        dirty = set()
+        for node in nodes:
+            if node in self._hubs:
+                dirty.add(node)
+            for edge in node.input_connectors + node.output_connectors:
+                hub = self._edge_hub.get(edge)
+                if hub:
+                    dirty.add(hub)
+        for hub in dirty:
+            self._bundle_hub(hub)
+
+    def _clear(self):
+        """Remove all bundles, show bundled edges.
+        """
+        batch = CanvasBatch(self._canvas)
+        batch.call('delete', self.TAG_BUNDLE)
+        batch.call('itemconfigure', self.TAG_BUNDLED, state=tk.NORMAL)
+        batch.call('dtag', self.TAG_BUNDLED, self.TAG_BUNDLED)
+        for hub in self._hub_edges:
+            tag = self._get_bundled_tag(hub)
+            batch.call('dtag', tag, tag)
+        batch.flush()
+        self._hubs = set()
+        self._edge_hub = {}
+        self._hub_edges = {}
+
+    def _unbundle_hub(self, batch: CanvasBatch, hub: Node):
+        """Add removal of hub's bundles and showing of its edges to
+        the batch.
+        """
+        batch.call('delete', self._get_hub_tag(hub))
+        edges = self._hub_edges.pop(hub, None)
+        if not edges:
+            return
+        for edge in edges:
+            del self._edge_hub[edge]
+        tag = self._get_bundled_tag(hub)
+        batch.call('itemconfigure', tag, state=tk.NORMAL)
+        batch.call('dtag', tag, self.TAG_BUNDLED)
+        batch.call('dtag', tag, tag)
+
+    def _bundle_hub(self, hub: Node):
+        """(Re)build bundles of the hub by a single Tcl call.
+        """
+        batch = CanvasBatch(self._canvas)
+        self._unbundle_hub(batch, hub)
+        out_point = hub.get_output_point()
+        in_point = hub.get_input_point()
+
+        outgoing = [
+            (edge, edge.target.get_input_point())
+            for edge in hub.output_connectors
+        ]
+        # Edges from other hubs are bundled by their sources:
+        incoming = [
+            (edge, edge.source.get_output_point())
+            for edge in hub.input_connectors
+            if edge.source not in self._hubs
+        ]
+
+        bundled = []
+        for origin, ends, is_outgoing in (
+                (out_point, outgoing, True),
+                (in_point, incoming, False)):
+            far_ends = dict(ends)
+            for edges in cluster_by_direction(
+                    origin, ends, self.SECTORS, self.MIN_BUNDLE_SIZE):
+                self._draw_bundle(
+                    batch, hub, origin,
+                    [far_ends[edge] for edge in edges],
+                    is_outgoing
+                )
+                bundled.extend(edges)
+
+        if bundled:
+            tag = self._get_bundled_tag(hub)
+            for edge in bundled:
+                self._edge_hub[edge] = hub
+                batch.call('addtag', tag, 'withtag', edge.tag_id)
+            batch.call('addtag', self.TAG_BUNDLED, 'withtag', tag)
+            batch.call('itemconfigure', tag, state=tk.HIDDEN)
+            self._hub_edges[hub] = bundled
+        batch.flush()
+
+    def _draw_bundle(self, batch: CanvasBatch, hub: Node, origin, ends,
+                     is_outgoing: bool):
+        """Add bundle's items to batch: trunk, fan and label.
+        """
+        split_x, split_y = get_split_point(origin, ends, self.TRUNK_RATIO)
+        tags = (self.TAG_BUNDLE, self._get_hub_tag(hub))
+        line_tags = tags + (Styles.tag(Style.BUNDLE),)
+
+        fan = []
+        for x, y in ends:
+            fan.extend((split_x, split_y, x, y))
+        batch.create(
+            'line', fan, **Styles.get(Style.BUNDLE), width=1, tags=line_tags
+        )
+
+        trunk = (*origin, split_x, split_y) if is_outgoing \
+            else (split_x, split_y, *origin)
+        batch.create(
+            'line',
+            trunk,
+            **Styles.get(Style.BUNDLE),
+            width=min(len(ends), self.MAX_TRUNK_WIDTH),
+            arrow=tk.LAST,
+            arrowshape=(12, 15, 5),
+            tags=line_tags
+        )
+        batch.create(
+            'text',
+            (split_x, split_y - 12),
+            **Styles.get(Style.BUNDLE_LABEL),
+            text=str(len(ends)),
+            font=('Verdana', '10', 'bold'),
+            tags=tags + (Styles.tag(Style.BUNDLE_LABEL),)
+        )
+
+    @staticmethod
+    def _get_hub_tag(hub: Node) -> str:
+        """Get tag of hub's bundles items.
+        """
+        return f'bundle-of-{hub.tag_id}'
+
+    @staticmethod
+    def _get_bundled_tag(hub: Node) -> str:
+        """Get tag of items of hub's bundled edges.
+        """
+        return f'bundled-by-{hub.tag_id}'
@@ -0,0 +1,308 @@
+"""Lazy, collision-aware placement of edge labels.
+"""
+
+import tkinter as tk
+from typing import Callable, Iterable, Optional
+
+from core.aliases import Box
+from core.labels import GridIndex, overlap, place_label
+from core.registry import Registry
+from core.themes import Style
+
+from ui.batch import CanvasBatch
+from ui.edge_bundler import EdgeBundler
+from ui.elements.directed_edge import DirectedEdge
+from ui.styles import Styles
+
+
+class EdgeLabeler:
+    """Draws labels of edges at the middle points of their curves.
+
+    Labels are placed lazily, when Tk is idle, and only in the visible
+    area with VIEW_MARGIN around it. A label is placed again only, when
+    its edge is moved or relabelled, or scrolled into view. Each label
+    takes the first free of candidate places around its point, see
+    `core.labels`; a label without a free place is not drawn, and is
+    tried again, after some label near it frees its place.
+
+    Label items are tagged by ids of their edges, so they are deleted
+    and bundled (hidden) together with edges.
+    """
+    POLL_INTERVAL = 200
+    VIEW_MARGIN = 256
+    FONT = ('Verdana', '9')
+    # Estimated size of label's characters: labels are placed without
+    # measuring their items:
+    CHAR_WIDTH = 7
+    LINE_HEIGHT = 14
+    PADDING = 2
+    # Not placed labels with points that close to a freed place are
+    # retried, when places stop changing for RETRY_DELAY (so not on every
+    # step of dragging):
+    RETRY_DISTANCE = 64
+    RETRY_DELAY = 150
+    # Cell of index of label points, larger than of label boxes, as
+    # points are looked up by the whole view:
+    POINTS_CELL_SIZE = 512
+
+    TAG_LABEL = 'edge-label'
+
+    def __init__(self, canvas: tk.Canvas,
+                 get_visible_box: Callable[[], Box], bundler: EdgeBundler):
+        """Init. Labels of bundled edges are hidden with their edges.
+        """
+        self._canvas = canvas
+        self._get_visible_box = get_visible_box
+        self._bundler = bundler
+
+        # Points of labelled edges:
+        self._points = GridIndex(self.POINTS_CELL_SIZE)
+        # Boxes, canvas items and texts of drawn labels:
+        self._boxes = GridIndex()
+        self._items: dict[DirectedEdge, tuple[int, str]] = {}
+        # Edges in view, which labels have no free place:
+        self._unplaced: dict[DirectedEdge, None] = {}
+        # Places, freed by moved labels since the last retry, with
+        # RETRY_DISTANCE around; a label's freed places are united:
+        self._freed: dict[DirectedEdge, Box] = {}
+        # Edges to place labels of, in order of their changes:
+        self._dirty: dict[DirectedEdge, None] = {}
+        # Visible area with margin, where labels are drawn:
+        self._view: Optional[Box] = None
+        self._placed_view: Optional[Box] = None
+
+        self._poll_timer = ''
+        self._update_timer = ''
+        self._retry_timer = ''
+
+    @property
+    def drawn_count(self) -> int:
+        """Amount of drawn labels.
+        """
+        return len(self._items)
+
+    def start(self):
+        """Start following the viewport.
+        """
+        self._poll()
+
+    def stop(self):
+        """Stop following the viewport and updating labels.
+        """
+        for timer in (self._poll_timer, self._update_timer,
+                      self._retry_timer):
+            if timer:
+                self._canvas.after_cancel(timer)
+        self._poll_timer = self._update_timer = self._retry_timer = ''
+
+    def add(self, edges: Iterable[DirectedEdge]):
+        """Follow changes of new edges, place their labels.
+        """
+        # One bound method for all edges, not one per edge:
+        listener = self._callback_edge
+        for edge in edges:
+            edge.set_listener(listener)
+            if edge.label:
+                self._dirty[edge] = None
+        self._schedule_update()
+
+    def remove(self, edges: Iterable[DirectedEdge]):
+        """Forget removed edges; their label items are deleted by their
+        tags along with edges.
+        """
+        for edge in edges:
+            self._dirty.pop(edge, None)
+            self._points.remove(edge)
+            self._boxes.remove(edge)
+            self._items.pop(edge, None)
+            self._unplaced.pop(edge, None)
+
+    def clear(self):
+        """Delete all labels, forget all edges.
+        """
+        self._canvas.delete(self.TAG_LABEL)
+        self._points.clear()
+        self._boxes.clear()
+        self._items.clear()
+        self._unplaced.clear()
+        self._freed.clear()
+        self._dirty.clear()
+
+    def _callback_edge(self, edge: DirectedEdge):
+        """Callback. Edge was moved, relabelled or deleted.
+        """
+        if edge.label or edge in self._points:
+            self._dirty[edge] = None
+            self._schedule_update()
+
+    def _poll(self):
+        """Update labels, if the viewport was changed.
+        """
+        x1, y1, x2, y2 = self._get_visible_box()
+        margin = self.VIEW_MARGIN
+        view = x1 - margin, y1 - margin, x2 + margin, y2 + margin
+        if view != self._view:
+            self._view = view
+            self._schedule_update()
+        self._poll_timer = self._canvas.after(self.POLL_INTERVAL, self._poll)
+
+    def _schedule_update(self):
+        """Update labels, when Tk is idle.
+        Several calls before that lead to a single update.
+        """
+        if not self._update_timer:
+            self._update_timer = self._canvas.after_idle(self.update)
+
+    def _is_deleted(self, edge: DirectedEdge) -> bool:
+        """Was edge deleted from the canvas.
+        """
+        return not Registry.contains(edge.tag_id, self._canvas) \
+            or Registry.get(edge.tag_id, self._canvas) is not edge
+
+    def update(self):
+        """Place labels of changed edges and of edges, scrolled into view;
+        delete labels, scrolled out of view.
+        """
+        self._update_timer = ''
+        dirty, self._dirty = self._dirty, {}
+        is_freed = False
+        for edge in dirty:
+            box = self._boxes.get(edge)
+            if box:
+                self._free(edge, box)
+                self._boxes.remove(edge)
+                is_freed = True
+            if edge.label and not self._is_deleted(edge):
+                x, y = edge.get_label_point()
+                self._points.add(edge, (x, y, x, y))
+            else:
+                self._points.remove(edge)
+                self._delete_item(edge)
+
+        view = self._view
+        if view is None:
+            return
+        placing = {}
+        for edge in dirty:
+            point = self._points.get(edge)
+            if point is None or not overlap(point, view):
+                self._delete_item(edge)
+                self._unplaced.pop(edge, None)
+            elif edge in self._unplaced:
+                # Label had no place, and likely still has none: it's
+                # retried later, with labels near freed places.
+                self._free(edge, point)
+                is_freed = True
+            else:
+                placing[edge] = None
+
+        if view != self._placed_view:
+            self._placed_view = view
+            for edge in list(self._items):
+                if not overlap(self._points.get(edge), view):
+                    self._boxes.remove(edge)
+                    self._delete_item(edge)
+            placing.update(dict.fromkeys(
+                edge for edge in self._points.find(view)
+                if edge not in self._boxes
+            ))
+            self._unplaced.clear()
+        self._place(placing)
+
+        if is_freed:
+            # Postpone retrying, while places are changing:
+            if self._retry_timer:
+                self._canvas.after_cancel(self._retry_timer)
+            self._retry_timer = self._canvas.after(
+                self.RETRY_DELAY, self._retry
+            )
+
+    def _free(self, edge: DirectedEdge, box: Box):
+        """Remember the place, freed by edge's label, or the new point
+        of not placed label, to retry labels near it.
+        """
+        distance = self.RETRY_DISTANCE
+        x1, y1, x2, y2 = box
+        x1, y1, x2, y2 = x1 - distance, y1 - distance, \
+            x2 + distance, y2 + distance
+        previous = self._freed.get(edge)
+        if previous:
+            x1, y1 = min(x1, previous[0]), min(y1, previous[1])
+            x2, y2 = max(x2, previous[2]), max(y2, previous[3])
+        self._freed[edge] = x1, y1, x2, y2
+
+    def _retry(self):
+        """Place not placed labels near freed places.
+        """
+        self._retry_timer = ''
+        freed = GridIndex(self.POINTS_CELL_SIZE)
+        for edge, box in self._freed.items():
+            freed.add(edge, box)
+        self._freed.clear()
+        self._place([
+            edge for edge in self._unplaced
+            if not freed.is_free(self._points.get(edge))
+        ])
+
+    def _place(self, edges: Iterable[DirectedEdge]):
+        """Place labels of edges in their order, draw placed ones, delete
+        ones without a free place. New labels are created by a single
+        canvas call.
+        """
+        batch = CanvasBatch(self._canvas)
+        created = []
+        for edge in edges:
+            x, y, _, _ = self._points.get(edge)
+            label = edge.label
+            box = place_label(
+                (x, y),
+                len(label) * self.CHAR_WIDTH + 2 * self.PADDING,
+                self.LINE_HEIGHT + 2 * self.PADDING,
+                self._boxes
+            )
+            if box is None:
+                self._delete_item(edge)
+                self._unplaced[edge] = None
+                continue
+            self._unplaced.pop(edge, None)
+            self._boxes.add(edge, box)
+            x, y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            if edge not in self._items:
+                self._draw(batch, edge, x, y)
+                created.append(edge)
+                continue
+            item, text = self._items[edge]
+            self._canvas.coords(item, x, y)
+            if text != label:
+                self._canvas.itemconfigure(item, text=label)
+                self._items[edge] = item, label
+        for edge, item in zip(created, batch.flush()):
+            self._items[edge] = item, edge.label
+
+    def _draw(self, batch: CanvasBatch, edge: DirectedEdge,
+              x: float, y: float):
+        """Add creation of edge's label item at (x, y) to the batch.
+        Label of a bundled edge is hidden, like the edge.
+        """
+        tags = (self.TAG_LABEL, edge.tag_id, Styles.tag(Style.EDGE_LABEL))
+        state = tk.NORMAL
+        bundled_tags = self._bundler.get_bundled_tags(edge)
+        if bundled_tags:
+            tags += bundled_tags
+            state = tk.HIDDEN
+        batch.create(
+            'text',
+            (x, y),
+            **Styles.get(Style.EDGE_LABEL),
+            text=edge.label,
+            font=self.FONT,
+            state=state,
+            tags=tags
+        )
+
+    def _delete_item(self, edge: DirectedEdge):
+        """Delete item of edge's label, if it's drawn.
+        """
+        item = self._items.pop(edge, None)
+        if item:
+            self._canvas.delete(item[0])
@@ -1,48 +1,154 @@
 """Base Connector realization, DirectedEdge.
 """
 
+import sys
 import tkinter as tk
+from typing import Callable, Optional, Sequence
 
-from core.aliases import BezierCoords
+from core.aliases import BezierCoords, Coords, ItemSpec
+from core.document import EdgeData
 from core.interfaces import Connector, Connectible, Selectable, Removable
 from core.enums import Ability
 from core.registry import Registry
+from core.themes import Style
+
+from ui.batch import CanvasBatch
+from ui.styles import Styles
 
 
 class DirectedEdge(Connector, Selectable, Removable):
     """Base Connector realization.
     Directed arrow, from target to source.
+    Like nodes, edges are compact: they have slots, interned names, and
+    no copies of their end points, which are got from their ends.
     """
+    __slots__ = (
+        '_canvas', '_source', '_target', '_source_port', '_target_port',
+        '_label', '_listener', '_id', '_line',
+    )
+
     LINE_WIDTH = 3
-    COLOR = '#AAA'
 
     def __init__(self, canvas: tk.Canvas, source: Connectible,
-                 target: Connectible):
+                 target: Connectible, tag_id: Optional[str] = None,
+                 source_port: str = '', target_port: str = '',
+                 label: str = ''):
         """Init.
+        Edge goes from source's output port to target's input port.
+        Label is not drawn by the edge, see `ui.edge_labeler`.
+        """
+        self._init_state(
+            canvas, source, target, source_port, target_port, label
+        )
+        self._id = Registry.add(self, tag_id, canvas)
+
+        kind, coords, options = self._get_item_spec()
+        self._line = canvas.create_line(*coords, **options)
+        self._connect()
+
+    @classmethod
+    def create_many(cls, canvas: tk.Canvas,
+                    pairs: Sequence[tuple[Connectible, Connectible]],
+                    tag_ids: Optional[Sequence[str]] = None,
+                    ports: Optional[Sequence[tuple[str, str]]] = None,
+                    labels: Optional[Sequence[str]] = None
+                    ) -> list['DirectedEdge']:
+        """Batched creation of edges between (source, target) pairs.
+        Registers all edges at once and creates their lines in a single
+        Tcl call.
+        If tag_ids are given, edges get them instead of new ones.
+        If ports are given, edges connect (source port, target port)
+        of the pairs, otherwise default ports. Labels are optional too.
+        """
+        edges = []
+        for n, (source, target) in enumerate(pairs):
+            edge = cls.__new__(cls)
+            source_port, target_port = ports[n] if ports else ('', '')
+            edge._init_state(
+                canvas, source, target, source_port, target_port,
+                labels[n] if labels else ''
+            )
+            edges.append(edge)
+
+        if tag_ids is None:
+            tag_ids = Registry.add_many(edges, canvas)
+        else:
+            tag_ids = [
+                Registry.add(e, t, canvas) for e, t in zip(edges, tag_ids)
+            ]
+
+        batch = CanvasBatch(canvas)
+        for edge, tag_id in zip(edges, tag_ids):
+            edge._id = tag_id
+            kind, coords, options = edge._get_item_spec()
+            batch.create(kind, coords, **options)
+
+        for edge, line in zip(edges, batch.flush()):
+            edge._line = line
+            edge._connect()
+        return edges
+
+    def _init_state(self, canvas: tk.Canvas, source: Connectible,
+                    target: Connectible, source_port: str = '',
+                    target_port: str = '', label: str = ''):
+        """Init edge's state, except of canvas item.
         """
-        self._id = Registry.add(self)
         self._canvas = canvas
         self._source = source
         self._target = target
+        self._source_port = sys.intern(source_port)
+        self._target_port = sys.intern(target_port)
+        self._label = sys.intern(label)
+        self._listener: Optional[Callable[['DirectedEdge'], None]] = None
 
-        connector_tags = (Ability.SELECT, self._id)
-
-        x1, y1 = source.get_output_point()
-        x2, y2 = target.get_input_point()
+    def _get_curve(self) -> BezierCoords:
+        """Get coords of edge's curve by the current points of its ends.
+        """
+        return self._get_bezier_coords(
+            *self._source.get_output_point(self._source_port),
+            *self._target.get_input_point(self._target_port)
+        )
 
-        self._line = canvas.create_line(
-            *self._get_bezier_coords(x1, y1, x2, y2),
-            fill=self.COLOR,
-            width=self.LINE_WIDTH,
-            splinesteps=64,
-            tags=connector_tags,
-            arrow=tk.LAST,
-            arrowshape=(12, 15, 5),
-            smooth=True,
+    def _get_item_spec(self) -> ItemSpec:
+        """Get spec of edge's line: kind, coords and options.
+        """
+        return (
+            'line',
+            self._get_curve(),
+            dict(
+                **Styles.get(Style.EDGE),
+                width=self.LINE_WIDTH,
+                splinesteps=64,
+                tags=(Ability.SELECT, self._id, Styles.tag(Style.EDGE)),
+                arrow=tk.LAST,
+                arrowshape=(12, 15, 5),
+                smooth=True,
+            )
         )
 
-        source.add_output_connector(self)
-        target.add_input_connector(self)
+    def _connect(self):
+        """Register edge in its source and target.
+        """
+        self._source.add_output_connector(self)
+        self._target.add_input_connector(self)
+
+    @property
+    def tag_id(self) -> str:
+        """Edge's registry tag_id.
+        """
+        return self._id
+
+    def to_data(self) -> EdgeData:
+        """Get serialized edge.
+        """
+        return EdgeData(
+            id=self._id,
+            source=self._source.tag_id,
+            target=self._target.tag_id,
+            source_port=self._source_port,
+            target_port=self._target_port,
+            label=self._label,
+        )
 
     @staticmethod
     def _get_bezier_coords(x1: int, y1: int, x2: int, y2: int) -> BezierCoords:
@@ -58,6 +164,39 @@ class DirectedEdge(Connector, Selectable, Removable):
             x2, y2
         )
 
+    def get_label_point(self) -> Coords:
+        """Get the middle point of the drawn curve, where label is placed.
+        Smoothed line of 4 points passes through the middle of its inner
+        segment.
+        """
+        _, _, x1, y1, x2, y2, _, _ = self._get_curve()
+        return (x1 + x2) / 2, (y1 + y2) / 2
+
+    @property
+    def label(self) -> str:
+        """Edge's label, empty if there is no label.
+        """
+        return self._label
+
+    def set_label(self, label: str):
+        """Change edge's label.
+        """
+        self._label = sys.intern(label)
+        self._notify()
+
+    def set_listener(self,
+                     listener: Optional[Callable[['DirectedEdge'], None]]):
+        """Set listener of edge's changes, which affect its label: moving
+        of the line, label changing and deletion. None removes listener.
+        """
+        self._listener = listener
+
+    def _notify(self):
+        """Notify listener, if any, about edge's change.
+        """
+        if self._listener:
+            self._listener(self)
+
     def __repr__(self):
         """Simple representation.
         """
@@ -71,41 +210,55 @@ class DirectedEdge(Connector, Selectable, Removable):
         """
         return self._source
 
+    @property
+    def target(self):
+        """Target of connector.
+        """
+        return self._target
+
+    @property
+    def source_port(self) -> str:
+        """Name of source's output port.
+        """
+        return self._source_port
+
+    @property
+    def target_port(self) -> str:
+        """Name of target's input port.
+        """
+        return self._target_port
+
     def move_target_point(self, delta_x: int, delta_y: int):
-        """Move connector's target point.
+        """Move connector's target point, which has been moved with
+        the target.
         """
-        x1, y1, *_, x2, y2 = self._canvas.coords(self._id)
-        x2 += delta_x
-        y2 += delta_y
-        self._canvas.coords(self._id, *self._get_bezier_coords(x1, y1, x2, y2))
+        self._update_line()
 
     def move_source_point(self, delta_x: int, delta_y: int):
-        """Move connector's source point.
+        """Move connector's source point, which has been moved with
+        the source.
         """
-        x1, y1, *_, x2, y2 = self._canvas.coords(self._id)
-        x1 += delta_x
-        y1 += delta_y
-        self._canvas.coords(self._id, *self._get_bezier_coords(x1, y1, x2, y2))
+        self._update_line()
+
+    def _update_line(self):
+        """Redraw line by current endpoints.
+        """
+        self._canvas.coords(self._line, *self._get_curve())
+        self._notify()
 
     # ---------------------- SELECTABLE ------------------------- #
 
     def draw_selection(self):
         """Put selection focus to the node.
         """
-        self._canvas.itemconfigure(
-            self._line,
-            fill='cyan',
-            dash=(6, 4)
-        )
+        Styles.put_overlay(self._canvas, self._line, Style.EDGE_SELECTED)
         self._canvas.tag_raise(self._id)
 
     def clear_selection(self):
         """Remove selection focus from the node.
         """
-        self._canvas.itemconfigure(
-            self._line,
-            fill=self.COLOR,
-            dash=()
+        Styles.remove_overlay(
+            self._canvas, self._line, Style.EDGE_SELECTED, Style.EDGE
         )
 
     # ---------------------- REMOVABLE ------------------------- #
@@ -116,4 +269,5 @@ class DirectedEdge(Connector, Selectable, Removable):
         self._source.remove_output_connector(self)
         self._target.remove_input_connector(self)
         self._canvas.delete(self._id)
-        Registry.delete(self._id)
+        Registry.delete(self._id, self._canvas)
+        self._notify()
@@ -0,0 +1,126 @@
+"""Collapsed group of nodes.
+"""
+
+import tkinter as tk
+from dataclasses import replace
+from typing import Optional
+
+from core.aliases import Coords, ItemSpec
+from core.document import NodeData, GroupData
+from core.enums import Gamma
+from core.interfaces import Connectible
+from core.themes import Style
+
+from ui.elements.node import Node
+from ui.styles import Styles
+from ui.elements.directed_edge import DirectedEdge
+
+
+class GroupNode(Node):
+    """Summary node of collapsed group.
+    Members of the group have no canvas items: they are kept only
+    as serialized data, until the group is expanded.
+    Group can't be a target of manual connections: they would be lost on
+    expanding.
+    """
+    __slots__ = ('_content',)
+
+    GAMMA = Gamma.GRAY
+    DEFAULT_TEXT_HEAD = 'Group'
+    # Group's frame is dashed, to differ from usual nodes:
+    STYLE_FRAME = Style.GROUP_FRAME
+    STYLE_SELECTED = Style.GROUP_SELECTED
+
+    def __init__(self, canvas: tk.Canvas, x: int, y: int, content: GroupData,
+                 text_head: str = DEFAULT_TEXT_HEAD,
+                 tag_id: Optional[str] = None):
+        """Init.
+        """
+        self._content = content
+        super().__init__(
+            canvas, x, y, self.GAMMA,
+            text_head=text_head,
+            text_desc=self._get_description(content),
+            tag_id=tag_id
+        )
+
+    @classmethod
+    def from_data(cls, canvas: tk.Canvas, data: NodeData,
+                  keep_id: bool = True) -> 'GroupNode':
+        """Create group node from serialized one.
+        """
+        return cls(
+            canvas, data.x, data.y,
+            content=GroupData.from_dict(data.group),
+            text_head=data.text_head,
+            tag_id=data.id if keep_id else None
+        )
+
+    @staticmethod
+    def _get_description(content: GroupData) -> str:
+        """Get node's description, summary of the group.
+        """
+        return (
+            f'{len(content.nodes)} nodes, {len(content.edges)} links\n'
+            f'{len(content.crossing_edges)} external links'
+        )
+
+    @property
+    def content(self) -> GroupData:
+        """Serialized members of the group.
+        """
+        return self._content
+
+    def get_members_offset(self) -> Coords:
+        """Get shift of members' saved positions to place them at the
+        group's current position.
+        """
+        x = min(node.x for node in self._content.nodes)
+        y = min(node.y for node in self._content.nodes)
+        return self._x - x, self._y - y
+
+    def to_data(self) -> NodeData:
+        """Get serialized node, with group's content.
+        """
+        return replace(super().to_data(), group=self._content.to_dict())
+
+    def is_already_connected_with(self, source: Connectible,
+                                  source_port: str = '',
+                                  target_port: str = ''):
+        """Group can't be targeted by connector.
+        """
+        return True
+
+    def draw_selection(self):
+        """Put selection focus to the node.
+        Group has no connection area: it can't be a source of manual
+        connections.
+        """
+        Styles.put_overlay(self._canvas, self._main_rect, self.STYLE_SELECTED)
+        self._canvas.tag_raise(self._id)
+
+
+class AggregateEdge(DirectedEdge):
+    """Edge, which stands for several edges, crossing the boundary of
+    collapsed group. Its width grows with amount of represented edges.
+    """
+    __slots__ = ('_count',)
+
+    MAX_LINE_WIDTH = 9
+
+    def __init__(self, canvas: tk.Canvas, source: Connectible,
+                 target: Connectible, count: int):
+        """Init.
+        """
+        self._count = count
+        super().__init__(canvas, source, target)
+
+    def _get_item_spec(self) -> ItemSpec:
+        """Get spec of edge's line, with width by amount of edges.
+        """
+        kind, coords, options = super()._get_item_spec()
+        options['width'] = min(
+            self.LINE_WIDTH + self._count - 1,
+            self.MAX_LINE_WIDTH
+        )
+        return kind, coords, options
@@ -3,24 +3,32 @@
 
 import tkinter as tk
 
-from core.enums import Gamma, Ability
-from core.interfaces import Selectable
+from core.enums import Ability
+from core.interfaces import Selectable, Removable
 from core.registry import Registry
+from core.templates import NodeTemplate
+from core.themes import Style
 
+from ui.styles import Styles
 
-class Icon(Selectable):
-    """Toolbar's icon class.
+
+class Icon(Selectable, Removable):
+    """Toolbar's icon of a node template.
     """
+    __slots__ = ('template', '_canvas', '_id', '_main_rect')
+
     BORDER_WIDTH = 2
+    FONT = ('Verdana', '8')
 
     def __init__(self, canvas: tk.Canvas, x: int, y: int, width: int,
-                 height: int, gamma: Gamma):
+                 height: int, template: NodeTemplate):
         """Init.
         """
-        self.gamma = gamma
+        self.template = template
+        gamma = template.gamma_value
 
         self._canvas = canvas
-        self._id = Registry.add(self)
+        self._id = Registry.add(self, scope=canvas)
         node_tags = (Ability.SELECT, self._id)
 
         self._main_rect = canvas.create_rectangle(
@@ -28,19 +36,30 @@ class Icon(Selectable):
             y,
             x + width,
             y + height,
-            width=self.BORDER_WIDTH,
-            outline='black',
-            fill=gamma.value.main_color,
-            tags=node_tags
+            **Styles.get(Style.ICON_FRAME),
+            fill=Styles.get_gamma_color(gamma),
+            tags=node_tags + (
+                Styles.tag(Style.ICON_FRAME),
+                Styles.gamma_tag(gamma)
+            )
         )
-        self._inner_rect = canvas.create_rectangle(
+        canvas.create_rectangle(
             x + self.BORDER_WIDTH,
             y + self.BORDER_WIDTH + height // 3,
             x + width - self.BORDER_WIDTH,
             y + height - self.BORDER_WIDTH,
             width=0,
-            fill=gamma.value.secondary_color,
-            tags=node_tags
+            fill=Styles.get_gamma_color(gamma, secondary=True),
+            tags=node_tags + (Styles.gamma_tag(gamma, secondary=True),)
+        )
+        canvas.create_text(
+            x + width // 2,
+            y + (height + height // 3) // 2,
+            **Styles.get(Style.NODE_DESC),
+            text=template.name,
+            font=self.FONT,
+            width=width - 2 * self.BORDER_WIDTH,
+            tags=node_tags + (Styles.tag(Style.NODE_DESC),)
         )
 
     def __repr__(self):
@@ -53,20 +72,21 @@ class Icon(Selectable):
     def draw_selection(self):
         """Put selection focus to the node.
         """
-        self._canvas.itemconfigure(
-            self._main_rect,
-            outline='white',
-            width=3,
-            dash=(30,)
-        )
+        Styles.put_overlay(self._canvas, self._main_rect, Style.ICON_SELECTED)
         self._canvas.tag_raise(self._id)
 
     def clear_selection(self):
         """Remove selection focus from the node.
         """
-        self._canvas.itemconfigure(
-            self._main_rect,
-            outline='black',
-            width=2,
-            dash=()
+        Styles.remove_overlay(
+            self._canvas, self._main_rect, Style.ICON_SELECTED,
+            Style.ICON_FRAME
         )
+
+    # ---------------------- REMOVABLE ------------------------- #
+
+    def delete(self):
+        """Delete icon from canvas and registry.
+        """
+        self._canvas.delete(self._id)
+        Registry.delete(self._id, self._canvas)
@@ -1,85 +1,403 @@
 """Workspace's node.
 """
 
+import sys
 import tkinter as tk
+from typing import Optional, Sequence
 
-from core.aliases import Coords
+from core.aliases import Box, Coords, ItemSpec, Tags
+from core.document import NodeData
 from core.enums import Gamma, Ability
 from core.interfaces import Draggable, Connectible, Selectable, Connector, \
     Removable, Targetable
+from core.ports import Port, PortIndex
 from core.registry import Registry
+from core.themes import Style
+
+from ui.batch import CanvasBatch
+from ui.styles import Styles
+
+
+class NodeGeometry:
+    """Prototype of geometry of nodes of the same size and ports: offsets
+    of ports and coords of canvas items, relative to node's position.
+    Prototypes are shared by nodes, see `get`, so a node is created by
+    shifting prebuilt coords, without laying out its ports again.
+    """
+    BORDER_WIDTH = 2
+    HEADER_HEIGHT = 32
+    PORT_RADIUS = 5
+
+    # Size and ports' specs -> prototype:
+    _PROTOTYPES: dict[tuple, 'NodeGeometry'] = {}
+
+    def __init__(self, width: int, height: int, inputs: tuple[str, ...],
+                 outputs: tuple[str, ...]):
+        """Init. Ports are placed along node's sides, below the header.
+        """
+        self.width = width
+        self.height = height
+        border = self.BORDER_WIDTH
+        header = self.HEADER_HEIGHT
+        self.inputs = PortIndex(inputs, border + header, height - border)
+        self.outputs = PortIndex(outputs, border + header, height - border)
+
+        self.frame: Box = (0, 0, width, height)
+        self.inner: Box = (
+            border, border + header, width - border, height - border
+        )
+        self.head: Coords = width // 2, header // 2
+        self.desc: Coords = width // 2, (height + header) // 2
+
+        # Markers of declared ports: port, circle's box, name's point and
+        # anchor. Nodes with default ports have no markers.
+        self.ports: list[tuple[Port, Box, Coords, str]] = []
+        radius = self.PORT_RADIUS
+        for side, x, anchor, label_shift in (
+                (self.inputs, 0, tk.W, radius + 2),
+                (self.outputs, width, tk.E, -radius - 2)):
+            if not side.specs:
+                continue
+            for port in side.ports:
+                y = side.get_offset(port.name)
+                self.ports.append((
+                    port,
+                    (x - radius, y - radius, x + radius, y + radius),
+                    (x + label_shift, y),
+                    anchor
+                ))
+
+    @classmethod
+    def get(cls, width: int, height: int, inputs: Sequence[str],
+            outputs: Sequence[str]) -> 'NodeGeometry':
+        """Get prototype of nodes of the size and ports, build it, if
+        there is no such yet.
+        """
+        key = width, height, tuple(inputs), tuple(outputs)
+        geometry = cls._PROTOTYPES.get(key)
+        if geometry is None:
+            geometry = cls._PROTOTYPES[key] = cls(*key)
+        return geometry
 
 
 class Node(Draggable, Connectible, Selectable, Removable, Targetable):
     """Workspaces node class.
+    Nodes are compact, to keep diagrams of millions of elements: they
+    have slots instead of dicts, interned texts, shared geometry, empty
+    tuples instead of empty lists of connectors, and a single canvas
+    item id; see `ui.memory` for their footprint.
     """
-    BORDER_WIDTH = 2
+    __slots__ = (
+        '_canvas', '_gamma', '_x', '_y', '_text_head', '_text_desc',
+        '_input_connectors', '_output_connectors', '_output_point_areas',
+        '_geometry', '_id', '_main_rect',
+    )
+
     CONNECTION_AREA_RADIUS = 12
-    COLOR_MARKED = '#ADA'
-    COLOR_SELECTED = 'cyan'
+    # Offsets of ids of texts' items from the frame's one:
+    HEAD_ITEM = 2
+    DESC_ITEM = 3
+    WIDTH = NodeData.WIDTH
+    HEIGHT = NodeData.HEIGHT
 
-    def __init__(self, canvas: tk.Canvas, x: int, y: int, gamma: Gamma):
+    STYLE_FRAME = Style.NODE_FRAME
+    STYLE_SELECTED = Style.NODE_SELECTED
+
+    # TODO: change later
+    DEFAULT_TEXT_HEAD = 'Hello'
+    DEFAULT_TEXT_DESC = 'My name is Alex\nWhat is your name?'
+
+    def __init__(self, canvas: tk.Canvas, x: int, y: int, gamma: Gamma,
+                 text_head: str = DEFAULT_TEXT_HEAD,
+                 text_desc: str = DEFAULT_TEXT_DESC,
+                 tag_id: Optional[str] = None,
+                 inputs: Sequence[str] = (),
+                 outputs: Sequence[str] = (),
+                 width: int = WIDTH,
+                 height: int = HEIGHT):
         """Init.
+        inputs, outputs - specs of node's ports, see `core.ports`.
         """
-        # TODO: change to dynamic values later
-        width = 200
-        height = 100
-        header_height = 32
+        self._init_state(
+            canvas, x, y, gamma, text_head, text_desc, inputs, outputs,
+            width, height
+        )
+        self._id = Registry.add(self, tag_id, canvas)
+
+        ids = [
+            getattr(canvas, f'create_{kind}')(*coords, **options)
+            for kind, coords, options in self._get_items_specs()
+        ]
+        self._set_items_ids(ids)
 
+    @classmethod
+    def create_many(cls, canvas: tk.Canvas,
+                    nodes_data: Sequence[NodeData],
+                    keep_ids: bool = False) -> list['Node']:
+        """Batched creation of nodes.
+        Registers all nodes at once and creates their canvas items in
+        a single Tcl call, instead of per-node constructor calls.
+        If keep_ids is set, nodes get tag_ids from nodes_data.
+        """
+        nodes = []
+        for data in nodes_data:
+            node = cls.__new__(cls)
+            node._init_state(
+                canvas, data.x, data.y, data.gamma_value,
+                data.text_head, data.text_desc, data.inputs, data.outputs,
+                data.width, data.height
+            )
+            nodes.append(node)
+
+        if keep_ids:
+            for node, data in zip(nodes, nodes_data):
+                node._id = Registry.add(node, data.id, canvas)
+        else:
+            for node, tag_id in zip(nodes, Registry.add_many(nodes, canvas)):
+                node._id = tag_id
+
+        batch = CanvasBatch(canvas)
+        items_counts = []
+        for node in nodes:
+            specs = node._get_items_specs()
+            items_counts.append(len(specs))
+            for kind, coords, options in specs:
+                batch.create(kind, coords, **options)
+
+        ids = batch.flush()
+        start = 0
+        for node, items_count in zip(nodes, items_counts):
+            node._set_items_ids(ids[start:start + items_count])
+            start += items_count
+        return nodes
+
+    def _init_state(self, canvas: tk.Canvas, x: int, y: int, gamma: Gamma,
+                    text_head: str, text_desc: str,
+                    inputs: Sequence[str] = (), outputs: Sequence[str] = (),
+                    width: int = WIDTH, height: int = HEIGHT):
+        """Init node's state, except of canvas items.
+        """
         self._canvas = canvas
         self._gamma = gamma
-        self._id = Registry.add(self)
+        self._x = x
+        self._y = y
 
-        # TODO: change later
-        self._text_head = 'Hello'
-        self._text_desc = 'My name is Alex\nWhat is your name?'
+        self._text_head = sys.intern(text_head)
+        self._text_desc = sys.intern(text_desc)
 
-        self._input_connectors = []
-        self._output_connectors = []
+        # Lists of connectors and of connection areas are created only,
+        # when there are some:
+        self._input_connectors: Sequence[Connector] = ()
+        self._output_connectors: Sequence[Connector] = ()
+        self._output_point_areas: Sequence[int] = ()
+        self._geometry = NodeGeometry.get(width, height, inputs, outputs)
 
-        self._node_tags = (
+    def _get_node_tags(self) -> Tags:
+        """Get tags for all node's canvas items.
+        """
+        return (
             Ability.DRAG,
             Ability.SELECT,
             Ability.CONNECT,
             self._id
         )
 
-        self._main_rect = canvas.create_rectangle(
-            x,
-            y,
-            x + width,
-            y + height,
-            width=self.BORDER_WIDTH,
-            outline='black',
-            fill=gamma.value.main_color,
-            tags=self._node_tags
+    def _shift(self, coords: Sequence[float]) -> tuple[float, ...]:
+        """Get prototype's relative coords at node's position.
+        """
+        x, y = self._x, self._y
+        return tuple(
+            value + y if n % 2 else value + x
+            for n, value in enumerate(coords)
         )
-        self._inner_rect = canvas.create_rectangle(
-            x + self.BORDER_WIDTH,
-            y + self.BORDER_WIDTH + header_height,
-            x + width - self.BORDER_WIDTH,
-            y + height - self.BORDER_WIDTH,
-            width=0,
-            fill=gamma.value.secondary_color,
-            tags=self._node_tags,
+
+    def _get_items_specs(self) -> list[ItemSpec]:
+        """Get specs of node's canvas items: kind, coords and options.
+        """
+        geometry = self._geometry
+        gamma = self._gamma
+        tags = self._get_node_tags()
+
+        return [
+            (
+                'rectangle',
+                self._shift(geometry.frame),
+                dict(
+                    **Styles.get(self.STYLE_FRAME),
+                    fill=Styles.get_gamma_color(gamma),
+                    tags=tags + (
+                        Styles.tag(self.STYLE_FRAME),
+                        Styles.gamma_tag(gamma)
+                    ),
+                )
+            ),
+            (
+                'rectangle',
+                self._shift(geometry.inner),
+                dict(
+                    width=0,
+                    fill=Styles.get_gamma_color(gamma, secondary=True),
+                    tags=tags + (Styles.gamma_tag(gamma, secondary=True),),
+                )
+            ),
+            (
+                'text',
+                self._shift(geometry.head),
+                dict(
+                    **Styles.get(Style.NODE_HEAD),
+                    text=self._text_head,
+                    font=('Verdana', '12'),
+                    tags=tags + (Styles.tag(Style.NODE_HEAD),),
+                )
+            ),
+            (
+                'text',
+                self._shift(geometry.desc),
+                dict(
+                    **Styles.get(Style.NODE_DESC),
+                    text=self._text_desc,
+                    font=('Verdana', '12'),
+                    tags=tags + (Styles.tag(Style.NODE_DESC),),
+                )
+            ),
+            *self._get_ports_specs(tags),
+        ]
+
+    def _get_ports_specs(self, node_tags: Tags) -> list[ItemSpec]:
+        """Get specs of markers of declared ports: circle and name.
+        """
+        specs = []
+        for port, circle, point, anchor in self._geometry.ports:
+            tags = node_tags + (port.tag,)
+            specs.append((
+                'oval',
+                self._shift(circle),
+                dict(
+                    **Styles.get(Style.NODE_PORT),
+                    width=1,
+                    tags=tags + (Styles.tag(Style.NODE_PORT),)
+                )
+            ))
+            specs.append((
+                'text',
+                self._shift(point),
+                dict(
+                    **Styles.get(Style.NODE_PORT_LABEL),
+                    text=port.name,
+                    anchor=anchor,
+                    font=('Verdana', '8'),
+                    tags=tags + (Styles.tag(Style.NODE_PORT_LABEL),),
+                )
+            ))
+        return specs
+
+    def _set_items_ids(self, ids: Sequence[int]):
+        """Remember ids of canvas items, created by `_get_items_specs`.
+        """
+        # Tk numbers items of a canvas one by one, and node's items are
+        # created in a row, so the rest ids are offsets from the first one,
+        # see HEAD_ITEM and DESC_ITEM. Ports' items are not needed
+        # separately: they are tagged by node.
+        self._main_rect = ids[0]
+
+    @property
+    def tag_id(self) -> str:
+        """Node's registry tag_id.
+        """
+        return self._id
+
+    @property
+    def position(self) -> Coords:
+        """Node's top left corner.
+        """
+        return self._x, self._y
+
+    @property
+    def width(self) -> int:
+        """Node's width.
+        """
+        return self._geometry.width
+
+    @property
+    def height(self) -> int:
+        """Node's height.
+        """
+        return self._geometry.height
+
+    @property
+    def text_head(self) -> str:
+        """Node's header text.
+        """
+        return self._text_head
+
+    @property
+    def text_desc(self) -> str:
+        """Node's description text.
+        """
+        return self._text_desc
+
+    def set_text(self, text_head: str, text_desc: str):
+        """Change node's header and description texts.
+        """
+        self._text_head = text_head
+        self._text_desc = text_desc
+        self._canvas.itemconfigure(
+            self._main_rect + self.HEAD_ITEM, text=text_head
         )
-        self._head_text = canvas.create_text(
-            x + width // 2,
-            y + header_height // 2,
-            fill='white',
-            text=self._text_head,
-            font=('Verdana', '12'),
-            tags=self._node_tags,
+        self._canvas.itemconfigure(
+            self._main_rect + self.DESC_ITEM, text=text_desc
         )
-        self._inner_text = canvas.create_text(
-            x + width // 2,
-            y + (height + header_height) // 2,
-            fill='black',
-            text=self._text_desc,
-            font=('Verdana', '12'),
-            tags=self._node_tags,
+
+    def is_header_point(self, y: int) -> bool:
+        """Check, if point with y coord is on the node's header.
+        """
+        return y < self._y + NodeGeometry.HEADER_HEIGHT
+
+    def to_data(self) -> NodeData:
+        """Get serialized node.
+        """
+        return NodeData(
+            id=self._id,
+            x=self._x,
+            y=self._y,
+            gamma=self._gamma.name,
+            text_head=self._text_head,
+            text_desc=self._text_desc,
+            inputs=list(self._geometry.inputs.specs),
+            outputs=list(self._geometry.outputs.specs),
+            width=self._geometry.width,
+            height=self._geometry.height,
         )
-        self._output_point_area = None
+
+    @property
+    def input_ports(self) -> PortIndex:
+        """Node's input ports.
+        """
+        return self._geometry.inputs
+
+    @property
+    def output_ports(self) -> PortIndex:
+        """Node's output ports.
+        """
+        return self._geometry.outputs
+
+    def find_input_port(self, y: float, source_port: Port) -> Optional[Port]:
+        """Get input port, nearest to y coord and compatible with
+        the source port. None, if there is no compatible port.
+        """
+        return self._geometry.inputs.find_nearest(y - self._y, source_port)
+
+    @property
+    def input_connectors(self) -> list[Connector]:
+        """Connectors, ended at the node.
+        """
+        return self._input_connectors or []
+
+    @property
+    def output_connectors(self) -> list[Connector]:
+        """Connectors, started from the node.
+        """
+        return self._output_connectors or []
 
     def __repr__(self):
         """Repr.
@@ -88,65 +406,78 @@ class Node(Draggable, Connectible, Selectable, Removable, Targetable):
 
     # ---------------------- CONNECTIBLE ------------------------- #
 
-    def get_output_point(self) -> Coords:
-        """Get connector's starting point.
+    def get_output_point(self, port: str = '') -> Coords:
+        """Get connector's starting point at the output port.
         """
-        x1, y1, x2, y2 = self._canvas.coords(self._inner_rect)
-        return x2 + 2, (y1 + y2) // 2
+        geometry = self._geometry
+        return (
+            self._x + geometry.width - geometry.BORDER_WIDTH + 2,
+            self._y + geometry.outputs.get_offset(port)
+        )
 
-    def get_input_point(self) -> Coords:
-        """Get connector's ending point.
+    def get_input_point(self, port: str = '') -> Coords:
+        """Get connector's ending point at the input port.
         """
-        x1, y1, x2, y2 = self._canvas.coords(self._inner_rect)
-        return x1 - 2, (y1 + y2) // 2
+        return (
+            self._x + NodeGeometry.BORDER_WIDTH - 2,
+            self._y + self._geometry.inputs.get_offset(port)
+        )
 
     def add_input_connector(self, connector: Connector):
         """Add connector for input.
         """
-        self._input_connectors.append(connector)
+        if self._input_connectors:
+            self._input_connectors.append(connector)
+        else:
+            self._input_connectors = [connector]
 
     def add_output_connector(self, connector: Connector):
         """Add connector for output.
         """
-        self._output_connectors.append(connector)
+        if self._output_connectors:
+            self._output_connectors.append(connector)
+        else:
+            self._output_connectors = [connector]
 
     def remove_input_connector(self, connector: Connector):
         """Remove connector for input.
         """
         self._input_connectors.remove(connector)
+        if not self._input_connectors:
+            self._input_connectors = ()
 
     def remove_output_connector(self, connector: Connector):
         """Remove connector for output.
         """
         self._output_connectors.remove(connector)
+        if not self._output_connectors:
+            self._output_connectors = ()
 
     # ---------------------- TARGETABLE -------------------------- #
 
     def turn_highlight_on(self):
         """Put highlight to the item.
         """
-        self._canvas.itemconfigure(
-            self._main_rect,
-            outline=self.COLOR_MARKED,
-            width=3,
-            dash=(30,)
-        )
+        Styles.put_overlay(self._canvas, self._main_rect, Style.NODE_MARKED)
 
     def turn_highlight_off(self):
         """Remove highlight to the item.
         """
-        self._canvas.itemconfigure(
-            self._main_rect,
-            outline='black',
-            width=2,
-            dash=()
+        Styles.remove_overlay(
+            self._canvas, self._main_rect, Style.NODE_MARKED,
+            self.STYLE_FRAME
         )
 
-    def is_already_connected_with(self, source: Connectible):
-        """Check, if the item is already connected with the source.
+    def is_already_connected_with(self, source: Connectible,
+                                  source_port: str = '',
+                                  target_port: str = ''):
+        """Check, if the item is already connected with the source,
+        by the same ports.
         """
         for connector in self._input_connectors:
-            if connector.source == source:
+            if connector.source == source \
+                    and connector.source_port == source_port \
+                    and connector.target_port == target_port:
                 return True
         return False
 
@@ -155,6 +486,8 @@ class Node(Draggable, Connectible, Selectable, Removable, Targetable):
     def move(self, delta_x: int, delta_y: int):
         """Move node in workspace.
         """
+        self._x += delta_x
+        self._y += delta_y
         self._canvas.move(self._id, delta_x, delta_y)
         for connector in self._input_connectors:
             connector.move_target_point(delta_x, delta_y)
@@ -166,45 +499,48 @@ class Node(Draggable, Connectible, Selectable, Removable, Targetable):
     def draw_selection(self):
         """Put selection focus to the node.
         """
-        self._canvas.itemconfigure(
-            self._main_rect,
-            outline=self.COLOR_SELECTED,
-            width=3,
-            dash=(30,)
-        )
+        Styles.put_overlay(self._canvas, self._main_rect, self.STYLE_SELECTED)
 
-        center_x, center_y = self.get_output_point()
-
-        self._output_point_area = self._canvas.create_oval(
-            center_x - self.CONNECTION_AREA_RADIUS,
-            center_y - self.CONNECTION_AREA_RADIUS,
-            center_x + self.CONNECTION_AREA_RADIUS,
-            center_y + self.CONNECTION_AREA_RADIUS,
-            width=3,
-            fill=self._gamma.value.secondary_color,
-            outline=self._gamma.value.main_color,
-            tags=self._node_tags + (Ability.CONNECT_SOURCE, )
-        )
+        # Connection area at each output port:
+        radius = self.CONNECTION_AREA_RADIUS
+        tags = self._get_node_tags()
+        areas = []
+        for port in self._geometry.outputs.ports:
+            center_x, center_y = self.get_output_point(port.name)
+            areas.append(self._canvas.create_oval(
+                center_x - radius,
+                center_y - radius,
+                center_x + radius,
+                center_y + radius,
+                width=3,
+                fill=Styles.get_gamma_color(self._gamma, secondary=True),
+                outline=Styles.get_gamma_color(self._gamma),
+                tags=tags + (
+                    Ability.CONNECT_SOURCE,
+                    port.tag,
+                    Styles.gamma_tag(self._gamma, secondary=True),
+                    Styles.gamma_tag(self._gamma, outline=True)
+                )
+            ))
+        self._output_point_areas = areas
         self._canvas.tag_raise(self._id)
 
     def clear_selection(self):
         """Remove selection focus from the node.
         """
-        self._canvas.itemconfigure(
-            self._main_rect,
-            outline='black',
-            width=2,
-            dash=()
+        Styles.remove_overlay(
+            self._canvas, self._main_rect, self.STYLE_SELECTED,
+            self.STYLE_FRAME
         )
-        self._canvas.delete(self._output_point_area)
-        self._output_point_area = None
+        self._canvas.delete(*self._output_point_areas)
+        self._output_point_areas = ()
 
     # ---------------------- REMOVABLE ------------------------- #
 
     def delete(self):
         """Delete edge from canvas and registry.
         """
-        for q in self._input_connectors + self._output_connectors:
+        for q in [*self._input_connectors, *self._output_connectors]:
             q.delete()
         self._canvas.delete(self._id)
-        Registry.delete(self._id)
+        Registry.delete(self._id, self._canvas)
@@ -0,0 +1,33 @@
+"""Stub end of edges, crossing into not loaded part of the diagram.
+"""
+
+import tkinter as tk
+
+from core.document import NodeData
+
+from ui.elements.node import Node
+
+
+class StubNode(Node):
+    """Position and ports of a node, which is not loaded, so edges to it
+    are drawn correctly.
+    Stub has no canvas items and is not registered, so it can't be
+    selected, dragged or deleted; edges to it can.
+    """
+    __slots__ = ()
+
+    def __init__(self, canvas: tk.Canvas, data: NodeData):
+        """Init.
+        """
+        self._init_state(
+            canvas, data.x, data.y, data.gamma_value, data.text_head,
+            data.text_desc, data.inputs, data.outputs, data.width,
+            data.height
+        )
+        self._id = data.id
+
+    @property
+    def connectors(self) -> list:
+        """All edges of the stub.
+        """
+        return [*self._input_connectors, *self._output_connectors]
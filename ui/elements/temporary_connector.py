@@ -6,31 +6,38 @@ from typing import Optional
 
 from core.aliases import BezierCoords
 from core.interfaces import Connector, Connectible, Removable
+from core.themes import Style
+
+from ui.styles import Styles
 
 
 class TemporaryConnector(Connector, Removable):
     """Temporary connector realization.
     Directed arrow, from target to somewhere.
     """
+    __slots__ = (
+        '_id', '_canvas', '_source', '_source_port', '_target', '_line',
+    )
+
     LINE_WIDTH = 4
-    COLOR_TARGET_NOT_FOUND = '#A44'
-    COLOR_TARGET_FOUND = '#6D6'
 
-    def __init__(self, canvas: tk.Canvas, source: Connectible):
+    def __init__(self, canvas: tk.Canvas, source: Connectible,
+                 source_port: str = ''):
         """Init.
         """
         self._id = 'temporary-connector'
         self._canvas = canvas
         self._source = source
+        self._source_port = source_port
         self._target: Optional[Connectible] = None
 
         connector_tags = (self._id, )
 
-        x, y = source.get_output_point()
+        x, y = source.get_output_point(source_port)
 
         self._line = canvas.create_line(
             *self._get_bezier_coords(x, y, x, y),
-            fill=self.COLOR_TARGET_NOT_FOUND,
+            **Styles.get(Style.CONNECTOR_NOT_FOUND),
             width=self.LINE_WIDTH,
             splinesteps=64,
             tags=connector_tags,
@@ -62,7 +69,7 @@ class TemporaryConnector(Connector, Removable):
         """
         self._canvas.itemconfigure(
             self._line,
-            fill=self.COLOR_TARGET_FOUND,
+            **Styles.get(Style.CONNECTOR_FOUND)
         )
 
     def mark_as_target_is_not_found(self):
@@ -70,7 +77,7 @@ class TemporaryConnector(Connector, Removable):
         """
         self._canvas.itemconfigure(
             self._line,
-            fill=self.COLOR_TARGET_NOT_FOUND,
+            **Styles.get(Style.CONNECTOR_NOT_FOUND)
         )
 
     def __repr__(self):
@@ -86,6 +93,12 @@ class TemporaryConnector(Connector, Removable):
         """
         return self._source
 
+    @property
+    def source_port(self) -> str:
+        """Name of source's output port.
+        """
+        return self._source_port
+
     def move_target_point(self, delta_x: int, delta_y: int):
         """Move connector's target point.
         """
@@ -94,6 +107,12 @@ class TemporaryConnector(Connector, Removable):
         y2 += delta_y
         self._canvas.coords(self._id, *self._get_bezier_coords(x1, y1, x2, y2))
 
+    def set_target_point(self, x: int, y: int):
+        """Put connector's target point to (x, y).
+        """
+        x1, y1, *_ = self._canvas.coords(self._id)
+        self._canvas.coords(self._id, *self._get_bezier_coords(x1, y1, x, y))
+
     def move_source_point(self, delta_x: int, delta_y: int):
         """Move connector's source point.
         Doesn't need to temporary existed one.
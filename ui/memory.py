@@ -0,0 +1,77 @@
+"""Memory footprint report of the workspace's elements.
+
+Report for a document, or for a generated chain of nodes (the window
+is hidden, but Tk still needs a display, f.e. Xvfb):
+    python -m ui.memory [<document.json>] [--nodes N] [--json]
+"""
+
+import argparse
+import json
+import sys
+import tkinter as tk
+
+from core.document import Document, NodeData, EdgeData
+from core.enums import Gamma
+from ui.workspace import Workspace
+
+
+def generate_chain(count: int) -> Document:
+    """Get document of count nodes in rows, each connected to the next.
+    """
+    per_row = 100
+    step_x = NodeData.WIDTH * 2
+    step_y = NodeData.HEIGHT * 2
+    nodes = [
+        NodeData(
+            id=f'id-node-{i}',
+            x=i % per_row * step_x,
+            y=i // per_row * step_y,
+            gamma=Gamma.BLUE.name,
+            text_head=f'Node {i}',
+            text_desc='',
+        )
+        for i in range(count)
+    ]
+    edges = [
+        EdgeData(
+            id=f'id-edge-{i}',
+            source=nodes[i].id,
+            target=nodes[i + 1].id
+        )
+        for i in range(count - 1)
+    ]
+    return Document(nodes, edges)
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python -m ui.memory',
+        description='Report memory, taken by diagram elements.'
+    )
+    parser.add_argument('document', nargs='?',
+                        help='document file, a chain of nodes by default')
+    parser.add_argument('--nodes', type=int, default=10_000,
+                        help='amount of nodes in the generated chain')
+    parser.add_argument('--json', action='store_true',
+                        help='print report as JSON')
+    args = parser.parse_args()
+
+    if args.document:
+        try:
+            document = Document.load(args.document)
+        except (OSError, ValueError) as e:
+            sys.exit(f'Can\'t load document: {e}')
+    else:
+        document = generate_chain(args.nodes)
+
+    root = tk.Tk()
+    root.withdraw()
+    workspace = Workspace(
+        root, pop_selection_from_toolbar_callback=lambda: None
+    )
+    workspace.add_document(document, keep_ids=True)
+    report = workspace.get_memory_report()
+    print(json.dumps(report.to_dict()) if args.json else report.format())
+    root.destroy()
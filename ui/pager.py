@@ -0,0 +1,289 @@
+"""Paging of a tiled diagram store into the workspace.
+"""
+
+import tkinter as tk
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from core.document import Document, NodeData, EdgeData
+from core.operations import Operation, OperationKind
+from core.tiles import Tile, TileStore
+
+from ui.elements.node import Node
+from ui.elements.stub_node import StubNode
+from ui.workspace import Workspace
+
+
+class TilePager:
+    """Keeps tiles near the viewport loaded into the workspace.
+
+    Tiles are loaded, when they get within VIEW_MARGIN of the visible
+    area, and unloaded in least recently used order, when loaded nodes
+    exceed the budget; visible tiles are never unloaded.
+    Edges, crossing into not loaded tiles, end at stub nodes, which are
+    replaced by real ones, when their tile is loaded.
+    Diagram operations are written back to the store in batches, every
+    FLUSH_INTERVAL and before unloading.
+    Loading and unloading emit no diagram operations: listeners of the
+    pager are notified about them instead.
+    """
+    POLL_INTERVAL = 200
+    FLUSH_INTERVAL = 1000
+    VIEW_MARGIN = 512
+    NODES_BUDGET = 50_000
+
+    def __init__(self, master: tk.Misc, workspace: Workspace,
+                 store: TileStore, nodes_budget: int = NODES_BUDGET):
+        """Init. Paging is driven by master's timers.
+        """
+        self._master = master
+        self._workspace = workspace
+        self._store = store
+        self._nodes_budget = nodes_budget
+
+        # Loaded tiles, from least to most recently used:
+        self._tiles: OrderedDict[Tile, None] = OrderedDict()
+        # Tiles of loaded nodes by their current positions, and back:
+        self._node_tiles: dict[str, Tile] = {}
+        self._tile_nodes: dict[Tile, set[str]] = {}
+        self._stubs: dict[str, StubNode] = {}
+
+        # Changes, not written to the store yet:
+        self._dirty_nodes: dict[str, NodeData] = {}
+        self._dirty_edges: dict[str, EdgeData] = {}
+        self._deleted: set[str] = set()
+
+        self._load_listeners: list[Callable[[Document], None]] = []
+        self._unload_listeners: list[Callable[[set[str]], None]] = []
+
+        self._poll_timer = ''
+        self._flush_timer = ''
+        self._visible_box = None
+
+    @property
+    def store(self) -> TileStore:
+        """Paged store.
+        """
+        return self._store
+
+    @property
+    def loaded_count(self) -> int:
+        """Amount of loaded nodes.
+        """
+        return len(self._node_tiles)
+
+    def add_load_listener(self, listener: Callable[[Document], None]):
+        """Subscribe listener to nodes and edges, added to the workspace
+        by paging.
+        """
+        self._load_listeners.append(listener)
+
+    def add_unload_listener(self, listener: Callable[[set[str]], None]):
+        """Subscribe listener to ids of nodes, removed from the workspace
+        by paging, with their edges.
+        """
+        self._unload_listeners.append(listener)
+
+    def start(self):
+        """Start paging: load tiles in view and follow the viewport.
+        """
+        bounds = self._store.get_bounds()
+        if bounds:
+            self._workspace.extend_scroll_region(bounds)
+        self._workspace.add_operation_listener(self._callback_operation)
+        self._poll()
+        self._flush_periodically()
+
+    def close(self):
+        """Stop paging, write pending changes and close the store.
+        """
+        self._master.after_cancel(self._poll_timer)
+        self._master.after_cancel(self._flush_timer)
+        self._workspace.remove_operation_listener(self._callback_operation)
+        self.flush()
+        self._store.close()
+
+    def _poll(self):
+        """Update loaded tiles, if the viewport was changed.
+        """
+        box = self._workspace.get_visible_box()
+        if box != self._visible_box:
+            self._visible_box = box
+            self.update()
+        self._poll_timer = self._master.after(self.POLL_INTERVAL, self._poll)
+
+    def _flush_periodically(self):
+        """Write pending changes by timer.
+        """
+        self.flush()
+        self._flush_timer = self._master.after(
+            self.FLUSH_INTERVAL, self._flush_periodically
+        )
+
+    def update(self):
+        """Load tiles near the viewport, unload extra ones.
+        """
+        x1, y1, x2, y2 = self._workspace.get_visible_box()
+        margin = self.VIEW_MARGIN
+        needed = self._store.get_tiles(
+            (x1 - margin, y1 - margin, x2 + margin, y2 + margin)
+        )
+        for tile in needed:
+            if tile not in self._tiles:
+                self._load(tile)
+            self._tiles.move_to_end(tile)
+
+        needed = set(needed)
+        for tile in list(self._tiles):
+            if self.loaded_count <= self._nodes_budget:
+                break
+            if tile not in needed:
+                self._unload(tile)
+
+    # ---------------------- LOADING ------------------------- #
+
+    def _load(self, tile: Tile):
+        """Load tile's nodes and their edges.
+        """
+        # Stored positions of nodes should be actual:
+        self.flush()
+        nodes = [
+            data for data in self._store.get_tile_nodes(tile)
+            if data.id not in self._node_tiles
+        ]
+        ids = {data.id for data in nodes}
+        edges = [
+            edge for edge in self._store.get_tile_edges(tile)
+            if edge.source in ids or edge.target in ids
+        ]
+
+        # Loaded nodes replace their stubs, with edges of them:
+        replaced = [
+            self._stubs.pop(tag_id) for tag_id in ids & self._stubs.keys()
+        ]
+        self._workspace.unload_edges([
+            edge for stub in replaced for edge in stub.connectors
+        ])
+
+        ends = {edge.source for edge in edges} \
+            | {edge.target for edge in edges}
+        self._add_stubs(ends - ids)
+        self._add(Document(nodes, edges), ends - ids)
+
+        self._tiles[tile] = None
+        self._tile_nodes.setdefault(tile, set()).update(ids)
+        self._node_tiles.update(dict.fromkeys(ids, tile))
+
+    def _unload(self, tile: Tile):
+        """Unload tile's nodes. Their edges with loaded nodes are kept,
+        ending at stubs.
+        """
+        self.flush()
+        del self._tiles[tile]
+        ids = self._tile_nodes.pop(tile, set())
+        nodes = [self._workspace.get_node(tag_id) for tag_id in ids]
+
+        kept = []
+        stubs = {}
+        for node in nodes:
+            for edge in node.input_connectors + node.output_connectors:
+                other = edge.source if edge.target is node else edge.target
+                if other.tag_id in self._node_tiles \
+                        and other.tag_id not in ids:
+                    kept.append(edge.to_data())
+                    if node.tag_id not in stubs:
+                        stubs[node.tag_id] = StubNode(None, node.to_data())
+
+        self._workspace.unload_nodes(nodes)
+        for listener in self._unload_listeners:
+            listener(ids)
+        for tag_id in ids:
+            del self._node_tiles[tag_id]
+        self._stubs = {
+            tag_id: stub for tag_id, stub in self._stubs.items()
+            if stub.connectors
+        }
+        self._stubs.update(stubs)
+        self._add(
+            Document([], kept),
+            {edge.source for edge in kept} | {edge.target for edge in kept}
+        )
+
+    def _add_stubs(self, ids: Iterable[str]):
+        """Create stubs for not loaded nodes.
+        """
+        missing = [
+            tag_id for tag_id in ids
+            if tag_id not in self._node_tiles and tag_id not in self._stubs
+        ]
+        for data in self._store.get_nodes(missing):
+            self._stubs[data.id] = StubNode(None, data)
+
+    def _add(self, document: Document, ends: Iterable[str]):
+        """Add document to the workspace; edges may end at loaded nodes
+        and stubs.
+        """
+        nodes_map: dict[str, Node] = {}
+        for tag_id in ends:
+            nodes_map[tag_id] = self._stubs.get(tag_id) \
+                or self._workspace.get_node(tag_id)
+        self._workspace.add_document(
+            document, keep_ids=True, nodes_map=nodes_map
+        )
+        for listener in self._load_listeners:
+            listener(document)
+
+    # ---------------------- WRITING ------------------------- #
+
+    def _callback_operation(self, operation: Operation):
+        """Callback. Diagram was changed: remember changes to write.
+        """
+        tag_id = operation.id
+        if operation.kind == OperationKind.CONNECT:
+            self._deleted.discard(tag_id)
+            self._dirty_edges[tag_id] = EdgeData(
+                id=tag_id, **operation.payload
+            )
+        elif operation.kind == OperationKind.LABEL:
+            edge = self._workspace.get_edge(tag_id)
+            if edge is not None:
+                self._dirty_edges[tag_id] = edge.to_data()
+        elif operation.kind == OperationKind.DELETE:
+            self._dirty_nodes.pop(tag_id, None)
+            self._dirty_edges.pop(tag_id, None)
+            self._deleted.add(tag_id)
+            tile = self._node_tiles.pop(tag_id, None)
+            if tile is not None:
+                self._tile_nodes[tile].discard(tag_id)
+        else:
+            node = self._workspace.get_node(tag_id)
+            if node is None:
+                return
+            self._deleted.discard(tag_id)
+            self._dirty_nodes[tag_id] = node.to_data()
+            self._move_node(tag_id, self._store.get_tile(*node.position))
+
+    def _move_node(self, tag_id: str, tile: Tile):
+        """Put loaded node to the tile.
+        """
+        previous = self._node_tiles.get(tag_id)
+        if previous == tile:
+            return
+        if previous is not None:
+            self._tile_nodes[previous].discard(tag_id)
+        self._node_tiles[tag_id] = tile
+        self._tile_nodes.setdefault(tile, set()).add(tag_id)
+
+    def flush(self):
+        """Write pending changes to the store.
+        """
+        if not (self._dirty_nodes or self._dirty_edges or self._deleted):
+            return
+        self._store.write(
+            self._dirty_nodes.values(),
+            self._dirty_edges.values(),
+            self._deleted
+        )
+        self._dirty_nodes = {}
+        self._dirty_edges = {}
+        self._deleted = set()
@@ -0,0 +1,142 @@
+"""Search panel.
+"""
+
+import tkinter as tk
+from typing import Iterable, Union
+
+from core.document import Document
+from core.enums import TkEvents
+from core.operations import Operation
+from core.search import SearchIndex
+from core.themes import Style, Theme
+
+from ui.styles import Styles
+from ui.workspace import Workspace
+
+
+class SearchPanel:
+    """Floating search panel over the workspace.
+    Shown by Ctrl+F, hidden by Escape.
+    Enter jumps to the next found node, Shift+Enter - to the previous one.
+    """
+    ENTRY_WIDTH = 30
+
+    def __init__(self, master: Union[tk.Widget, tk.Tk], workspace: Workspace):
+        """Init.
+        """
+        self._master = master
+        self._workspace = workspace
+        self._index = SearchIndex()
+        self._results: list[str] = []
+        self._current = -1
+
+        self._frame = tk.Frame(master, padx=4, pady=4)
+
+        self._query = tk.StringVar(self._frame)
+        self._query.trace_add('write', lambda *_: self._update_results())
+        entry = tk.Entry(
+            self._frame,
+            textvariable=self._query,
+            width=self.ENTRY_WIDTH
+        )
+        entry.pack(side=tk.LEFT)
+        entry.bind(TkEvents.RETURN, lambda _: self._jump(1))
+        entry.bind(TkEvents.SHIFT_RETURN, lambda _: self._jump(-1))
+        entry.bind(TkEvents.ESCAPE, lambda _: self.hide())
+        self._entry = entry
+
+        self._filter = tk.BooleanVar(self._frame, value=False)
+        self._filter_button = tk.Checkbutton(
+            self._frame,
+            text='Filter',
+            variable=self._filter,
+            command=lambda: self._workspace.set_filter(self._filter.get()),
+        )
+        self._filter_button.pack(side=tk.LEFT)
+
+        self._status = tk.Label(self._frame, width=10)
+        self._status.pack(side=tk.LEFT)
+
+        self._callback_theme(Styles.THEME)
+        Styles.add_listener(self._callback_theme)
+
+        workspace.add_operation_listener(self._callback_operation)
+        master.bind(TkEvents.FIND, lambda _: self.show())
+
+    def reindex(self):
+        """Re-create index from the whole workspace.
+        Should be called after loading of a new document.
+        """
+        self._index.rebuild(self._workspace.get_document())
+        self._update_results()
+
+    def add_document(self, document: Document):
+        """Index nodes and edges, added to the workspace without
+        operations, f.e. a loaded part of a tiled diagram.
+        """
+        self._index.add_document(document)
+        self._update_results()
+
+    def remove_nodes(self, tag_ids: Iterable[str]):
+        """Stop indexing nodes, removed from the workspace without
+        operations, f.e. an unloaded part of a tiled diagram.
+        """
+        self._index.remove_nodes(tag_ids)
+        self._update_results()
+
+    def show(self):
+        """Show panel and focus search field.
+        """
+        self._frame.place(relx=1.0, x=-20, y=10, anchor=tk.NE)
+        self._entry.focus_set()
+        self._entry.select_range(0, tk.END)
+
+    def hide(self):
+        """Hide panel, remove highlight and filter.
+        """
+        self._frame.place_forget()
+        self._results = []
+        self._workspace.highlight_nodes(())
+        self._workspace.set_filter(False)
+        self._filter.set(False)
+
+    def _callback_theme(self, _: Theme):
+        """Callback. Theme was switched.
+        """
+        options = Styles.get(Style.PANEL)
+        self._frame.configure(bg=options['bg'])
+        self._filter_button.configure(**options, selectcolor=options['bg'])
+        self._status.configure(**options)
+
+    def _callback_operation(self, operation: Operation):
+        """Callback. Diagram was changed.
+        """
+        self._index.apply(operation)
+
+    def _update_results(self):
+        """Search by current query and highlight results.
+        """
+        self._results = self._index.search(self._query.get())
+        self._current = -1
+        self._workspace.highlight_nodes(self._results)
+        self._update_status()
+
+    def _jump(self, step: int):
+        """Show next (or previous) found node.
+        """
+        if not self._results:
+            return
+        self._current = (self._current + step) % len(self._results)
+        self._workspace.show_node(self._results[self._current])
+        self._update_status()
+
+    def _update_status(self):
+        """Show number of current result and amount of results.
+        """
+        if not self._query.get().strip():
+            text = ''
+        elif self._current < 0:
+            text = f'{len(self._results)} found'
+        else:
+            text = f'{self._current + 1}/{len(self._results)}'
+        self._status['text'] = text
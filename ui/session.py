@@ -0,0 +1,215 @@
+"""Recording of user sessions in the workspace, and their replay with
+latency measurement.
+
+Replay from the recorded file, in a window (without a display, run it
+under a virtual one, f.e. Xvfb):
+    python -m ui.session <session.jsonl> [--realtime] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tkinter as tk
+from dataclasses import asdict
+from typing import Callable, Optional
+
+from core.aliases import TkEvent
+from core.sessions import Session, SessionEvent, LatencyReport
+from core.templates import NodeTemplate
+from ui.workspace import Workspace
+
+
+class SessionRecorder:
+    """Records events, handled by the workspace, with their times.
+    Toolbar clicks are not workspace events: instead, the toolbar's
+    template, popped by an event, is recorded with that event.
+    """
+    def __init__(self):
+        """Init.
+        """
+        self._workspace: Optional[Workspace] = None
+        self._session: Optional[Session] = None
+        self._started = 0.0
+
+    def attach(self, workspace: Workspace):
+        """Listen to events of the workspace.
+        """
+        self._workspace = workspace
+        workspace.add_event_listener(self._callback_event)
+
+    def wrap_toolbar(
+            self, pop_selection: Callable[[], Optional[NodeTemplate]]
+    ) -> Callable[[], Optional[NodeTemplate]]:
+        """Get toolbar's selection callback for the workspace, recording
+        popped templates.
+        """
+        def pop_and_record() -> Optional[NodeTemplate]:
+            template = pop_selection()
+            if template and self._session and self._session.events:
+                self._session.events[-1].template = asdict(template)
+            return template
+        return pop_and_record
+
+    @property
+    def is_recording(self) -> bool:
+        """Is session being recorded.
+        """
+        return self._session is not None
+
+    def start(self):
+        """Start a new session from the current diagram and scroll
+        position.
+        """
+        self._session = Session(
+            self._workspace.get_document(), self._workspace.get_view()
+        )
+        self._started = time.perf_counter()
+
+    def stop(self) -> Session:
+        """Stop recording, get the recorded session.
+        """
+        session, self._session = self._session, None
+        return session
+
+    def _callback_event(self, sequence: str, event: TkEvent):
+        """Callback. Workspace is handling the event.
+        """
+        if self._session is None:
+            return
+        state = event.state if isinstance(event.state, int) else 0
+        keysym = event.keysym if isinstance(event.keysym, str) else ''
+        self._session.events.append(SessionEvent(
+            time.perf_counter() - self._started,
+            sequence, event.x, event.y, keysym, state
+        ))
+
+
+class SessionPlayer:
+    """Feeds recorded events to the workspace, measuring the latency of
+    each one: time of its handling, including redraws.
+    Events are fed synthetically, in the recorded order, so replay
+    doesn't depend on the window system; dialogs, opened by events
+    (node's text editing), are still interactive.
+    """
+    def __init__(self, master: tk.Misc):
+        """Init. Real-time replay is scheduled by master's timers.
+        """
+        self._master = master
+        self._workspace: Optional[Workspace] = None
+        self._template: Optional[NodeTemplate] = None
+
+    def attach(self, workspace: Workspace):
+        """Set the workspace to feed. It should be created with
+        `pop_toolbar_selection` as the toolbar's callback.
+        """
+        self._workspace = workspace
+
+    def pop_toolbar_selection(self) -> Optional[NodeTemplate]:
+        """Toolbar's selection callback for the workspace: replay toolbar
+        template, recorded with the current event.
+        """
+        template, self._template = self._template, None
+        return template
+
+    def prepare(self, session: Session):
+        """Restore the initial diagram and scroll position of the session.
+        """
+        self._workspace.clear()
+        self._workspace.add_document(session.document, keep_ids=True)
+        self._workspace.set_view(*session.view)
+        self._workspace.update_idletasks()
+
+    def replay(self, session: Session) -> LatencyReport:
+        """Replay all events as fast as possible.
+        """
+        self.prepare(session)
+        report = LatencyReport()
+        started = time.perf_counter()
+        for event in session.events:
+            report.add(event.sequence, self._feed(event))
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def replay_realtime(self, session: Session,
+                        on_done: Callable[[LatencyReport], None]):
+        """Replay events at their recorded times, in the main loop.
+        Events, which are late because of slow previous ones, are fed
+        at once; their delay is reported as lag.
+        """
+        self.prepare(session)
+        report = LatencyReport()
+        events = iter(session.events)
+        started = time.perf_counter()
+
+        def feed_next(event: Optional[SessionEvent]):
+            if event is None:
+                report.elapsed = time.perf_counter() - started
+                on_done(report)
+                return
+            lag = time.perf_counter() - started - event.time
+            report.add(event.sequence, self._feed(event), max(lag, 0.0))
+            schedule(next(events, None))
+
+        def schedule(event: Optional[SessionEvent]):
+            delay = 0 if event is None else \
+                event.time - (time.perf_counter() - started)
+            self._master.after(
+                max(int(delay * 1000), 0), feed_next, event
+            )
+
+        schedule(next(events, None))
+
+    def _feed(self, event: SessionEvent) -> float:
+        """Feed event to the workspace, get its latency.
+        """
+        tk_event = tk.Event()
+        tk_event.x, tk_event.y = event.x, event.y
+        tk_event.keysym, tk_event.state = event.keysym, event.state
+        tk_event.char = ''
+        self._template = event.get_template()
+
+        started = time.perf_counter()
+        self._workspace.dispatch(event.sequence, tk_event)
+        self._workspace.update_idletasks()
+        return time.perf_counter() - started
+
+
+# ---- START ---- #
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python -m ui.session',
+        description='Replay recorded session, report events\' latencies.'
+    )
+    parser.add_argument('session', help='recorded session file')
+    parser.add_argument('--realtime', action='store_true',
+                        help='replay at the recorded speed')
+    parser.add_argument('--json', action='store_true',
+                        help='print report as JSON')
+    args = parser.parse_args()
+
+    try:
+        replayed = Session.load(args.session)
+    except (OSError, ValueError) as e:
+        sys.exit(f'Can\'t load session: {e}')
+
+    root = tk.Tk()
+    root.title('Session replay')
+    player = SessionPlayer(root)
+    workspace = Workspace(
+        root, pop_selection_from_toolbar_callback=player.pop_toolbar_selection
+    )
+    workspace.draw_grid()
+    player.attach(workspace)
+
+    def print_report(report: LatencyReport):
+        print(json.dumps(report.to_dict()) if args.json else report.format())
+        root.destroy()
+
+    if args.realtime:
+        root.after_idle(player.replay_realtime, replayed, print_report)
+        root.mainloop()
+    else:
+        root.update()
+        print_report(player.replay(replayed))
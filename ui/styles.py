@@ -0,0 +1,117 @@
+"""Styles of canvas items, switched by tags.
+"""
+
+import tkinter as tk
+from typing import Any, Callable
+
+from core.enums import Gamma
+from core.themes import Style, Theme, DARK
+
+
+class Styles:
+    """Current theme, shared by all canvases.
+
+    Each styled canvas item carries tag of its style (and of its gamma,
+    if it's colored by gamma), so re-theming costs one `itemconfigure`
+    per style and gamma tag, instead of one per item.
+    State styles (selection, highlight) are overlays: the item gets
+    overlay's tag and options, and gets base options back on removal.
+    """
+    TAG_PREFIX = 'style-'
+    THEME: Theme = DARK
+    CANVASES: list[tk.Canvas] = []
+    # Widgets' styles are applied by listeners:
+    LISTENERS: list[Callable[[Theme], None]] = []
+
+    @classmethod
+    def get(cls, style: str) -> dict[str, Any]:
+        """Get options of the style.
+        """
+        return dict(cls.THEME.styles[style])
+
+    @classmethod
+    def tag(cls, style: str) -> str:
+        """Get canvas tag of the style.
+        """
+        return f'{cls.TAG_PREFIX}{style}'
+
+    @classmethod
+    def get_gamma_color(cls, gamma: Gamma, secondary: bool = False) -> str:
+        """Get gamma's main or secondary color.
+        """
+        color = cls.THEME.gammas[gamma.name]
+        return color.secondary_color if secondary else color.main_color
+
+    @classmethod
+    def gamma_tag(cls, gamma: Gamma, secondary: bool = False,
+                  outline: bool = False) -> str:
+        """Get canvas tag of items, filled (or outlined, if outline is
+        set) by gamma's main or secondary color.
+        """
+        suffix = '-secondary' if secondary else ''
+        if outline:
+            suffix += '-outline'
+        return f'{cls.TAG_PREFIX}gamma-{gamma.name}{suffix}'
+
+    @classmethod
+    def add_canvas(cls, canvas: tk.Canvas):
+        """Register canvas, which items are re-styled on theme switching.
+        """
+        cls.CANVASES.append(canvas)
+
+    @classmethod
+    def add_listener(cls, listener: Callable[[Theme], None]):
+        """Subscribe listener to theme switching.
+        """
+        cls.LISTENERS.append(listener)
+
+    @classmethod
+    def remove_canvas(cls, canvas: tk.Canvas):
+        """Unregister canvas, f.e. before its destroying.
+        """
+        cls.CANVASES.remove(canvas)
+
+    @classmethod
+    def remove_listener(cls, listener: Callable[[Theme], None]):
+        """Unsubscribe listener from theme switching.
+        """
+        cls.LISTENERS.remove(listener)
+
+    @classmethod
+    def set_theme(cls, theme: Theme):
+        """Switch theme and re-style all canvases and widgets.
+        """
+        cls.THEME = theme
+        for canvas in cls.CANVASES:
+            for style in Style.CANVAS_ITEMS + Style.OVERLAYS:
+                canvas.itemconfigure(cls.tag(style), **cls.get(style))
+            for gamma in Gamma:
+                cls._configure_gamma(canvas, gamma)
+        for listener in cls.LISTENERS:
+            listener(theme)
+
+    @classmethod
+    def _configure_gamma(cls, canvas: tk.Canvas, gamma: Gamma):
+        """Apply gamma's colors to canvas items.
+        """
+        for secondary in (False, True):
+            color = cls.get_gamma_color(gamma, secondary)
+            canvas.itemconfigure(cls.gamma_tag(gamma, secondary), fill=color)
+            canvas.itemconfigure(
+                cls.gamma_tag(gamma, secondary, outline=True), outline=color
+            )
+
+    @classmethod
+    def put_overlay(cls, canvas: tk.Canvas, item: int, overlay: str):
+        """Put overlay style over item's style.
+        """
+        canvas.addtag_withtag(cls.tag(overlay), item)
+        canvas.itemconfigure(item, **cls.get(overlay))
+
+    @classmethod
+    def remove_overlay(cls, canvas: tk.Canvas, item: int, overlay: str,
+                       base: str):
+        """Remove overlay style, return item to its base style.
+        """
+        canvas.dtag(item, cls.tag(overlay))
+        canvas.itemconfigure(item, **cls.get(base))
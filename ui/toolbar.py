@@ -4,81 +4,199 @@
 import tkinter as tk
 from typing import Union, Optional
 
-from core.enums import Gamma, Ability, TkEvents
+from core.enums import Ability, TkEvents
 from core.registry import Registry
+from core.templates import NodeTemplate, TemplateLibrary
+from core.themes import Style, Theme
 
 from ui.elements.icon import Icon
+from ui.styles import Styles
 
 
 class Toolbar:
-    """Left toolbar class.
+    """Left toolbar: palette of node templates with type-ahead filter.
+
+    The palette is virtualized: icons are created only for rows in
+    the visible part of the scrolled canvas, with ROWS_MARGIN around,
+    and deleted, when their rows are scrolled out. So scrolling and
+    filtering cost doesn't depend on the amount of templates.
+    Enter in the filter selects the first shown template, Escape clears
+    the filter.
     """
-    TOOLBAR_WIDTH = 60
-    TOOLBAR_HEIGHT = 2000
-    COLOR_BG = '#303030'
-    COLOR_SELECT = '#A0D500'
+    TOOLBAR_WIDTH = 150
+    ICON_HEIGHT = 30
+    ICON_MARGIN = 5
+    ROW_HEIGHT = ICON_HEIGHT + ICON_MARGIN
+    ROWS_MARGIN = 2
 
     def __init__(self, master: Union[tk.Widget, tk.Tk]):
         """Init.
         """
-        self._selected_item: Optional[Icon] = None
-
-        toolbar_frame = tk.Frame(master, width=self.TOOLBAR_WIDTH)
-        toolbar_frame.pack(side=tk.LEFT)
+        self._library = TemplateLibrary([])
+        # Templates, passed by the filter:
+        self._shown: list[NodeTemplate] = []
+        # Created icons by their rows:
+        self._icons: dict[int, Icon] = {}
+        self._selected: Optional[NodeTemplate] = None
+
+        self._frame = tk.Frame(master, width=self.TOOLBAR_WIDTH)
+        self._frame.pack(side=tk.LEFT, fill=tk.Y)
+
+        self._query = tk.StringVar(self._frame)
+        self._query.trace_add('write', lambda *_: self._callback_filter())
+        entry = tk.Entry(self._frame, textvariable=self._query)
+        entry.pack(side=tk.TOP, fill=tk.X)
+        entry.bind(TkEvents.RETURN, self._callback_select_first)
+        entry.bind(TkEvents.ESCAPE, lambda _: self._query.set(''))
+
+        self._scrollbar = tk.Scrollbar(self._frame, orient=tk.VERTICAL)
+        self._scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         self._canvas = tk.Canvas(
-            toolbar_frame,
-            bg=self.COLOR_BG,
+            self._frame,
+            **Styles.get(Style.TOOLBAR),
             width=self.TOOLBAR_WIDTH,
-            height=self.TOOLBAR_HEIGHT,
-            highlightthickness=0
+            highlightthickness=0,
+            yscrollincrement=self.ROW_HEIGHT,
+            yscrollcommand=self._callback_scroll
         )
+        self._scrollbar.configure(command=self._canvas.yview)
 
         self._canvas.bind(
             TkEvents.MOUSE_LEFT_BUTTON_CLICK,
             self._callback_mouse_1
         )
-        self._canvas.pack(expand=tk.Y, fill=tk.BOTH)
+        self._canvas.bind(TkEvents.MOUSE_WHEEL, self._callback_wheel)
+        self._canvas.bind(
+            TkEvents.MOUSE_WHEEL_UP,
+            lambda _: self._canvas.yview_scroll(-1, tk.UNITS)
+        )
+        self._canvas.bind(
+            TkEvents.MOUSE_WHEEL_DOWN,
+            lambda _: self._canvas.yview_scroll(1, tk.UNITS)
+        )
+        self._canvas.pack(side=tk.LEFT, expand=tk.Y, fill=tk.BOTH)
+        Styles.add_canvas(self._canvas)
+        self._callback_theme(Styles.THEME)
+        Styles.add_listener(self._callback_theme)
+
+    def populate(self, library: Optional[TemplateLibrary] = None):
+        """Fill the palette with templates of the library, the default one,
+        if it's not given.
+        It's not done on creation, so the window may be shown before.
+        """
+        self._library = library or TemplateLibrary.default()
+        self._drop_selection()
+        self._callback_filter()
+
+    def _callback_theme(self, _: Theme):
+        """Callback. Theme was switched.
+        """
+        options = Styles.get(Style.TOOLBAR)
+        self._frame.configure(**options)
+        self._canvas.configure(**options)
+
+    def _callback_filter(self):
+        """Callback. Filter was changed: show matching templates from
+        the top.
+        """
+        self._shown = self._library.filter(self._query.get())
+        for icon in self._icons.values():
+            icon.delete()
+        self._icons.clear()
+        self._canvas.configure(scrollregion=(
+            0, 0, self.TOOLBAR_WIDTH, len(self._shown) * self.ROW_HEIGHT
+        ))
+        self._canvas.yview_moveto(0)
+        self._update_icons()
+
+    def _callback_select_first(self, _: tk.Event):
+        """Callback. Select the first shown template.
+        """
+        self._drop_selection()
+        if self._shown:
+            self._selected = self._shown[0]
+            icon = self._icons.get(0)
+            if icon:
+                icon.draw_selection()
+
+    def _callback_scroll(self, first: str, last: str):
+        """Callback. Canvas view was scrolled or resized.
+        """
+        self._scrollbar.set(first, last)
+        self._update_icons()
 
-        # --------------- JUST FOR TESESING ---------------- #
+    def _callback_wheel(self, event: tk.Event):
+        """Callback. Mouse wheel was turned.
+        """
+        self._canvas.yview_scroll(-1 if event.delta > 0 else 1, tk.UNITS)
 
-        for n, gamma in enumerate(Gamma):
-            Icon(
-                canvas=self._canvas,
-                x=5,
-                y=35 * n + 5,
-                width=self.TOOLBAR_WIDTH - 10,
-                height=30,
-                gamma=gamma
-            )
+    def _update_icons(self):
+        """Create icons of rows, scrolled into view, delete icons of rows,
+        scrolled out of it.
+        """
+        top = self._canvas.canvasy(0)
+        bottom = top + self._canvas.winfo_height()
+        first = max(int(top // self.ROW_HEIGHT) - self.ROWS_MARGIN, 0)
+        last = min(
+            int(bottom // self.ROW_HEIGHT) + self.ROWS_MARGIN,
+            len(self._shown) - 1
+        )
+        for row in [row for row in self._icons if not first <= row <= last]:
+            self._icons.pop(row).delete()
+        for row in range(first, last + 1):
+            if row not in self._icons:
+                self._icons[row] = self._create_icon(row)
+
+    def _create_icon(self, row: int) -> Icon:
+        """Create icon of the row's template.
+        """
+        margin = self.ICON_MARGIN
+        icon = Icon(
+            canvas=self._canvas,
+            x=margin,
+            y=row * self.ROW_HEIGHT + margin,
+            width=self.TOOLBAR_WIDTH - 2 * margin,
+            height=self.ICON_HEIGHT,
+            template=self._shown[row]
+        )
+        if icon.template is self._selected:
+            icon.draw_selection()
+        return icon
 
     def _callback_mouse_1(self, event: tk.Event):
         """Callback. Mouse button-1 was pressed.
         """
-        id_ = self._canvas.find_closest(event.x, event.y, halo=0)
+        id_ = self._canvas.find_closest(
+            self._canvas.canvasx(event.x),
+            self._canvas.canvasy(event.y),
+            halo=0
+        )
         tags = self._canvas.gettags(id_)
         last_selected = self.pop_selected()
 
         if Ability.SELECT in tags:
             tag_id = Registry.get_id_from_tags(tags)
-            item = Registry.get(tag_id)
+            item = Registry.get(tag_id, self._canvas)
 
-            if item != last_selected:
+            if item.template is not last_selected:
                 item.draw_selection()
-                self._selected_item = item
+                self._selected = item.template
 
-    def pop_selected(self) -> Optional[Icon]:
-        """Get Icon instance and clear selection, if selected.
+    def pop_selected(self) -> Optional[NodeTemplate]:
+        """Get selected template and clear selection, if selected.
         None instead.
         """
-        item = self._selected_item
-        if item:
+        template = self._selected
+        if template:
             self._drop_selection()
-            return item
+            return template
 
     def _drop_selection(self):
-        """Remove selection focus from Icon.
+        """Remove selection focus from template's icon.
         """
-        if self._selected_item:
-            self._selected_item.clear_selection()
-            self._selected_item = None
+        if self._selected:
+            for icon in self._icons.values():
+                if icon.template is self._selected:
+                    icon.clear_selection()
+            self._selected = None
@@ -2,17 +2,44 @@
 """
 
 import tkinter as tk
-from typing import Union, Optional, Callable
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from functools import partial
+from tkinter import simpledialog
+from typing import Union, Optional, Callable, Iterable, Iterator, \
+    Sequence
 
-from core.aliases import Coords, TkEvent
+from core.aliases import Box, Coords, TkEvent
+from core.alignment import AlignmentIndex, snap_to_grid
+from core.diff import ChangeKind, DiagramDiff
+from core.document import Document, GroupData, NodeData, EdgeData
 from core.enums import Ability, TkEvents
+from core.memory import MemoryReport
+from core.operations import Operation, OperationKind
 from core.interfaces import Draggable, Selectable, Removable, Connectible
+from core.ports import Port
 from core.registry import Registry
+from core.rules import ConnectionRules, RulesChecker
+from core.templates import NodeTemplate
+from core.themes import Style, Theme
 
+from ui.batch import CanvasBatch
+from ui.edge_bundler import EdgeBundler
+from ui.edge_labeler import EdgeLabeler
 from ui.elements.node import Node
-from ui.elements.icon import Icon
+from ui.elements.group_node import GroupNode, AggregateEdge
 from ui.elements.directed_edge import DirectedEdge
 from ui.elements.temporary_connector import TemporaryConnector
+from ui.styles import Styles
+
+
+@dataclass
+class DiagramIndexes:
+    """Indexes of the diagram, shared by all its views.
+    """
+    # Guide lines of nodes, to align dragged ones with:
+    alignment: AlignmentIndex = field(default_factory=AlignmentIndex)
+    rules: Optional[RulesChecker] = None
 
 
 class Workspace:
@@ -23,80 +50,162 @@ class Workspace:
     CANVAS_HEIGHT = 2305
     EMPTY_FIELD_WIDTH = 50
 
-    COLOR_BG = '#3C3C3C'
-    COLOR_GRID = '#505050'
-    COLOR_SELECT = '#A0D500'
+    GRID_CELL = 128
+
+    # Step of snap-to-grid, a fraction of the drawn grid cell:
+    SNAP_GRID_STEP = 16
+    # Max distance, from which dragged nodes snap to smart guides:
+    SNAP_DISTANCE = 8
+    TAG_GUIDE = 'alignment-guide'
+
+    # Offset of pasted nodes from the copied ones:
+    PASTE_OFFSET = 30
+    # Pasted nodes are selected, only if there are not too many of them:
+    PASTE_SELECTION_LIMIT = 50
+
+    SEARCH_MATCH_MARGIN = 6
+    # Tags of nodes' items, matched by search, and of their highlights:
+    TAG_SEARCH_MATCH = 'search-match'
+    TAG_SEARCH_HIGHLIGHT = 'search-highlight'
+
+    # Gap between a changed node and outlines of its changes:
+    DIFF_MARGIN = 8
+    TAG_DIFF = 'diff'
+    DIFF_STYLES = {
+        ChangeKind.ADDED: Style.DIFF_ADDED,
+        ChangeKind.MOVED: Style.DIFF_MOVED,
+        ChangeKind.RECOLORED: Style.DIFF_RECOLORED,
+        ChangeKind.EDITED: Style.DIFF_EDITED,
+    }
+    # Existing edges are highlighted by styles of their changes:
+    DIFF_EDGE_STYLES = {
+        ChangeKind.ADDED: Style.DIFF_EDGE_ADDED,
+        ChangeKind.EDITED: Style.DIFF_EDGE_EDITED,
+    }
 
     def __init__(self,
                  master: Union[tk.Widget, tk.Tk],
-                 pop_selection_from_toolbar_callback: Callable[[], Icon]):
+                 pop_selection_from_toolbar_callback: Callable[
+                     [], Optional[NodeTemplate]
+                 ],
+                 view_of: Optional['Workspace'] = None):
         """Init.
+        If view_of is given, the workspace is one more view of its
+        diagram, sharing its indexes; see `apply_operations`.
         """
-        self._dragged_item: Optional[Draggable] = None
+        self._dragged_items: list[Draggable] = []
         self._selected_item: Optional[Selectable] = None
+        # Nodes, added to selection with Shift, besides the selected item:
+        self._extra_selection: list[Node] = []
+        self._nodes: dict[str, Node] = {}
+        self._paste_count = 0
+        self._drag_moved = False
+        self._operation_listeners: list[Callable[[Operation], None]] = []
+        self._drag_listeners: list[Callable[[Sequence[Node]], None]] = []
+        self._filter_enabled = False
+        self._indexes = view_of._indexes if view_of else DiagramIndexes()
+        self._snap_to_grid_enabled = False
+        # Not snapped bounding box of dragged nodes, and their ids:
+        self._drag_box: Optional[Box] = None
+        self._drag_ids: frozenset = frozenset()
+        self._scroll_region = (
+            -self.EMPTY_FIELD_WIDTH,
+            -self.EMPTY_FIELD_WIDTH,
+            self.CANVAS_WIDTH + self.EMPTY_FIELD_WIDTH,
+            self.CANVAS_HEIGHT + self.EMPTY_FIELD_WIDTH
+        )
         self._temp_connector: Optional[TemporaryConnector] = None
         self._current_target: Optional[Connectible] = None
+        self._current_target_port = ''
         self._last_coords: Coords
+        # Timer of adding the next batch, see `import_batches`:
+        self._batches_timer = ''
+        # Operations of another view or editor are being applied:
+        self._is_applying = False
 
         self._pop_selection_from_toolbar = pop_selection_from_toolbar_callback
 
         # 1. Create workspace:
 
-        workspace_frame = tk.Frame(master)
-        workspace_frame.pack(side=tk.LEFT)
+        self._frame = tk.Frame(master)
+        self._frame.pack(side=tk.LEFT)
 
         self._canvas = tk.Canvas(
-            workspace_frame,
-            bg=self.COLOR_BG,
+            self._frame,
+            **Styles.get(Style.WORKSPACE),
             width=self.CANVAS_WIDTH,
             height=self.CANVAS_HEIGHT,
             confine=True,
-            scrollregion=(
-                -self.EMPTY_FIELD_WIDTH,
-                -self.EMPTY_FIELD_WIDTH,
-                self.CANVAS_WIDTH + self.EMPTY_FIELD_WIDTH,
-                self.CANVAS_HEIGHT + self.EMPTY_FIELD_WIDTH
-            )
+            scrollregion=self._scroll_region
         )
         self._canvas.pack(expand=tk.Y, fill=tk.BOTH)
+        self._bundler = EdgeBundler(self._canvas, self._nodes.values)
+        self._labeler = EdgeLabeler(
+            self._canvas, self.get_visible_box, self._bundler
+        )
+        self._labeler.start()
+        Styles.add_canvas(self._canvas)
+        Styles.add_listener(self._callback_theme)
 
-        # 2. Draw workspaces grid:
-
-        for y in range(0, self.CANVAS_HEIGHT, 128):
-            self._canvas.create_line(
-                0, y, self.CANVAS_WIDTH, y, fill=self.COLOR_GRID
-            )
-        for x in range(0, self.CANVAS_WIDTH, 128):
-            self._canvas.create_line(
-                x, 0, x, self.CANVAS_HEIGHT, fill=self.COLOR_GRID
-            )
+        # 2. Bind events:
 
-        # 3. Bind events:
+        self._handlers: dict[str, Callable[[TkEvent], None]] = {
+            TkEvents.MOUSE_RIGHT_BUTTON_DOWN:
+                lambda e: self._canvas.scan_mark(e.x, e.y),
+            TkEvents.MOUSE_RIGHT_BUTTON_DRAG:
+                lambda e: self._canvas.scan_dragto(e.x, e.y, gain=1),
+            TkEvents.MOUSE_LEFT_BUTTON_DOWN: self._callback_mouse_1_down,
+            TkEvents.MOUSE_LEFT_BUTTON_SHIFT_DOWN:
+                self._callback_mouse_1_shift_down,
+            TkEvents.MOUSE_LEFT_BUTTON_DOUBLE_CLICK:
+                self._callback_mouse_1_double_click,
+            TkEvents.MOUSE_LEFT_BUTTON_DRAG: self._callback_mouse_1_drag,
+            TkEvents.MOUSE_LEFT_BUTTON_RELEASE: self._callback_mouse_1_up,
+            TkEvents.KEY_PRESSED: self._callback_key_pressed,
+            TkEvents.COPY: self._callback_copy,
+            TkEvents.PASTE: self._callback_paste,
+            TkEvents.DUPLICATE: self._callback_duplicate,
+            TkEvents.GROUP: self._callback_group,
+            TkEvents.EXPAND_GROUP: self._callback_expand_group,
+            TkEvents.BUNDLE_EDGES: lambda _: self._bundler.toggle(),
+            TkEvents.SNAP_TO_GRID: self._callback_snap_to_grid,
+        }
+        self._event_listeners: list[Callable[[str, TkEvent], None]] = []
+        for sequence in self._handlers:
+            self._canvas.bind(sequence, partial(self.dispatch, sequence))
 
-        self._canvas.bind(
-            TkEvents.MOUSE_RIGHT_BUTTON_DOWN,
-            lambda e: self._canvas.scan_mark(e.x, e.y)
-        )
-        self._canvas.bind(
-            TkEvents.MOUSE_RIGHT_BUTTON_DRAG,
-            lambda e: self._canvas.scan_dragto(e.x, e.y, gain=1)
-        )
-        self._canvas.bind(
-            TkEvents.MOUSE_LEFT_BUTTON_DOWN,
-            self._callback_mouse_1_down
-        )
-        self._canvas.bind(
-            TkEvents.MOUSE_LEFT_BUTTON_DRAG,
-            self._callback_mouse_1_drag
-        )
-        self._canvas.bind(
-            TkEvents.MOUSE_LEFT_BUTTON_RELEASE,
-            self._callback_mouse_1_up
-        )
-        self._canvas.bind(
-            TkEvents.KEY_PRESSED,
-            self._callback_key_pressed
+    def draw_grid(self):
+        """Draw workspace's grid under all items, by a single canvas call.
+        It's not drawn on creation, so the window may be shown before.
+        """
+        batch = CanvasBatch(self._canvas)
+        options = dict(
+            **Styles.get(Style.GRID), tags=(Styles.tag(Style.GRID),)
         )
+        for y in range(0, self.CANVAS_HEIGHT, self.GRID_CELL):
+            batch.create('line', (0, y, self.CANVAS_WIDTH, y), **options)
+        for x in range(0, self.CANVAS_WIDTH, self.GRID_CELL):
+            batch.create('line', (x, 0, x, self.CANVAS_HEIGHT), **options)
+        batch.flush()
+        self._canvas.tag_lower(Styles.tag(Style.GRID))
+
+    @property
+    def _alignment(self) -> AlignmentIndex:
+        """Guide lines of nodes, to align dragged ones with.
+        """
+        return self._indexes.alignment
+
+    @property
+    def _rules(self) -> Optional[RulesChecker]:
+        """Checker of new connections, if rules are set.
+        """
+        return self._indexes.rules
+
+    def _callback_theme(self, _: Theme):
+        """Callback. Theme was switched: canvas items are already
+        re-styled, the canvas itself is left.
+        """
+        self._canvas.configure(**Styles.get(Style.WORKSPACE))
 
     def _get_absolute_coords(self, x: int, y: int) -> Coords:
         """Get absolute Canvas coords.
@@ -114,40 +223,157 @@ class Workspace:
         x, y = self._get_absolute_coords(event.x, event.y)
         self._last_coords = x, y
 
-        # Check, if some icon on toolbar was previously selected.
+        # Check, if some template on toolbar was previously selected.
         # Create a new element, if it was.
-        toolbar_icon = self._pop_selection_from_toolbar()
-        if toolbar_icon:
-            Node(self._canvas, x - 10, y - 10, toolbar_icon.gamma)
+        template = self._pop_selection_from_toolbar()
+        if template:
+            node = Node(
+                self._canvas, x - 10, y - 10, template.gamma_value,
+                template.text_head, template.text_desc,
+                inputs=template.inputs,
+                outputs=template.outputs,
+                width=template.width,
+                height=template.height
+            )
+            self._nodes[node.tag_id] = node
+            self._index_nodes([node])
+            self._emit(Operation.create_node(node.to_data()))
 
         id_ = self._canvas.find_closest(x, y, halo=3)
         tags = self._canvas.gettags(id_)
-        if self._selected_item:
-            if Ability.CONNECT_SOURCE in tags:
-                # Start temporary connector flow, instead of selection/drag.
-                self._temp_connector = TemporaryConnector(
-                    self._canvas,
-                    self._selected_item
-                )
-                return
+        tag_id = Registry.get_id_from_tags(tags)
 
-            self._selected_item.clear_selection()
-            self._selected_item = None
+        if Ability.CONNECT_SOURCE in tags:
+            # Start temporary connector flow, instead of selection/drag.
+            self._update_rules()
+            self._temp_connector = TemporaryConnector(
+                self._canvas,
+                Registry.get(tag_id, self._canvas),
+                Port.get_name_from_tags(tags)
+            )
+            return
+
+        selection = self._get_selection()
+        item = Registry.get(tag_id, self._canvas) \
+            if Ability.SELECT in tags else None
 
-        if Ability.SELECT in tags:
-            tag_id = Registry.get_id_from_tags(tags)
-            item = Registry.get(tag_id)
+        # Click on already selected item keeps selection, to drag it whole:
+        if item is None or item not in selection:
+            self._clear_selection()
+            if item:
+                item.draw_selection()
+                self._selected_item = item
+            selection = [item] if item else []
+
+        if Ability.DRAG in tags:
+            self._dragged_items = [
+                i for i in selection if isinstance(i, Draggable)
+            ]
+            self._start_drag()
+
+    def _callback_mouse_1_shift_down(self, event: TkEvent):
+        """Callback. Mouse button-1 was down with Shift pressed.
+        Add Node to selection, or remove it from selection.
+        """
+        self._canvas.focus_set()
+        x, y = self._get_absolute_coords(event.x, event.y)
+
+        id_ = self._canvas.find_closest(x, y, halo=3)
+        tags = self._canvas.gettags(id_)
+        if Ability.DRAG not in tags:
+            return
+
+        item = Registry.get(
+            Registry.get_id_from_tags(tags), self._canvas
+        )
+        if item == self._selected_item:
+            item.clear_selection()
+            self._selected_item = None
+        elif item in self._extra_selection:
+            item.clear_selection()
+            self._extra_selection.remove(item)
+        else:
             item.draw_selection()
-            self._selected_item = item
+            self._extra_selection.append(item)
 
-            if Ability.DRAG in tags:
-                self._dragged_item = item
+    def _callback_mouse_1_double_click(self, event: TkEvent):
+        """Callback. Mouse button-1 was double-clicked.
+        Edit node's header or description text, or edge's label.
+        """
+        x, y = self._get_absolute_coords(event.x, event.y)
+        id_ = self._canvas.find_closest(x, y, halo=3)
+        tags = self._canvas.gettags(id_)
+        if Ability.SELECT in tags or EdgeLabeler.TAG_LABEL in tags:
+            edge = self.get_edge(Registry.get_id_from_tags(tags))
+            if edge:
+                self._edit_label(edge)
+                return
+        if Ability.DRAG not in tags:
+            return
+
+        node = Registry.get(
+            Registry.get_id_from_tags(tags), self._canvas
+        )
+        text_head, text_desc = node.text_head, node.text_desc
+        if node.is_header_point(y):
+            text_head = simpledialog.askstring(
+                'Node', 'Header:', initialvalue=text_head, parent=self._canvas
+            )
+        else:
+            text_desc = simpledialog.askstring(
+                'Node', 'Description:', initialvalue=text_desc,
+                parent=self._canvas
+            )
+        if text_head is None or text_desc is None:
+            return
+
+        node.set_text(text_head, text_desc)
+        self._emit(Operation.edit(node.tag_id, text_head, text_desc))
+
+    def _edit_label(self, edge: DirectedEdge):
+        """Ask for edge's new label.
+        """
+        label = simpledialog.askstring(
+            'Edge', 'Label:', initialvalue=edge.label, parent=self._canvas
+        )
+        if label is None or label == edge.label:
+            return
+        edge.set_label(label)
+        self._emit(Operation.label(edge.tag_id, label))
+
+    def _get_selection(self) -> list[Selectable]:
+        """Get all selected items.
+        """
+        if self._selected_item:
+            return [self._selected_item] + self._extra_selection
+        return list(self._extra_selection)
+
+    def _get_selected_nodes(self) -> list[Node]:
+        """Get selected Nodes.
+        """
+        return [i for i in self._get_selection() if isinstance(i, Node)]
+
+    def _clear_selection(self):
+        """Remove selection focus from all selected items.
+        """
+        for item in self._get_selection():
+            item.clear_selection()
+        self._selected_item = None
+        self._extra_selection = []
 
     def _callback_mouse_1_up(self, _: TkEvent):
         """Callback. Mouse button-1 was up.
         """
-        # disable dragging mode
-        self._dragged_item = None
+        # disable dragging mode, the whole gesture is a single move:
+        if self._drag_moved:
+            moved = [i for i in self._dragged_items if isinstance(i, Node)]
+            self._index_nodes(moved)
+            for node in moved:
+                self._emit(Operation.move(node.tag_id, *node.position))
+            self._drag_moved = False
+        self._dragged_items = []
+        self._drag_box = None
+        self._canvas.delete(self.TAG_GUIDE)
 
         # that's all, if we have no active temporary connector...
         if not self._temp_connector:
@@ -156,15 +382,17 @@ class Workspace:
         # ...otherwise, let's create permanent connector, if we have a target.
         if self._current_target:
             self._current_target.turn_highlight_off()
-            DirectedEdge(
+            edge = DirectedEdge(
                 self._canvas,
                 source=self._temp_connector.source,
-                target=self._current_target
+                target=self._current_target,
+                source_port=self._temp_connector.source_port,
+                target_port=self._current_target_port
             )
+            self._labeler.add([edge])
+            self._emit(Operation.connect(edge.to_data()))
             self._current_target = None
-            self._canvas.tag_raise(
-                Registry.get_tag_id(self._temp_connector.source)
-            )
+            self._canvas.tag_raise(self._temp_connector.source.tag_id)
 
         # ...and delete temporary connector in any case.
         self._temp_connector.delete()
@@ -176,67 +404,1081 @@ class Workspace:
         x, y = self._get_absolute_coords(event.x, event.y)
         if self._temp_connector:
             self._move_temporary_connector(x, y)
-        elif self._dragged_item:
+        elif self._dragged_items:
             self._drag_current(x, y)
 
     def _move_temporary_connector(self, x: int, y: int):
         """Move target point of temporary connector.
+        Over a connectible node, it snaps to the nearest compatible
+        input port.
         """
-        # 1. Move temporary connector:
-        x0, y0 = self._last_coords
-        self._temp_connector.move_target_point(x - x0, y - y0)
         self._last_coords = x, y
 
-        # 2. Check for possible Connectible obj, target it, if we can:
+        # 1. Check for possible Connectible obj, target it, if we can:
         for id_ in self._canvas.find_overlapping(x, y, x + 1, y + 1):
             tags = self._canvas.gettags(id_)
             if Ability.CONNECT in tags:
                 tag_id = Registry.get_id_from_tags(tags)
-                item = Registry.get(tag_id)
-                if self._try_to_target_item(item):
+                item = Registry.get(tag_id, self._canvas)
+                if self._try_to_target_item(item, y):
+                    self._temp_connector.set_target_point(
+                        *item.get_input_point(self._current_target_port)
+                    )
                     return
 
-        # 3. Otherwise, clear
+        # 2. Otherwise, clear
+        self._temp_connector.set_target_point(x, y)
         if self._current_target:
             self._current_target.turn_highlight_off()
             self._current_target = None
+            self._current_target_port = ''
             self._temp_connector.mark_as_target_is_not_found()
 
-    def _try_to_target_item(self, item: Connectible) -> bool:
-        """Try to target some Connectible by curent temporary connector.
+    def _try_to_target_item(self, item: Connectible, y: int) -> bool:
+        """Try to target some Connectible by curent temporary connector,
+        at its input port, nearest to y coord.
         Returns True, if was success, else False.
         """
+        source = self._temp_connector.source
+        source_port = self._temp_connector.source_port
+
         # We don't need to target connector's source
-        if item == self._temp_connector.source:
+        if item == source:
             return False
 
-        # We don't need to re-target the same node:
-        if item == self._current_target:
+        # Port index gives the nearest compatible port without scanning
+        # all the ports:
+        target_port = ''
+        if isinstance(item, Node):
+            port = item.find_input_port(
+                y, source.output_ports.get(source_port)
+            )
+            if port is None:
+                return False
+            target_port = port.name
+
+        # We don't need to re-target the same port:
+        if item == self._current_target \
+                and target_port == self._current_target_port:
             return True
 
-        # We don't want to target already connected node:
-        if item.is_already_connected_with(self._temp_connector.source):
+        # We don't want to target already connected port:
+        if item.is_already_connected_with(source, source_port, target_port):
+            return False
+
+        # Connection should follow the rules:
+        if self._rules and self._rules.check(source.tag_id, item.tag_id):
             return False
 
-        # Otherwise, let's target this node:
+        # Otherwise, let's target this port:
         if self._current_target:
             self._current_target.turn_highlight_off()
         self._current_target = item
+        self._current_target_port = target_port
         item.turn_highlight_on()
         self._temp_connector.mark_as_target_is_found()
         return True
 
     def _drag_current(self, x: int, y: int):
-        """Drag previously selected item.
+        """Drag previously selected items.
+        Dragged nodes snap to the grid (if enabled) and to smart guides:
+        lines of other nodes' edges and centers.
         """
         x0, y0 = self._last_coords
-        self._dragged_item.move(x - x0, y - y0)
         self._last_coords = x, y
+        if self._drag_box is None:
+            delta_x, delta_y = x - x0, y - y0
+        else:
+            delta_x, delta_y = self._get_snapped_delta(x - x0, y - y0)
+        for item in self._dragged_items:
+            item.move(delta_x, delta_y)
+        self._drag_moved = True
+        self._bundler.nodes_moved(self._dragged_items)
+        if self._drag_listeners:
+            nodes = [i for i in self._dragged_items if isinstance(i, Node)]
+            for listener in self._drag_listeners:
+                listener(nodes)
+        if self._drag_box is not None:
+            self._draw_guides()
+
+    # ---------------------- EVENTS ------------------------- #
+
+    @property
+    def sequences(self) -> list[str]:
+        """Sequences of events, handled by the workspace.
+        """
+        return list(self._handlers)
+
+    def add_event_listener(self, listener: Callable[[str, TkEvent], None]):
+        """Subscribe listener to handled events: it gets event's sequence
+        and the event itself, before the event is handled.
+        """
+        self._event_listeners.append(listener)
+
+    def dispatch(self, sequence: str, event: TkEvent):
+        """Handle event, bound by the sequence. Used by bindings and to
+        feed synthetic events.
+        """
+        for listener in self._event_listeners:
+            listener(sequence, event)
+        self._handlers[sequence](event)
+
+    def update_idletasks(self):
+        """Process pending redraws of the canvas.
+        """
+        self._canvas.update_idletasks()
+
+    def get_view(self) -> tuple[float, float]:
+        """Get scroll position: fractions of scroll region, left of and
+        above the visible area.
+        """
+        return self._canvas.xview()[0], self._canvas.yview()[0]
+
+    def set_view(self, x_fraction: float, y_fraction: float):
+        """Scroll to the position, got by `get_view`.
+        """
+        self._canvas.xview_moveto(x_fraction)
+        self._canvas.yview_moveto(y_fraction)
+
+    # ---------------------- ALIGNMENT ------------------------- #
+
+    def _callback_snap_to_grid(self, _: TkEvent):
+        """Callback. Turn snap-to-grid on/off.
+        """
+        self._snap_to_grid_enabled = not self._snap_to_grid_enabled
+
+    @staticmethod
+    def _get_box(nodes: Iterable[Node]) -> Box:
+        """Get bounding box of nodes.
+        """
+        boxes = []
+        for node in nodes:
+            x, y = node.position
+            boxes.append((x, y, x + node.width, y + node.height))
+        return (
+            min(box[0] for box in boxes),
+            min(box[1] for box in boxes),
+            max(box[2] for box in boxes),
+            max(box[3] for box in boxes)
+        )
+
+    def _index_nodes(self, nodes: Iterable[Node]):
+        """Add nodes to alignment index, or update their boxes.
+        """
+        self._alignment.update_many({
+            node.tag_id: self._get_box([node]) for node in nodes
+        })
+
+    def _start_drag(self):
+        """Remember bounding box of dragged nodes, to snap it while
+        dragging.
+        """
+        nodes = [i for i in self._dragged_items if isinstance(i, Node)]
+        if not nodes:
+            self._drag_box = None
+            return
+        self._drag_box = self._get_box(nodes)
+        self._drag_ids = frozenset(node.tag_id for node in nodes)
+
+    def _get_current_box(self) -> Box:
+        """Get current bounding box of dragged nodes.
+        """
+        return self._get_box(
+            i for i in self._dragged_items if isinstance(i, Node)
+        )
+
+    def _get_snapped_delta(self, delta_x: float,
+                           delta_y: float) -> tuple[float, float]:
+        """Move not snapped box of dragged nodes by mouse delta, and get
+        delta of the nodes, which puts them at the snapped box.
+        Smart guides take precedence over the grid.
+        """
+        x1, y1, x2, y2 = self._drag_box
+        box = x1 + delta_x, y1 + delta_y, x2 + delta_x, y2 + delta_y
+        self._drag_box = box
+
+        x, y = box[0], box[1]
+        if self._snap_to_grid_enabled:
+            x = snap_to_grid(x, self.SNAP_GRID_STEP)
+            y = snap_to_grid(y, self.SNAP_GRID_STEP)
+        shift_x, shift_y = self._alignment.snap(
+            box, self.SNAP_DISTANCE, self._drag_ids
+        )
+        if shift_x is not None:
+            x = box[0] + shift_x
+        if shift_y is not None:
+            y = box[1] + shift_y
+
+        current_x, current_y, _, _ = self._get_current_box()
+        return x - current_x, y - current_y
+
+    def _draw_guides(self):
+        """Draw smart guides, which dragged nodes are aligned with.
+        """
+        self._canvas.delete(self.TAG_GUIDE)
+        guides = self._alignment.get_guides(
+            self._get_current_box(), self._drag_ids
+        )
+        if not guides:
+            return
+        batch = CanvasBatch(self._canvas)
+        for guide in guides:
+            batch.create(
+                'line', guide,
+                **Styles.get(Style.GUIDE),
+                dash=(4, 4),
+                tags=(self.TAG_GUIDE, Styles.tag(Style.GUIDE))
+            )
+        batch.flush()
 
     def _callback_key_pressed(self, event: TkEvent):
         """Callback. Pressed some key.
         """
-        if event.keysym == 'Delete' and self._selected_item \
-                and isinstance(self._selected_item, Removable):
-            self._selected_item.delete()
+        if event.keysym == 'Delete':
+            for item in self._get_selection():
+                if isinstance(item, Removable):
+                    item.clear_selection()
+                    item.delete()
+                    self._nodes.pop(item.tag_id, None)
+                    self._alignment.remove(item.tag_id)
+                    self._emit(Operation.delete(item.tag_id))
             self._selected_item = None
+            self._extra_selection = []
+
+    # ---------------------- RULES ------------------------- #
+
+    def set_rules(self, rules: Optional[ConnectionRules]):
+        """Set rules of new connections, made by user; None for no rules.
+        Existing connections are not checked.
+        """
+        self._indexes.rules = RulesChecker(rules) if rules else None
+        if self._rules:
+            self._rules.invalidate()
+
+    def _update_rules(self):
+        """Rebuild rules checker's graph, if it's outdated by changes,
+        which were not reported by operations.
+        """
+        if self._rules and not self._rules.is_valid:
+            self._rules.rebuild(self.get_document())
+
+    def _invalidate_rules(self):
+        """Mark rules checker's graph outdated by elements, added or
+        removed without operations. Elements of applied operations are
+        not: the checker is updated by the operations themselves.
+        """
+        if self._rules and not self._is_applying:
+            self._rules.invalidate()
+
+    # ---------------------- OPERATIONS ------------------------- #
+
+    def add_operation_listener(self, listener: Callable[[Operation], None]):
+        """Subscribe listener to the diagram operations, made by user
+        in this view or, applied later, in other views of the diagram.
+        Listener is called synchronously, so it should be cheap.
+        """
+        self._operation_listeners.append(listener)
+
+    def remove_operation_listener(self,
+                                  listener: Callable[[Operation], None]):
+        """Unsubscribe listener from the diagram operations.
+        """
+        self._operation_listeners.remove(listener)
+
+    def add_drag_listener(self, listener: Callable[[Sequence[Node]], None]):
+        """Subscribe listener to intermediate positions of dragged nodes:
+        it gets them on every drag step. The final positions are reported
+        by move operations.
+        """
+        self._drag_listeners.append(listener)
+
+    def remove_drag_listener(self,
+                             listener: Callable[[Sequence[Node]], None]):
+        """Unsubscribe listener from positions of dragged nodes.
+        """
+        self._drag_listeners.remove(listener)
+
+    def _emit(self, operation: Operation):
+        """Notify listeners about the operation.
+        """
+        if operation.kind != OperationKind.MOVE:
+            self._bundler.schedule_rebuild()
+        if self._rules:
+            self._rules.apply(operation)
+        for listener in self._operation_listeners:
+            listener(operation)
+
+    # ---------------------- SEARCH ------------------------- #
+
+    def highlight_nodes(self, tag_ids: Sequence[str]):
+        """Highlight nodes, found by search, drop previous highlight.
+        """
+        self._canvas.delete(self.TAG_SEARCH_HIGHLIGHT)
+        self._canvas.dtag(self.TAG_SEARCH_MATCH, self.TAG_SEARCH_MATCH)
+
+        batch = CanvasBatch(self._canvas)
+        margin = self.SEARCH_MATCH_MARGIN
+        nodes = [self._nodes[id_] for id_ in tag_ids if id_ in self._nodes]
+        for node in nodes:
+            self._canvas.addtag_withtag(self.TAG_SEARCH_MATCH, node.tag_id)
+            x, y = node.position
+            batch.create(
+                'rectangle',
+                (
+                    x - margin,
+                    y - margin,
+                    x + node.width + margin,
+                    y + node.height + margin
+                ),
+                **Styles.get(Style.SEARCH_MATCH),
+                width=0,
+                # Node's tag_id makes highlight move and die with the node.
+                tags=(
+                    self.TAG_SEARCH_HIGHLIGHT,
+                    node.tag_id,
+                    Styles.tag(Style.SEARCH_MATCH)
+                ),
+            )
+        for node, highlight in zip(nodes, batch.flush()):
+            self._canvas.tag_lower(highlight, node.tag_id)
+
+        if self._filter_enabled:
+            self.set_filter(True)
+
+    def set_filter(self, enabled: bool):
+        """Turn on/off dimming of nodes, not matched by search.
+        """
+        self._filter_enabled = enabled
+        self._canvas.itemconfigure(Ability.DRAG, stipple='')
+        if enabled:
+            self._canvas.itemconfigure(
+                f'{Ability.DRAG}&&!{self.TAG_SEARCH_MATCH}',
+                stipple='gray25'
+            )
+
+    def show_node(self, tag_id: str):
+        """Scroll viewport to the node and select it.
+        """
+        node = self._nodes.get(tag_id)
+        if not node:
+            return
+
+        self._clear_selection()
+        node.draw_selection()
+        self._selected_item = node
+
+        x, y = node.position
+        x1, y1, x2, y2 = self._scroll_region
+        view_width = self._canvas.winfo_width()
+        view_height = self._canvas.winfo_height()
+        self._canvas.xview_moveto(
+            (x + (node.width - view_width) / 2 - x1) / (x2 - x1)
+        )
+        self._canvas.yview_moveto(
+            (y + (node.height - view_height) / 2 - y1) / (y2 - y1)
+        )
+
+    # ---------------------- DIFF ------------------------- #
+
+    def show_diff(self, diff: Optional[DiagramDiff]):
+        """Show changes of the diagram against its old version, drop
+        the previous ones; None just drops them.
+        Changed nodes get nested outlines by kinds of their changes, moved
+        ones are connected with their old places. Added and relabelled
+        edges are highlighted. Removed nodes and edges are drawn as ghosts
+        at their old places.
+        """
+        self._canvas.delete(self.TAG_DIFF)
+        if diff is None:
+            return
+
+        batch = CanvasBatch(self._canvas)
+        # Old centers of removed nodes, to draw removed edges:
+        removed: dict[str, Coords] = {}
+        # Amounts of node's outlines, to nest them:
+        outlines: dict[str, int] = defaultdict(int)
+        for change in diff.changes:
+            if change.is_edge:
+                continue
+            if change.kind == ChangeKind.REMOVED:
+                x, y = change.old.x, change.old.y
+                width, height = change.old.width, change.old.height
+                removed[change.id] = x + width // 2, y + height // 2
+                self._draw_diff_item(
+                    batch, 'rectangle',
+                    (x, y, x + width, y + height),
+                    Style.DIFF_REMOVED
+                )
+                continue
+            node = self._nodes.get(change.id)
+            if node is None:
+                continue
+            if change.kind == ChangeKind.MOVED:
+                x, y = node.position
+                self._draw_diff_item(
+                    batch, 'line',
+                    (
+                        change.old.x + node.width // 2,
+                        change.old.y + node.height // 2,
+                        x + node.width // 2,
+                        y + node.height // 2
+                    ),
+                    Style.DIFF_PATH,
+                    arrow=tk.LAST
+                )
+            outlines[node.tag_id] += 1
+            margin = self.DIFF_MARGIN * outlines[node.tag_id]
+            x, y = node.position
+            self._draw_diff_item(
+                batch, 'rectangle',
+                (
+                    x - margin,
+                    y - margin,
+                    x + node.width + margin,
+                    y + node.height + margin
+                ),
+                self.DIFF_STYLES[change.kind],
+                # Outline moves and dies with the node:
+                node.tag_id
+            )
+
+        for change in diff.changes:
+            if not change.is_edge:
+                continue
+            if change.kind in self.DIFF_EDGE_STYLES:
+                if Registry.contains(change.id, self._canvas):
+                    self._draw_diff_item(
+                        batch, 'line', self._canvas.coords(change.id),
+                        self.DIFF_EDGE_STYLES[change.kind], smooth=True
+                    )
+                continue
+            ends = [
+                removed.get(tag_id) or self._get_center(
+                    self._nodes.get(diff.matches.get(tag_id))
+                )
+                for tag_id in (change.old.source, change.old.target)
+            ]
+            if None not in ends:
+                self._draw_diff_item(
+                    batch, 'line', (*ends[0], *ends[1]),
+                    Style.DIFF_EDGE_REMOVED
+                )
+
+        batch.flush()
+        self._canvas.tag_lower(self.TAG_DIFF)
+        self._canvas.tag_lower(Styles.tag(Style.GRID))
+
+    def _draw_diff_item(self, batch: CanvasBatch, kind: str,
+                        coords: Sequence[float], style: str, *tags: str,
+                        **options):
+        """Add item of the diff to the batch.
+        """
+        batch.create(
+            kind, coords,
+            **Styles.get(style),
+            **options,
+            tags=(self.TAG_DIFF, Styles.tag(style), *tags)
+        )
+
+    @staticmethod
+    def _get_center(node: Optional[Node]) -> Optional[Coords]:
+        """Get node's center, if node is given.
+        """
+        if node is None:
+            return None
+        x, y = node.position
+        return x + node.width // 2, y + node.height // 2
+
+    # ---------------------- CLIPBOARD ------------------------- #
+
+    def _callback_copy(self, _: TkEvent):
+        """Callback. Copy selected nodes (with edges between them)
+        to clipboard.
+        """
+        nodes = self._get_selected_nodes()
+        if not nodes:
+            return
+        self._canvas.clipboard_clear()
+        self._canvas.clipboard_append(self.serialize(nodes).dumps())
+        self._paste_count = 0
+
+    def _callback_paste(self, _: TkEvent):
+        """Callback. Paste nodes from clipboard.
+        Every next paste of the same payload is shifted further.
+        """
+        try:
+            document = Document.loads(self._canvas.clipboard_get())
+        except (tk.TclError, ValueError):
+            # Clipboard is empty or contains something else.
+            return
+        self._paste_count += 1
+        self._paste(document, self.PASTE_OFFSET * self._paste_count)
+
+    def _callback_duplicate(self, _: TkEvent):
+        """Callback. Duplicate selected nodes, bypassing clipboard.
+        """
+        nodes = self._get_selected_nodes()
+        if nodes:
+            self._paste(self.serialize(nodes), self.PASTE_OFFSET)
+
+    def _paste(self, document: Document, offset: int):
+        """Create copy of the document's nodes and edges, shifted by offset,
+        and select them.
+        """
+        self._clear_selection()
+        nodes, edges = self.add_document(document, offset, offset)
+        self._emit_created(nodes, edges)
+        if len(nodes) <= self.PASTE_SELECTION_LIMIT:
+            for node in nodes:
+                node.draw_selection()
+            self._extra_selection = nodes
+
+    # ---------------------- GROUPS ------------------------- #
+
+    def _callback_group(self, _: TkEvent):
+        """Callback. Collapse selected nodes into a group.
+        """
+        nodes = self._get_selected_nodes()
+        if len(nodes) < 2:
+            return
+        self._clear_selection()
+        group = self.collapse(nodes)
+        group.draw_selection()
+        self._selected_item = group
+
+    def _callback_expand_group(self, _: TkEvent):
+        """Callback. Expand selected groups.
+        """
+        groups = [
+            node for node in self._get_selected_nodes()
+            if isinstance(node, GroupNode)
+        ]
+        self._clear_selection()
+        for group in groups:
+            self.expand(group)
+
+    def collapse(self, nodes: Sequence[Node]) -> GroupNode:
+        """Replace nodes with a single group node.
+        Members' canvas items are removed, they are kept as group's data.
+        Edges, crossing group boundary, are replaced with aggregate edges:
+        one per external node and direction.
+        """
+        ids = {node.tag_id for node in nodes}
+        members = self.serialize(nodes)
+        crossing_edges = []
+        # (external node, is edge incoming) -> amount of edges:
+        aggregated: dict[tuple[Node, bool], int] = defaultdict(int)
+        for node in nodes:
+            for edge in node.input_connectors:
+                if edge.source.tag_id not in ids:
+                    crossing_edges.append(edge.to_data())
+                    aggregated[edge.source, True] += 1
+            for edge in node.output_connectors:
+                if edge.target.tag_id not in ids:
+                    crossing_edges.append(edge.to_data())
+                    aggregated[edge.target, False] += 1
+
+        self._remove_nodes(nodes)
+
+        group = GroupNode(
+            self._canvas,
+            min(data.x for data in members.nodes),
+            min(data.y for data in members.nodes),
+            GroupData(members.nodes, members.edges, crossing_edges)
+        )
+        self._nodes[group.tag_id] = group
+        self._index_nodes([group])
+        self._emit(Operation.create_node(group.to_data()))
+
+        for (external, incoming), count in aggregated.items():
+            source, target = (external, group) if incoming \
+                else (group, external)
+            edge = AggregateEdge(self._canvas, source, target, count)
+            self._labeler.add([edge])
+            self._emit(Operation.connect(edge.to_data()))
+        self._canvas.tag_raise(Ability.DRAG)
+        return group
+
+    def expand(self, group: GroupNode) -> list[Node]:
+        """Replace group node with its members, restore their edges.
+        Members' canvas items are built only now, in batches.
+        Edges to external nodes, which don't exist anymore, are dropped.
+        Return members.
+        """
+        content = group.content
+        delta_x, delta_y = group.get_members_offset()
+        # Members of a pasted copy of a group need new ids:
+        keep_ids = not any(
+            Registry.contains(data.id, self._canvas)
+            for data in content.nodes
+        )
+        self._remove_nodes([group])
+
+        nodes, edges = self.add_document(
+            Document(content.nodes, content.edges),
+            delta_x, delta_y, keep_ids
+        )
+        by_data_id = {
+            data.id: node for data, node in zip(content.nodes, nodes)
+        }
+
+        pairs = []
+        edges_ids = []
+        ports = []
+        labels = []
+        for edge in content.crossing_edges:
+            source = by_data_id.get(edge.source) \
+                or self._nodes.get(edge.source)
+            target = by_data_id.get(edge.target) \
+                or self._nodes.get(edge.target)
+            if source and target:
+                pairs.append((source, target))
+                edges_ids.append(edge.id)
+                ports.append((edge.source_port, edge.target_port))
+                labels.append(edge.label)
+        crossing_edges = DirectedEdge.create_many(
+            self._canvas, pairs, edges_ids if keep_ids else None, ports,
+            labels
+        )
+        self._labeler.add(crossing_edges)
+        edges += crossing_edges
+        self._canvas.tag_raise(Ability.DRAG)
+
+        self._emit_created(nodes, edges)
+        return nodes
+
+    def _remove_nodes(self, nodes: Sequence[Node], emit: bool = True):
+        """Remove nodes with their edges from registry, and their canvas
+        items by a single canvas call.
+        Operation listeners are notified, if emit is set.
+        """
+        edges = {
+            edge
+            for node in nodes
+            for edge in node.input_connectors + node.output_connectors
+        }
+        tags = []
+        for edge in edges:
+            edge.source.remove_output_connector(edge)
+            edge.target.remove_input_connector(edge)
+            Registry.delete(edge.tag_id, self._canvas)
+            tags.append(edge.tag_id)
+        self._labeler.remove(edges)
+        for node in nodes:
+            Registry.delete(node.tag_id, self._canvas)
+            del self._nodes[node.tag_id]
+            self._alignment.remove(node.tag_id)
+            tags.append(node.tag_id)
+            if emit:
+                self._emit(Operation.delete(node.tag_id))
+        self._canvas.delete(*tags)
+
+    # ---------------------- PAGING ------------------------- #
+
+    def get_node(self, tag_id: str) -> Optional[Node]:
+        """Get node by tag_id, None if there is no such node.
+        """
+        return self._nodes.get(tag_id)
+
+    def get_edge(self, tag_id: str) -> Optional[DirectedEdge]:
+        """Get edge by tag_id, None if there is no such edge.
+        """
+        if tag_id in self._nodes \
+                or not Registry.contains(tag_id, self._canvas):
+            return None
+        item = Registry.get(tag_id, self._canvas)
+        return item if isinstance(item, DirectedEdge) else None
+
+    def get_visible_box(self) -> Box:
+        """Get canvas coords of the visible area.
+        """
+        x1, y1 = self._get_absolute_coords(0, 0)
+        x2, y2 = self._get_absolute_coords(
+            self._canvas.winfo_width(), self._canvas.winfo_height()
+        )
+        return x1, y1, x2, y2
+
+    def extend_scroll_region(self, box: Box):
+        """Extend scroll region to contain the box, f.e. bounds of nodes,
+        which are not loaded yet.
+        """
+        margin = self.EMPTY_FIELD_WIDTH
+        x1, y1, x2, y2 = self._scroll_region
+        self._scroll_region = (
+            min(x1, box[0] - margin),
+            min(y1, box[1] - margin),
+            max(x2, box[2] + margin),
+            max(y2, box[3] + margin),
+        )
+        self._canvas.configure(scrollregion=self._scroll_region)
+
+    def unload_nodes(self, nodes: Sequence[Node]):
+        """Remove nodes with their edges, without notifying operation
+        listeners: they are not deleted from the diagram, just paged out.
+        """
+        unloaded = set(nodes)
+        if any(item in unloaded for item in self._get_selection()):
+            self._clear_selection()
+        self._remove_nodes(nodes, emit=False)
+        self._bundler.schedule_rebuild()
+        self._invalidate_rules()
+
+    def unload_edges(self, edges: Iterable[DirectedEdge]):
+        """Remove edges, without notifying operation listeners.
+        Canvas items are removed by a single canvas call.
+        """
+        edges = list(edges)
+        tags = []
+        for edge in edges:
+            if edge is self._selected_item:
+                self._clear_selection()
+            edge.source.remove_output_connector(edge)
+            edge.target.remove_input_connector(edge)
+            Registry.delete(edge.tag_id, self._canvas)
+            tags.append(edge.tag_id)
+        self._labeler.remove(edges)
+        if tags:
+            self._canvas.delete(*tags)
+        self._bundler.schedule_rebuild()
+        self._invalidate_rules()
+
+    # ---------------------- VIEWS ------------------------- #
+
+    def apply_operations(self, operations: Sequence[Operation],
+                         indexes_updated: bool = False):
+        """Apply operations, made in another view of the diagram or by
+        another editor, then notify operation listeners about them.
+        Runs of creations and of deletions are applied in batches, so
+        a bulk change costs a single canvas call per run.
+        The rules checker is updated by the operations incrementally,
+        and moved nodes are re-indexed in the alignment index, unless
+        indexes_updated is set: indexes are shared with the view, which
+        made them. Operations over absent elements are skipped.
+        """
+        if self._rules and not indexes_updated:
+            for operation in operations:
+                self._rules.apply(operation)
+        self._is_applying = True
+        try:
+            moved = self._apply_operations(operations)
+        finally:
+            self._is_applying = False
+        if not indexes_updated:
+            self._index_nodes(
+                node for node in moved if node.tag_id in self._nodes
+            )
+        self._bundler.schedule_rebuild()
+        for operation in operations:
+            for listener in self._operation_listeners:
+                listener(operation)
+
+    def _apply_operations(self,
+                          operations: Sequence[Operation]) -> list[Node]:
+        """Apply operations to elements of the view.
+        Return moved nodes.
+        """
+        moved = []
+        created = Document()
+        deleted: list[str] = []
+        for operation in operations:
+            kind = operation.kind
+            if deleted and kind != OperationKind.DELETE:
+                self._delete_by_ids(deleted)
+                deleted = []
+            if (created.nodes or created.edges) and kind not in (
+                    OperationKind.CREATE_NODE, OperationKind.CONNECT):
+                self._create_from_document(created)
+                created = Document()
+
+            if kind == OperationKind.CREATE_NODE:
+                created.nodes.append(NodeData(**operation.payload))
+            elif kind == OperationKind.CONNECT:
+                created.edges.append(
+                    EdgeData(id=operation.id, **operation.payload)
+                )
+            elif kind == OperationKind.DELETE:
+                deleted.append(operation.id)
+            elif kind == OperationKind.LABEL:
+                edge = self.get_edge(operation.id)
+                if edge:
+                    edge.set_label(operation.payload['label'])
+            elif operation.id in self._nodes:
+                node = self._nodes[operation.id]
+                if kind == OperationKind.MOVE:
+                    x, y = node.position
+                    node.move(
+                        operation.payload['x'] - x,
+                        operation.payload['y'] - y
+                    )
+                    moved.append(node)
+                elif kind == OperationKind.EDIT:
+                    node.set_text(**operation.payload)
+
+        if deleted:
+            self._delete_by_ids(deleted)
+        if created.nodes or created.edges:
+            self._create_from_document(created)
+        return moved
+
+    def _create_from_document(self, document: Document):
+        """Create nodes and edges, made in another view, keeping their
+        ids; edges may end at existing nodes.
+        """
+        nodes = [
+            data for data in document.nodes if data.id not in self._nodes
+        ]
+        edges = [
+            data for data in document.edges
+            if not Registry.contains(data.id, self._canvas)
+        ]
+        ends = {data.source for data in edges} \
+            | {data.target for data in edges}
+        self.add_document(
+            Document(nodes, edges),
+            keep_ids=True,
+            nodes_map={
+                tag_id: self._nodes[tag_id]
+                for tag_id in ends if tag_id in self._nodes
+            }
+        )
+
+    def _delete_by_ids(self, tag_ids: Sequence[str]):
+        """Delete nodes and edges, deleted in another view or by another
+        editor; deleted nodes stop being dragged.
+        """
+        tag_ids = dict.fromkeys(tag_ids)
+        self.unload_edges([
+            Registry.get(tag_id, self._canvas) for tag_id in tag_ids
+            if tag_id not in self._nodes
+            and Registry.contains(tag_id, self._canvas)
+        ])
+        self.unload_nodes([
+            self._nodes[tag_id] for tag_id in tag_ids
+            if tag_id in self._nodes
+        ])
+        dragged = [
+            item for item in self._dragged_items
+            if not isinstance(item, Node)
+            or self._nodes.get(item.tag_id) is item
+        ]
+        if len(dragged) < len(self._dragged_items):
+            self._dragged_items = dragged
+            # Snapped box is of the rest of nodes:
+            self._start_drag()
+
+    def destroy(self):
+        """Destroy the view with its elements. Indexes are left to other
+        views of the diagram.
+        """
+        self._labeler.stop()
+        Styles.remove_canvas(self._canvas)
+        Styles.remove_listener(self._callback_theme)
+        Registry.delete_scope(self._canvas)
+        self._frame.destroy()
+
+    # ---------------------- SERIALIZATION ------------------------- #
+
+    @staticmethod
+    def serialize(nodes: Iterable[Node]) -> Document:
+        """Serialize nodes and edges between them.
+        """
+        nodes = list(nodes)
+        ids = {node.tag_id for node in nodes}
+        return Document(
+            nodes=[node.to_data() for node in nodes],
+            edges=[
+                edge.to_data()
+                for node in nodes
+                for edge in node.output_connectors
+                if edge.target.tag_id in ids
+            ]
+        )
+
+    def add_document(self, document: Document, delta_x: int = 0,
+                     delta_y: int = 0, keep_ids: bool = False,
+                     nodes_map: Optional[dict[str, Node]] = None
+                     ) -> tuple[list[Node], list[DirectedEdge]]:
+        """Create document's nodes and edges in workspace, in batches.
+        Nodes are shifted by delta_x, delta_y.
+        If keep_ids is set, elements get tag_ids from document, otherwise
+        new ones are used.
+        nodes_map (document's node id -> node) allows edges to refer nodes,
+        created before (f.e. by previous import batch); it's updated with
+        created nodes.
+        Operation listeners are not notified.
+        Return created nodes and edges.
+        """
+        nodes_data = document.nodes
+        if delta_x or delta_y:
+            nodes_data = [
+                replace(data, x=data.x + delta_x, y=data.y + delta_y)
+                for data in nodes_data
+            ]
+
+        by_data_id = nodes_map if nodes_map is not None else {}
+        plain_data = [data for data in nodes_data if data.group is None]
+        by_data_id.update(zip(
+            (data.id for data in plain_data),
+            Node.create_many(self._canvas, plain_data, keep_ids)
+        ))
+        for data in nodes_data:
+            if data.group is None:
+                continue
+            if not keep_ids:
+                # Copy of the group has no links with the outer world:
+                group = dict(data.group, crossing_edges=[])
+                data = replace(data, group=group)
+            by_data_id[data.id] = GroupNode.from_data(
+                self._canvas, data, keep_ids
+            )
+        nodes = [by_data_id[data.id] for data in nodes_data]
+
+        pairs = []
+        edges_ids = []
+        ports = []
+        labels = []
+        for edge in document.edges:
+            source = by_data_id.get(edge.source)
+            target = by_data_id.get(edge.target)
+            if source and target:
+                pairs.append((source, target))
+                edges_ids.append(edge.id)
+                ports.append((edge.source_port, edge.target_port))
+                labels.append(edge.label)
+        edges = DirectedEdge.create_many(
+            self._canvas, pairs, edges_ids if keep_ids else None, ports,
+            labels
+        )
+        self._labeler.add(edges)
+
+        # Nodes should be above edges:
+        self._canvas.tag_raise(Ability.DRAG)
+        for node in nodes:
+            self._nodes[node.tag_id] = node
+        self._index_nodes(nodes)
+        self._bundler.schedule_rebuild()
+        self._invalidate_rules()
+        return nodes, edges
+
+    def import_batches(self, batches: Iterator[Document],
+                       on_progress: Callable[[int, int], None],
+                       on_done: Callable[[Optional[Exception]], None]):
+        """Add imported document's batches (see `core.importers`) to
+        workspace, one batch per Tk event loop iteration, so UI stays
+        responsive. Adding is stopped by `clear`.
+        on_progress gets amount of imported nodes and edges after each
+        batch, on_done gets None or the import error.
+        """
+        self._add_batches(batches, on_progress, on_done, False)
+
+    def load_batches(self, batches: Iterator[Document],
+                     on_progress: Callable[[int, int], None],
+                     on_done: Callable[[Optional[Exception]], None]):
+        """Add batches of a loaded document (see `Document.split`), like
+        `import_batches`, but elements keep their ids, and operation
+        listeners are not notified: it's not a change of the diagram.
+        """
+        self._add_batches(batches, on_progress, on_done, True)
+
+    def _add_batches(self, batches: Iterator[Document],
+                     on_progress: Callable[[int, int], None],
+                     on_done: Callable[[Optional[Exception]], None],
+                     keep_ids: bool):
+        """Add document's batches, one batch per Tk event loop iteration.
+        Created elements are emitted, unless they keep their ids.
+        """
+        nodes_map: dict[str, Node] = {}
+        counts = [0, 0]
+
+        def add_next_batch():
+            self._batches_timer = ''
+            try:
+                batch = next(batches, None)
+            except (OSError, ValueError) as e:
+                on_done(e)
+                return
+            if batch is None:
+                self._update_scroll_region()
+                on_done(None)
+                return
+
+            nodes, edges = self.add_document(
+                batch, keep_ids=keep_ids, nodes_map=nodes_map
+            )
+            if not keep_ids:
+                self._emit_created(nodes, edges)
+            counts[0] += len(nodes)
+            counts[1] += len(edges)
+            on_progress(*counts)
+            self._batches_timer = self._canvas.after(1, add_next_batch)
+
+        self._batches_timer = self._canvas.after_idle(add_next_batch)
+
+    def _emit_created(self, nodes: Sequence[Node],
+                      edges: Sequence[DirectedEdge]):
+        """Notify listeners about created nodes and edges.
+        """
+        for node in nodes:
+            self._emit(Operation.create_node(node.to_data()))
+        for edge in edges:
+            self._emit(Operation.connect(edge.to_data()))
+
+    def _update_scroll_region(self):
+        """Extend scroll region to contain all canvas items.
+        """
+        bbox = self._canvas.bbox(tk.ALL)
+        if bbox:
+            self.extend_scroll_region(bbox)
+
+    def get_document(self) -> Document:
+        """Serialize the whole workspace.
+        """
+        return self.serialize(self._nodes.values())
+
+    def get_memory_report(self) -> MemoryReport:
+        """Get memory, taken by nodes and edges, with their shares of
+        the registry and of the workspace's nodes.
+        """
+        nodes = list(self._nodes.values())
+        edges = [edge for node in nodes for edge in node.output_connectors]
+        registry = Registry.REGISTRY[self._canvas]
+        report = MemoryReport()
+        report.add('nodes', nodes)
+        report.add('edges', edges)
+        report.add_index('nodes', self._nodes)
+        report.add_index('nodes', registry, len(nodes))
+        report.add_index('edges', registry, len(edges))
+        return report
+
+    def clear(self):
+        """Remove all nodes and edges, stop adding of batches.
+        """
+        if self._batches_timer:
+            self._canvas.after_cancel(self._batches_timer)
+            self._batches_timer = ''
+        self._clear_selection()
+        for node in self._nodes.values():
+            for edge in node.output_connectors:
+                Registry.delete(edge.tag_id, self._canvas)
+            Registry.delete(node.tag_id, self._canvas)
+        self._nodes.clear()
+        self._alignment.clear()
+        self._labeler.clear()
+        self._canvas.delete(Ability.SELECT)
+        self._canvas.delete(self.TAG_DIFF)
+        self._bundler.schedule_rebuild()
+        if self._rules:
+            self._rules.invalidate()
+
+    def save(self, path: str):
+        """Save workspace to file.
+        """
+        self.get_document().save(path)
+
+    def load(self, path: str):
+        """Replace workspace content with the document from file.
+        Raise ValueError, if file is not a valid document.
+        """
+        document = Document.load(path)
+        self.clear()
+        self.add_document(document, keep_ids=True)